@@ -1,98 +1,228 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory
+from flask import Flask, Response, g, request, jsonify, render_template, send_file, send_from_directory
 from flask_cors import CORS
-from services.validator import validate_idea
+# The validation pipeline (Gemini SDK, numpy, fpdf, requests) is imported by
+# the routes that need it, so workers boot fast and the static pages never
+# load it; services.warmup can preload it after fork
+from services.metrics import metrics, start_trace, finish_trace, trace_breakdown, in_context
+from services.log_pipeline import configure_logging, set_request_id, reset_request_id
+from services.http_cache import page_cache, accepted_encoding, compress_response, IMMUTABLE_MAX_AGE
 from config import Config
 import os
+import json
+import queue
+import re
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
 import logging
-from logging.handlers import RotatingFileHandler
 import traceback
+from concurrent.futures import TimeoutError as RenderTimeout
 
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app, resources={
-    r"/analyze_idea": {
+    r"/analyze_idea*": {
+        "origins": ["*"],
+        "methods": ["POST"],
+        "allow_headers": ["Content-Type", "X-Debug-Timing", "X-Request-Id"],
+        "expose_headers": ["X-Request-Id"]
+    },
+    r"/generate_pdf": {
         "origins": ["*"],
         "methods": ["POST"],
         "allow_headers": ["Content-Type"]
+    },
+    r"/bulk": {
+        "origins": ["*"],
+        "methods": ["POST"],
+        "allow_headers": ["Content-Type"],
+        "expose_headers": ["X-Bulk-Id"]
+    },
+    r"/upload_document": {
+        "origins": ["*"],
+        "methods": ["POST"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/save_analysis": {
+        "origins": ["*"],
+        "methods": ["POST"],
+        "allow_headers": ["Content-Type"]
+    },
+    r"/analyses*": {
+        "origins": ["*"],
+        "methods": ["GET"]
+    },
+    r"/jobs*": {
+        "origins": ["*"],
+        "methods": ["GET", "POST"],
+        "allow_headers": ["Content-Type"]
     }
 })
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Send this request header to get a per-stage timing breakdown with the result
+DEBUG_TIMING_HEADER = 'X-Debug-Timing'
+
+# Request id taken from this header when the caller sends one, and echoed back
+REQUEST_ID_HEADER = 'X-Request-Id'
+VALID_REQUEST_ID = re.compile(r'^[\w.-]{1,64}$')
+
+# Configure logging: JSON lines written by a background thread (services/log_pipeline.py)
+configure_logging()
 logger = logging.getLogger(__name__)
-handler = RotatingFileHandler('app.log', maxBytes=10000, backupCount=3)
-handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-handler.setFormatter(formatter)
-app.logger.addHandler(handler)
 
-# Ensure reports directory exists
-os.makedirs('static/reports', exist_ok=True)
+@app.before_request
+def start_request():
+    request_id = request.headers.get(REQUEST_ID_HEADER, '')
+    g.request_id = request_id if VALID_REQUEST_ID.match(request_id) else uuid.uuid4().hex
+    g.request_id_token = set_request_id(g.request_id)
+    g.trace_token = start_trace()
+    g.started = time.perf_counter()
+
+@app.after_request
+def log_request(response):
+    """One access line per request, with its stage timings"""
+    if 'started' not in g:
+        return response
+    response.headers[REQUEST_ID_HEADER] = g.request_id
+    duration_ms = (time.perf_counter() - g.started) * 1000
+    stages = trace_breakdown()
+    logger.info("%s %s %s %.1fms", request.method, request.path, response.status_code, duration_ms,
+                extra={'http': {'method': request.method, 'path': request.path,
+                                'status': response.status_code, 'duration_ms': round(duration_ms, 2)},
+                       **({'stages': stages} if stages else {})})
+    return response
+
+@app.after_request
+def compress_json(response):
+    """Compress large JSON bodies"""
+    return compress_response(response, request.headers.get('Accept-Encoding'))
+
+def cached_page(template):
+    """A page that renders the same for everyone, from the page cache.
+
+    Served pre-compressed when the client accepts it, with an ETag so
+    revalidation gets a 304. Debug mode renders every time.
+    """
+    if not Config.PAGE_CACHE_ENABLED or app.debug:
+        return render_template(template)
+    page = page_cache.get(template, lambda: render_template(template))
+    encoding = None
+    if request.if_none_match.contains_weak(page.etag):
+        response = Response(status=304)
+    else:
+        encoding = accepted_encoding(request.headers.get('Accept-Encoding'), page.variants)
+        response = Response(page.variants.get(encoding, page.body), mimetype='text/html')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(page.etag, weak=True)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = Config.PAGE_MAX_AGE
+    metrics.inc('http_page_responses_total', status=response.status_code, encoding=encoding or 'identity')
+    return response
+
+@app.teardown_request
+def finish_request(exc):
+    # A streamed response may be torn down in another context; nothing to undo there
+    for reset, name in ((finish_trace, 'trace_token'), (reset_request_id, 'request_id_token')):
+        token = g.pop(name, None)
+        if token is not None:
+            try:
+                reset(token)
+            except ValueError:
+                pass
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return cached_page('index.html')
 
 @app.route('/features')
 def features():
-    return render_template('features.html')
+    return cached_page('features.html')
 
 @app.route('/pricing')
 def pricing():
-    return render_template('pricing.html')
+    return cached_page('pricing.html')
 
 @app.route('/about')
 def about():
-    return render_template('about.html')
+    return cached_page('about.html')
 
-@app.route('/analyze_idea', methods=['POST'])
-def analyze_idea():
-    logger.info("Received analyze_idea request")
-    
+def parse_idea_request():
+    """Read and validate an analysis request body.
+
+    Returns ``(params, None)`` on success or ``(None, error_response)``.
+    """
     if not request.is_json:
         logger.error("Request must be JSON")
-        return jsonify({
+        return None, (jsonify({
             'error': 'Invalid request format',
             'message': 'Request must be in JSON format'
-        }), 400
+        }), 400)
+
+    data = request.get_json()
+    logger.debug("Request data: %s", data)  # Formatted only if sampled in
+
+    idea = data.get('idea', '').strip()
+    industry = data.get('industry', '').strip() or None
+    # Optional per-request switch between batched and per-section prompts
+    batch = data.get('batch') if isinstance(data.get('batch'), bool) else None
+    # Analysis this one edits; only the sections whose inputs changed are redone
+    previous_analysis_id = data.get('previous_analysis_id')
+    if not isinstance(previous_analysis_id, str) or not previous_analysis_id.strip():
+        previous_analysis_id = None
+
+    # Validate input
+    if not idea:
+        logger.error("No idea provided")
+        return None, (jsonify({
+            'error': 'Validation error',
+            'message': 'Please describe your startup idea',
+            'code': 'MISSING_IDEA'
+        }), 400)
+
+    if len(idea) < 20:
+        logger.error(f"Idea too short ({len(idea)} chars)")
+        return None, (jsonify({
+            'error': 'Validation error',
+            'message': 'Description must be at least 20 characters long',
+            'code': 'IDEA_TOO_SHORT',
+            'min_length': 20,
+            'current_length': len(idea)
+        }), 400)
+
+    return {'idea': idea, 'industry': industry, 'batch': batch,
+            'previous_analysis_id': previous_analysis_id}, None
+
+@app.route('/analyze_idea', methods=['POST'])
+def analyze_idea():
+    logger.info("Received analyze_idea request")
     
     try:
-        data = request.get_json()
-        logger.debug(f"Request data: {data}")
-        
-        idea = data.get('idea', '').strip()
-        industry = data.get('industry', '').strip() or None
-        
-        # Validate input
-        if not idea:
-            logger.error("No idea provided")
-            return jsonify({
-                'error': 'Validation error',
-                'message': 'Please describe your startup idea',
-                'code': 'MISSING_IDEA'
-            }), 400
-        
-        if len(idea) < 20:
-            logger.error(f"Idea too short ({len(idea)} chars)")
-            return jsonify({
-                'error': 'Validation error',
-                'message': 'Description must be at least 20 characters long',
-                'code': 'IDEA_TOO_SHORT',
-                'min_length': 20,
-                'current_length': len(idea)
-            }), 400
+        params, error = parse_idea_request()
+        if error:
+            return error
+        idea = params['idea']
         
         # Perform validation
         logger.info(f"Validating idea: {idea[:50]}...")
-        validation_result = validate_idea(idea, industry)
-        logger.info("Validation completed successfully")
+        started = time.perf_counter()
+        from services.validator import validate_idea
+        validation_result = validate_idea(idea, params['industry'], batch=params['batch'],
+                                          previous_analysis_id=params['previous_analysis_id'])
+        # Every request is traced for the access log; the breakdown is returned on request
+        timings = trace_breakdown() if request.headers.get(DEBUG_TIMING_HEADER) else None
+        logger.info(f"Validation completed in {(time.perf_counter() - started) * 1000:.2f}ms (batch={params['batch']})")
         
-        return jsonify({
+        body = {
             'status': 'success',
             'data': validation_result
-        })
+        }
+        if timings is not None:
+            body['timings'] = timings
+        return jsonify(body)
         
     except Exception as e:
         logger.error(f"Analysis error: {str(e)}\n{traceback.format_exc()}")
@@ -103,9 +233,400 @@ def analyze_idea():
             'code': 'ANALYSIS_ERROR'
         }), 500
 
+@app.route('/analyze_idea/stream', methods=['POST'])
+def analyze_idea_stream():
+    """Server-Sent Events variant of /analyze_idea.
+
+    Emits a ``section`` event with the result fields of each section as soon
+    as it is ready, then ``complete`` with the full result (or ``error``).
+    """
+    logger.info("Received analyze_idea stream request")
+    try:
+        params, error = parse_idea_request()
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}\n{traceback.format_exc()}")
+        params, error = None, (jsonify({
+            'error': 'Analysis failed',
+            'message': 'An error occurred while analyzing your idea',
+            'details': str(e),
+            'code': 'ANALYSIS_ERROR'
+        }), 500)
+    if error:
+        return error
+
+    events = queue.Queue()
+
+    def run_validation():
+        try:
+            from services.validator import validate_idea
+            logger.info(f"Validating idea: {params['idea'][:50]}...")
+            started = time.perf_counter()
+            result = validate_idea(
+                params['idea'], params['industry'], batch=params['batch'],
+                previous_analysis_id=params['previous_analysis_id'],
+                on_section=lambda name, payload: events.put(('section', {'section': name, 'data': payload}))
+            )
+            logger.info(f"Streamed validation completed in {(time.perf_counter() - started) * 1000:.2f}ms")
+            events.put(('complete', {'status': 'success', 'data': result}))
+        except Exception as e:
+            logger.error(f"Analysis error: {str(e)}\n{traceback.format_exc()}")
+            events.put(('error', {
+                'error': 'Analysis failed',
+                'message': 'An error occurred while analyzing your idea',
+                'details': str(e),
+                'code': 'ANALYSIS_ERROR'
+            }))
+        finally:
+            events.put(None)
+
+    # In the request's context, so its log lines keep the request id
+    threading.Thread(target=in_context(run_validation), name='analyze-stream', daemon=True).start()
+
+    def generate():
+        yield ': connected\n\n'  # Flush headers straight away
+        while True:
+            try:
+                item = events.get(timeout=15)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            if item is None:
+                break
+            event, payload = item
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue a validation and return its job id straight away"""
+    from services.jobs import job_queue, QueueFull
+    logger.info("Received job request")
+    try:
+        params, error = parse_idea_request()
+        if error:
+            return error
+        job, created = job_queue.submit(params['idea'], params['industry'], params['batch'])
+    except QueueFull as e:
+        logger.warning(f"Job queue full: {str(e)}")
+        response = jsonify({
+            'error': 'Too many requests',
+            'message': 'The analysis queue is full, please try again shortly',
+            'code': 'QUEUE_FULL'
+        })
+        response.headers['Retry-After'] = '30'
+        return response, 429
+    except Exception as e:
+        logger.error(f"Job submission error: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({
+            'error': 'Analysis failed',
+            'message': 'An error occurred while queueing your idea',
+            'details': str(e),
+            'code': 'JOB_ERROR'
+        }), 500
+
+    return jsonify({
+        'status': 'success',
+        'job_id': job['job_id'],
+        'job_status': job['status'],
+        'status_url': f"/jobs/{job['job_id']}",
+        'result_url': f"/jobs/{job['job_id']}/result"
+    }), 202 if created else 200
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Job status and the sections finished so far"""
+    from services.jobs import job_queue
+    job_queue.start()  # No-op once running; resumes jobs queued before a restart
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Not found',
+            'message': 'Unknown or expired job',
+            'code': 'JOB_NOT_FOUND'
+        }), 404
+    job.pop('result')
+    return jsonify({'status': 'success', 'data': job})
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Final result: 200 when done, 202 while the job is still pending"""
+    from services.jobs import job_queue
+    job_queue.start()  # No-op once running; resumes jobs queued before a restart
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'error': 'Not found',
+            'message': 'Unknown or expired job',
+            'code': 'JOB_NOT_FOUND'
+        }), 404
+    if job['status'] == 'failed':
+        return jsonify({
+            'error': 'Analysis failed',
+            'message': 'An error occurred while analyzing your idea',
+            'details': job['error'],
+            'code': 'ANALYSIS_ERROR'
+        }), 500
+    if job['status'] != 'done':
+        return jsonify({'status': job['status'], 'job_id': job_id}), 202
+    return jsonify({'status': 'success', 'data': job['result']})
+
+@app.route('/bulk', methods=['POST'])
+def bulk_validate():
+    """Validate a CSV or JSONL batch of ideas, streaming JSONL results.
+
+    Takes an uploaded ``file``, a raw CSV/JSONL body, or JSON ``{"rows":
+    [...]}``. Posting the same rows again (or passing back the
+    ``X-Bulk-Id`` header as ``bulk_id``) resumes an interrupted run.
+    """
+    from services.bulk import BulkInputError, read_rows, detect_format, bulk_id, run_bulk, purge_checkpoints
+    logger.info("Received bulk request")
+    try:
+        upload = request.files.get('file')
+        if upload:
+            fmt = detect_format(upload.filename, upload.mimetype)
+            rows = read_rows(upload.read().decode('utf-8-sig'), fmt)
+        elif request.is_json:
+            data = request.get_json(silent=True)
+            lines = data.get('rows') if isinstance(data, dict) else None
+            if not isinstance(lines, list):
+                raise BulkInputError("JSON body needs a 'rows' list")
+            rows = read_rows('\n'.join(json.dumps(row) for row in lines), 'jsonl')
+        else:
+            rows = read_rows(request.get_data(as_text=True), detect_format(content_type=request.content_type))
+    except (BulkInputError, UnicodeDecodeError) as e:
+        logger.error(f"Bad bulk input: {str(e)}")
+        return jsonify({
+            'error': 'Validation error',
+            'message': str(e),
+            'code': 'INVALID_BULK_INPUT'
+        }), 400
+    if not rows:
+        return jsonify({
+            'error': 'Validation error',
+            'message': 'No rows to validate',
+            'code': 'INVALID_BULK_INPUT'
+        }), 400
+
+    run_id = request.args.get('bulk_id') or bulk_id(rows)
+    if not run_id.isalnum() or len(run_id) > 64:
+        return jsonify({
+            'error': 'Validation error',
+            'message': 'Invalid bulk_id',
+            'code': 'INVALID_BULK_INPUT'
+        }), 400
+    purge_checkpoints(Config.BULK_DIR, Config.BULK_CHECKPOINT_TTL_DAYS * 24 * 3600)
+    checkpoint = os.path.join(Config.BULK_DIR, f"{run_id}.jsonl")
+    logger.info(f"Bulk run {run_id}: {len(rows)} rows")
+
+    def generate():
+        for record in run_bulk(rows, checkpoint):
+            yield json.dumps(record, default=str) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'X-Bulk-Id': run_id,
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def page_limit(default=20, maximum=100):
+    try:
+        return min(maximum, max(1, int(request.args.get('limit', default))))
+    except ValueError:
+        return default
+
+@app.route('/upload_document', methods=['POST'])
+def upload_document():
+    """Reduce an uploaded pitch document (PDF, DOCX or TXT) to an idea description.
+
+    The multipart ``file`` is streamed to a temporary spool and read a
+    paragraph at a time. The response's ``summary`` is a capped,
+    deduplicated digest of the text, ready to send as ``idea``.
+    """
+    from werkzeug.formparser import FormDataParser
+    from services.documents import (DocumentError, DocumentTooLarge, UnsupportedDocument, CappedStream,
+                                    detect_format, iter_paragraphs, spool_factory, summarize_document)
+    logger.info("Received document upload")
+    limit_mb = Config.UPLOAD_MAX_BYTES // (1024 * 1024)
+    if request.mimetype != 'multipart/form-data':
+        return jsonify({
+            'error': 'Invalid request format',
+            'message': 'Upload the document as multipart/form-data in a "file" field',
+            'code': 'MISSING_FILE'
+        }), 400
+
+    upload = None
+    try:
+        if request.content_length and request.content_length > Config.UPLOAD_MAX_BYTES:
+            raise DocumentTooLarge(f"The file is larger than {limit_mb}MB")
+        # Parsed here rather than through request.files, to spool with a small memory buffer
+        parser = FormDataParser(stream_factory=spool_factory, max_form_parts=10, silent=False)
+        stream = CappedStream(request.stream, Config.UPLOAD_MAX_BYTES, f"The file is larger than {limit_mb}MB")
+        _, _, files = parser.parse(stream, request.mimetype, request.content_length, request.mimetype_params)
+        upload = files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({
+                'error': 'Validation error',
+                'message': 'No file was uploaded',
+                'code': 'MISSING_FILE'
+            }), 400
+        fmt = detect_format(upload.filename, upload.mimetype)
+        summary, stats = summarize_document(iter_paragraphs(upload.stream, fmt))
+    except DocumentTooLarge as e:
+        logger.error(f"Upload rejected: {str(e)}")
+        return jsonify({'error': 'File too large', 'message': str(e), 'code': 'FILE_TOO_LARGE'}), 413
+    except UnsupportedDocument as e:
+        logger.error(f"Upload rejected: {str(e)}")
+        return jsonify({'error': 'Unsupported file', 'message': str(e), 'code': 'UNSUPPORTED_FILE'}), 415
+    except (DocumentError, ValueError) as e:
+        logger.error(f"Unreadable upload: {str(e)}")
+        return jsonify({'error': 'Invalid document', 'message': str(e), 'code': 'INVALID_DOCUMENT'}), 422
+    finally:
+        if upload is not None:
+            upload.close()
+
+    metrics.inc('document_uploads_total', format=fmt, truncated=stats['truncated'])
+    if len(summary) < 20:
+        return jsonify({
+            'error': 'Invalid document',
+            'message': 'No usable text was found in the document',
+            'code': 'NO_TEXT'
+        }), 422
+    logger.info(f"Reduced {upload.filename} ({fmt}) from {stats['chars_read']} to {len(summary)} chars")
+    return jsonify({
+        'status': 'success',
+        'data': {'summary': summary, 'filename': upload.filename, 'format': fmt, **stats}
+    })
+
+@app.route('/save_analysis', methods=['POST'])
+def save_analysis():
+    """Keep an analysis in the history past the retention period"""
+    from services.history import analysis_history
+    data = request.get_json(silent=True) or {}
+    try:
+        summary = analysis_history.save(str(data.get('analysis_id', '')))
+    except Exception as e:
+        logger.error(f"Save analysis error: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({
+            'error': 'Save failed',
+            'message': 'An error occurred while saving the analysis',
+            'code': 'HISTORY_ERROR'
+        }), 500
+    if summary is None:
+        return jsonify({
+            'error': 'Not found',
+            'message': 'Unknown analysis',
+            'code': 'ANALYSIS_NOT_FOUND'
+        }), 404
+    return jsonify({'status': 'success', 'data': summary})
+
+@app.route('/analyses')
+def list_analyses():
+    """Newest analyses first; pass ``next_cursor`` back as ``cursor`` for the next page"""
+    from services.history import analysis_history
+    saved = request.args.get('saved')
+    try:
+        items, next_cursor = analysis_history.list(
+            limit=page_limit(),
+            cursor=request.args.get('cursor'),
+            industry=request.args.get('industry') or None,
+            saved=None if saved is None else saved.lower() in ('1', 'true')
+        )
+    except ValueError as e:
+        return jsonify({
+            'error': 'Validation error',
+            'message': str(e),
+            'code': 'INVALID_CURSOR'
+        }), 400
+    return jsonify({'status': 'success', 'data': items, 'next_cursor': next_cursor})
+
+@app.route('/analyses/search')
+def search_analyses():
+    """Full-text search over idea text"""
+    from services.history import analysis_history
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+    except ValueError:
+        offset = 0
+    items = analysis_history.search(request.args.get('q', ''), limit=page_limit(), offset=offset)
+    return jsonify({'status': 'success', 'data': items})
+
+@app.route('/analyses/<analysis_id>')
+def get_analysis(analysis_id):
+    """A stored analysis, in the same shape /analyze_idea returns"""
+    from services.history import analysis_history
+    result = analysis_history.get(analysis_id)
+    if result is None:
+        return jsonify({
+            'error': 'Not found',
+            'message': 'Unknown analysis',
+            'code': 'ANALYSIS_NOT_FOUND'
+        }), 404
+    return jsonify({'status': 'success', 'data': result})
+
+def send_report(analysis_id):
+    """Send the PDF for an analysis, rendering it first if needed"""
+    from services.reports import report_renderer
+    try:
+        path = report_renderer.get(analysis_id, timeout=Config.REPORT_RENDER_TIMEOUT_SECONDS)
+    except RenderTimeout:
+        response = jsonify({
+            'error': 'Report not ready',
+            'message': 'The report is still being generated, please try again shortly',
+            'code': 'REPORT_PENDING'
+        })
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    except Exception as e:
+        logger.error(f"PDF generation error: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({
+            'error': 'PDF generation failed',
+            'message': 'An error occurred while generating the report',
+            'code': 'PDF_ERROR'
+        }), 500
+    if path is None:
+        return jsonify({
+            'error': 'Not found',
+            'message': 'Unknown analysis',
+            'code': 'ANALYSIS_NOT_FOUND'
+        }), 404
+
+    # Reports are content-addressed: the analysis id is a stable ETag and
+    # the file behind a URL never changes
+    response = send_file(
+        os.path.abspath(path),
+        mimetype='application/pdf',
+        download_name=f"startup_analysis_{analysis_id[:12]}.pdf",
+        conditional=True,
+        etag=analysis_id,
+        last_modified=os.path.getmtime(path),
+        max_age=IMMUTABLE_MAX_AGE
+    )
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/generate_pdf', methods=['POST'])
+def generate_pdf():
+    """PDF report for the ``analysis_id`` returned with an analysis"""
+    data = request.get_json(silent=True) or {}
+    return send_report(str(data.get('analysis_id', '')))
+
+@app.route('/reports/<analysis_id>.pdf')
+def download_report(analysis_id):
+    return send_report(analysis_id)
+
 @app.route('/static/reports/<filename>')
 def serve_report(filename):
-    return send_from_directory('static/reports', filename)
+    """Reports written before content addressing; new links use /reports/<id>.pdf"""
+    return send_from_directory('static/reports', filename, conditional=True, max_age=86400)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Pipeline metrics for this worker process in Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.errorhandler(404)
 def page_not_found(e):
@@ -118,4 +639,8 @@ def internal_error(e):
 
 if __name__ == '__main__':
     Config.validate_config()
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':  # The reloader's serving child
+        from services.warmup import start_warm_up, start_job_workers
+        start_warm_up()
+        start_job_workers()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
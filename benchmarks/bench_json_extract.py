@@ -0,0 +1,112 @@
+"""JSON extraction on adversarial ~100 KB model responses.
+
+Compares the previous regex cascade with the single-pass scanner in
+services/json_extract.py: time per response and whether a value came back.
+The regex cascade backtracks quadratically on some inputs, so each of its
+runs happens in a child process that is stopped after ``--timeout`` seconds.
+
+    python benchmarks/bench_json_extract.py --repeat 20
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.json_extract import extract_json  # noqa: E402
+
+SIZE = 100 * 1024
+
+
+def legacy_extract(response_text):
+    """extract_json_from_response before the scanner, minus logging"""
+    cleaned_text = response_text.strip()
+    try:
+        return json.loads(cleaned_text)
+    except json.JSONDecodeError:
+        pass
+    json_match = re.search(r'```(?:json)?\n?(.+?)\n?```', cleaned_text, re.DOTALL)
+    if json_match:
+        try:
+            return json.loads(json_match.group(1).strip())
+        except json.JSONDecodeError:
+            pass
+    json_match = re.search(r'\{[\s\S]*\}', cleaned_text) or re.search(r'\[[\s\S]*\]', cleaned_text)
+    if json_match:
+        try:
+            return json.loads(json_match.group())
+        except json.JSONDecodeError:
+            pass
+    try:
+        return json.loads(cleaned_text.replace('```json', '').replace('```', ''))
+    except json.JSONDecodeError:
+        return None
+
+
+def payload(size=SIZE):
+    items, length, i = [], 2, 0
+    while length < size:
+        item = {'risk': f"Risk {i}: suppliers may raise prices {{sharply}} in [Q{i % 4 + 1}]",
+                'severity': ['low', 'medium', 'high'][i % 3]}
+        items.append(item)
+        length += len(json.dumps(item)) + 2
+        i += 1
+    return json.dumps(items)
+
+
+def cases():
+    body = payload()
+    prose = 'The {market} is [large] and {growing}. ' * (SIZE // 40)
+    return {
+        'fenced': f"```json\n{body}\n```",
+        'prose_then_json': f"{prose}\n{body}",
+        'json_then_prose_with_braces': f"{body}\nNote: {{see}} the [appendix] {{x}}.",
+        'two_objects': f"{body}\n{body}",
+        'trailing_commas': body.replace('}', ',}').replace('",}', '"}', 1) + '',
+        'smart_quotes': body[:SIZE // 2].rsplit('},', 1)[0].replace('"', '“', 1) + '}]',
+        'truncated': body[:len(body) - 37],
+        'unbalanced_openers': '{' * SIZE,
+        'no_json': 'no structured answer here. ' * (SIZE // 27),
+    }
+
+
+def bench(fn, text, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(text)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result is not None
+
+
+def bench_legacy(name, repeat, timeout):
+    with multiprocessing.Pool(1) as pool:
+        pending = pool.apply_async(bench, (legacy_extract, cases()[name], repeat))
+        try:
+            return pending.get(timeout)
+        except multiprocessing.TimeoutError:
+            pool.terminate()
+            return None, False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=10, help='seconds allowed per legacy case')
+    args = parser.parse_args()
+
+    print(f"{'case':30} {'legacy ms':>10} {'ok':>5} {'scanner ms':>11} {'ok':>5}")
+    for name, text in cases().items():
+        legacy_ms, legacy_ok = bench_legacy(name, args.repeat, args.timeout)
+        new_ms, new_ok = bench(extract_json, text, args.repeat)
+        legacy = f"{legacy_ms:10.2f}" if legacy_ms is not None else f"{'>' + str(args.timeout) + 's':>10}"
+        print(f"{name:30} {legacy} {str(legacy_ok):>5} {new_ms:11.2f} {str(new_ok):>5}")
+
+
+if __name__ == '__main__':
+    main()
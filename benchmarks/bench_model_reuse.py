@@ -0,0 +1,88 @@
+"""Per-call client overhead: new GenerativeModel per call vs the shared manager.
+
+The real SDK builds the request; only the transport is faked, so the numbers
+are the app-side cost of each call with zero network latency.
+
+    python benchmarks/bench_model_reuse.py --calls 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import google.generativeai as genai  # noqa: E402
+from google.ai import generativelanguage as glm  # noqa: E402
+
+from services import ai_service  # noqa: E402
+from services.gemini_client import ModelManager  # noqa: E402
+
+PROMPT = "Identify specific, actionable risks for this startup idea: a shoe store in Islamabad"
+CANNED = glm.GenerateContentResponse(candidates=[glm.Candidate(
+    content=glm.Content(parts=[glm.Part(text='["Market saturation", "High rent"]')]),
+    finish_reason=glm.Candidate.FinishReason.STOP
+)])
+
+
+class FakeClient:
+    def generate_content(self, request):
+        return CANNED
+
+
+class FakeAsyncClient:
+    async def generate_content(self, request):
+        await asyncio.sleep(0)
+        return CANNED
+
+
+def per_call_model(calls):
+    generation_config = {**ai_service.GENERATION_CONFIG}
+    safety_settings = {**ai_service.SAFETY_SETTINGS}
+    for _ in range(calls):
+        model = genai.GenerativeModel(ai_service.MODEL_NAME)
+        model._client = FakeClient()
+        model.generate_content(PROMPT, generation_config=generation_config,
+                               safety_settings=safety_settings).text
+
+
+def shared_model(calls):
+    manager = ModelManager()
+    for _ in range(calls):
+        model = manager.get(ai_service.MODEL_NAME, ai_service.GENERATION_CONFIG, ai_service.SAFETY_SETTINGS)
+        if model._client is None:
+            model._client = FakeClient()
+        model.generate_content(PROMPT).text
+
+
+def async_gather(calls):
+    manager = ModelManager()
+    model = manager.get(ai_service.MODEL_NAME, ai_service.GENERATION_CONFIG, ai_service.SAFETY_SETTINGS)
+    model._async_client = FakeAsyncClient()
+
+    async def run():
+        responses = await asyncio.gather(*(model.generate_content_async(PROMPT) for _ in range(calls)))
+        return [r.text for r in responses]
+
+    manager.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'path':<28}{'us/call':>10}")
+    for name, fn in (('new model per call', per_call_model),
+                     ('shared model', shared_model),
+                     ('shared model, async gather', async_gather)):
+        fn(50)  # Warm up
+        start = time.perf_counter()
+        fn(args.calls)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<28}{elapsed / args.calls * 1e6:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""Lookup latency and match quality of the near-duplicate idea index.
+
+Fills a SemanticIndex with synthetic idea descriptions and times lookups of
+reworded queries. Quality is measured on pairs: paraphrases of an indexed
+idea should be reused in full (recall), while near misses that change what
+the idea is about (another product, city or audience, an added place)
+must not reuse anything (false-match rate). Exits non-zero if the median
+lookup exceeds the budget, a near miss reuses anything or a hand-written
+paraphrase reuses nothing.
+
+    python benchmarks/bench_semantic_cache.py --ideas 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from services.semantic_cache import SemanticIndex, embed, similarity, same_terms  # noqa: E402
+
+PRODUCTS = ['app', 'marketplace', 'platform', 'shop', 'store', 'service', 'subscription box',
+            'delivery service', 'saas tool', 'kiosk', 'cafe', 'clinic', 'academy', 'agency']
+SUBJECTS = ['shoes', 'coffee', 'tea', 'pet care', 'dog grooming', 'cat grooming', 'tutoring', 'fitness',
+            'payroll', 'recipes', 'furniture', 'solar panels', 'bicycles', 'cosmetics', 'used books',
+            'legal documents', 'tickets', 'car repair', 'laundry', 'groceries', 'plants', 'printing',
+            'language lessons']
+AUDIENCES = ['students', 'freelancers', 'small businesses', 'parents', 'retirees', 'gamers',
+             'restaurants', 'landlords', 'nurses', 'farmers', 'developers', 'travellers']
+PLACES = ['islamabad', 'lahore', 'karachi', 'berlin', 'austin', 'nairobi', 'lagos', 'jakarta',
+          'toronto', 'lisbon', 'manila', 'dubai', 'seoul', 'lima', 'oslo']
+EXTRAS = ['with same day delivery', 'using ai recommendations', 'with a loyalty program',
+          'run by volunteers', 'powered by solar energy', 'with weekly workshops', 'for eco conscious buyers',
+          'with a mobile first checkout', 'with verified reviews', 'on a pay per use model']
+OPENERS = ['starting a', 'i want to build a', 'we plan a', 'my idea is a', 'launching a']
+
+# Hand-written pairs from real submissions: (kind, indexed idea, new idea)
+KNOWN_PAIRS = [
+    ('paraphrase', 'i start shoes shop in islamabad', 'starting a shoe store in Islamabad'),
+    ('paraphrase', 'starting a shoe store in Islamabad', 'Starting a shoe store in islamabad!'),
+    ('paraphrase', 'i start shoes shop in islamabad', 'Starting a shoes shop in Islamabad'),
+    ('paraphrase', 'subscription coffee delivery for office teams in lahore',
+     'We plan a subscription coffee delivery for the office teams in Lahore'),
+    ('near miss', 'subscription coffee delivery for office teams in lahore',
+     'subscription tea delivery for office teams in lahore'),
+    ('near miss', 'mobile app that matches freelance designers with small businesses',
+     'mobile app that matches freelance designers with small businesses in Berlin'),
+    ('near miss', 'on demand dog grooming van for busy pet owners in the suburbs',
+     'on demand cat grooming van for busy pet owners in the suburbs'),
+    ('near miss', 'online marketplace for handmade furniture from local artisans in Islamabad',
+     'online marketplace for handmade furniture from local artisans in Karachi'),
+    ('near miss', 'starting a shoe store in Islamabad', 'starting a shoe store in Karachi'),
+]
+
+
+def random_idea(rng):
+    words = [rng.choice(SUBJECTS), rng.choice(PRODUCTS), 'for', rng.choice(AUDIENCES),
+             'in', rng.choice(PLACES), rng.choice(EXTRAS)]
+    return ' '.join(words)
+
+
+def reword(idea, rng):
+    """The same idea as another user might type it"""
+    words = idea.split()
+    if rng.random() < 0.5:
+        words.insert(0, rng.choice(OPENERS))
+    if rng.random() < 0.3:
+        words.append(rng.choice(['!', '.']))
+    text = ' '.join(words)
+    return text.title() if rng.random() < 0.5 else text
+
+
+def near_miss(idea, rng):
+    """The idea with one thing it is about changed"""
+    words = idea.split(' for ', 1)
+    subject_product, rest = words[0], ' for ' + words[1]
+    choice = rng.randrange(4)
+    if choice == 0:
+        subject = next(s for s in SUBJECTS if subject_product.startswith(s))
+        other = rng.choice([s for s in SUBJECTS if s != subject])
+        return other + subject_product[len(subject):] + rest
+    if choice == 1:
+        place = next(p for p in PLACES if f" in {p} " in idea)
+        other = rng.choice([p for p in PLACES if p != place])
+        return idea.replace(f" in {place} ", f" in {other} ")
+    if choice == 2:
+        audience = next(a for a in AUDIENCES if f" for {a} " in idea)
+        other = rng.choice([a for a in AUDIENCES if a != audience])
+        return idea.replace(f" for {audience} ", f" for {other} ")
+    place = next(p for p in PLACES if f" in {p} " in idea)
+    return idea + f" and {rng.choice([p for p in PLACES if p != place])}"
+
+
+def decision(score, idea, other):
+    """What the validator reuses of ``other``'s analysis for ``idea``"""
+    if not same_terms(idea, other):
+        return 'fresh'
+    if score >= Config.SEMANTIC_CACHE_THRESHOLD:
+        return 'full reuse'
+    return 'market sections' if score >= Config.SEMANTIC_SECTION_THRESHOLD else 'fresh'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ideas', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--budget-ms', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = SemanticIndex(capacity=args.ideas)
+    ideas = [random_idea(rng) for _ in range(args.ideas)]
+
+    start = time.perf_counter()
+    for idea in ideas:
+        buckets, weights = embed(idea)
+        index.add(buckets, weights, idea)
+    build_seconds = time.perf_counter() - start
+
+    embed_times, search_times = [], []
+    paraphrases = misses = found = false_matches = close_misses = 0
+    for _ in range(args.queries):
+        target = rng.choice(ideas)
+        for kind, query in (('paraphrase', reword(target, rng)), ('near miss', near_miss(target, rng))):
+            t0 = time.perf_counter()
+            buckets, weights = embed(query)
+            t1 = time.perf_counter()
+            match = index.search(buckets, weights)
+            t2 = time.perf_counter()
+            embed_times.append((t1 - t0) * 1000)
+            search_times.append((t2 - t1) * 1000)
+            outcome = decision(match[0], query, match[1]) if match else 'fresh'
+            if kind == 'paraphrase':
+                paraphrases += 1
+                # Another entry naming the same things (shop/store) is as good
+                found += outcome == 'full reuse' and same_terms(match[1], target)
+            else:
+                misses += 1
+                # The changed idea may itself be in the index; reusing that is right
+                other_idea = bool(match) and not same_terms(query, match[1])
+                close_misses += other_idea and match[0] >= Config.SEMANTIC_SECTION_THRESHOLD
+                false_matches += other_idea and outcome != 'fresh'
+
+    totals = sorted(e + s for e, s in zip(embed_times, search_times))
+    p50 = statistics.median(totals)
+    p99 = totals[int(len(totals) * 0.99) - 1]
+    print(f"ideas indexed:      {len(index)} ({len(set(ideas))} distinct) in {build_seconds:.1f}s")
+    print(f"embed  median:      {statistics.median(embed_times):.3f} ms")
+    print(f"search median:      {statistics.median(search_times):.3f} ms")
+    print(f"lookup p50/p99:     {p50:.3f} / {p99:.3f} ms")
+    print(f"paraphrase recall:  {found / paraphrases:.1%} of {paraphrases}")
+    print(f"near-miss reuse:    {false_matches / misses:.1%} of {misses} "
+          f"({close_misses / misses:.1%} of another idea scored above the section threshold)")
+    print(f"thresholds:         full reuse {Config.SEMANTIC_CACHE_THRESHOLD}, "
+          f"sections {Config.SEMANTIC_SECTION_THRESHOLD}")
+
+    known_failures = 0
+    for kind, indexed, query in KNOWN_PAIRS:
+        score = similarity(query, indexed)
+        outcome = decision(score, query, indexed)
+        known_failures += (outcome == 'fresh') == (kind == 'paraphrase')
+        print(f"  {kind:<10} {score:.3f} {outcome:<15} {indexed!r} -> {query!r}")
+
+    status = 0
+    if p50 > args.budget_ms:
+        print(f"FAIL: median lookup above {args.budget_ms} ms budget")
+        status = 1
+    if false_matches or known_failures:
+        print(f"FAIL: {false_matches} near misses reused, {known_failures} hand-written pairs decided wrongly")
+        status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Cold vs warm competitor lookup latency against the local SerpAPI stub.
+
+Compares a fresh connection per request (the old ``requests.get`` path), the
+pooled keep-alive session, and the shared result cache.
+
+    python benchmarks/bench_serpapi.py --lookups 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from serpapi_stub import start_stub  # noqa: E402
+
+
+def timed(fn, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.0, help='stub response delay in seconds')
+    args = parser.parse_args()
+
+    server, url, state = start_stub(latency=args.latency)
+    scratch = tempfile.mkdtemp(prefix='bench_serpapi_')
+    os.environ['SERPAPI_URL'] = url
+    os.environ['SERPAPI_CACHE_PATH'] = os.path.join(scratch, 'serpapi_cache.sqlite3')
+
+    import requests
+    from services import market_service
+
+    def unpooled(i):
+        requests.get(url, params={'q': f"idea {i}"}, timeout=15).json()
+
+    def pooled(i):
+        market_service.search_cache.get('warm-up')  # Same cache probe cost as a real miss
+        market_service.get_session().get(url, params={'q': f"idea {i}"}, timeout=(3.05, 12)).json()
+
+    def cached(i):
+        market_service.find_competitors('a shoe store in islamabad', 'Retail')
+
+    market_service.find_competitors('a shoe store in islamabad', 'Retail')  # Prime the cache
+
+    rows = []
+    for name, fn in (('new connection', unpooled), ('pooled session', pooled), ('cache hit', cached)):
+        before = state['connections']
+        p50, p95 = timed(fn, args.lookups)
+        rows.append((name, p50, p95, state['connections'] - before))
+
+    print(f"{'path':<16}{'p50 ms':>10}{'p95 ms':>10}{'connections':>14}")
+    for name, p50, p95, connections in rows:
+        print(f"{name:<16}{p50:>10.3f}{p95:>10.3f}{connections:>14}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Offline stand-in for the Gemini model used by services.ai_service.
+
+Answers every validator prompt with canned JSON of the right shape after a
+configurable latency. A share of calls can fail outright, come back wrapped
+in a markdown fence, or be malformed (truncated or wrapped in prose), so the
+retry, fallback and JSON-extraction paths get exercised too.
+
+Output is produced in ``chunk_chars`` pieces that take ``chunk_latency``
+each, optionally followed by ``trailing_chars`` of prose after the JSON, so
+``stream=True`` and cancelling a stream early behave like the real API.
+A ``slow_rate`` share of calls take ``slow_factor`` times longer, to give
+latency the long tail that hedged requests are meant to cut.
+
+    from benchmarks.fake_gemini import FakeGemini
+    fake = FakeGemini(latency=0.3, error_rate=0.05).install()
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+# First line of each validator prompt -> section it asks for
+PROMPT_PREFIXES = (
+    ('Assess the feasibility', 'feasibility'),
+    ('List the main risks', 'risks'),
+    ('Suggest improvements', 'improvements'),
+    ('Suggest ways to monetize', 'monetization'),
+    ('Estimate the investment', 'investment'),
+    ('Fill in a business model canvas', 'canvas'),
+    ('Estimate the market size', 'market_size'),
+    ('Describe the target audience', 'target_audience'),
+    ('Write a SWOT analysis', 'swot'),
+)
+
+CANNED = {
+    'feasibility': {'score': 7, 'explanation': 'Clear demand in a crowded but fragmented market. '
+                                               'The model is proven; execution and distribution decide it.'},
+    'risks': ['Low switching costs let incumbents copy the offer quickly',
+              'Customer acquisition may cost more than first-year revenue',
+              'Seasonal demand makes cash flow uneven'],
+    'improvements': ['Start in one city to build density',
+                     'Offer a subscription to smooth revenue',
+                     'Partner with an existing retailer for distribution'],
+    'monetization': ['Commission on every transaction', 'Premium listings for suppliers'],
+    'investment': {'amount': '$150,000', 'level': 'moderate', 'break_even': '18-24 months',
+                   'cost_factors': ['Inventory', 'Marketing', 'Staff']},
+    'canvas': {'key_partners': ['Suppliers'], 'key_activities': ['Curation'],
+               'value_propositions': ['Convenience'], 'customer_relationships': ['Self-service'],
+               'customer_segments': ['Urban households'], 'key_resources': ['Platform'],
+               'channels': ['Web', 'Mobile'], 'cost_structure': ['Hosting', 'Marketing'],
+               'revenue_streams': ['Commissions']},
+    'market_size': {'tam': '$12B', 'sam': '$1.2B', 'som': '$24M', 'growth_rate': '8% annually',
+                    'explanation': 'Bottom-up estimate from household spend.'},
+    'target_audience': {'primary_segments': ['Young professionals', 'Families'],
+                        'demographics': {'age_range': '25-44', 'income_level': 'Middle',
+                                         'education': 'College', 'other': 'Urban'},
+                        'psychographics': {'interests': ['Home'], 'values': ['Convenience'],
+                                           'lifestyle': 'Busy'},
+                        'buying_behaviors': {'purchase_frequency': 'Monthly', 'price_sensitivity': 'Medium',
+                                             'decision_factors': ['Price', 'Reviews']}},
+    'swot': {'strengths': ['Simple offer'], 'weaknesses': ['No brand yet'],
+             'opportunities': ['Underserved suburbs'], 'threats': ['Incumbent price cuts']},
+}
+
+_BATCH_KEY = re.compile(r'^"(\w+)": ', re.MULTILINE)
+
+
+class FakeGemini:
+    """Drop-in for the GenerativeModel objects returned by ai_service.get_model"""
+
+    def __init__(self, latency=0.0, jitter=0.5, error_rate=0.0, fenced_rate=0.0,
+                 malformed_rate=0.0, trailing_chars=0, chunk_chars=80, chunk_latency=0.0,
+                 slow_rate=0.0, slow_factor=20, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.trailing_chars = trailing_chars
+        self.chunk_chars = chunk_chars
+        self.chunk_latency = chunk_latency
+        self.error_rate = error_rate
+        self.fenced_rate = fenced_rate
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'errors': 0, 'fenced': 0, 'malformed': 0,
+                      'streams': 0, 'cancelled': 0, 'chars_sent': 0, 'slow': 0}
+
+    def install(self):
+        """Route every model ai_service asks for to this fake; returns self"""
+        from services import ai_service
+        ai_service.model_manager.get = lambda *args, **kwargs: self
+        return self
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        delay, outcome = self._plan()
+        time.sleep(delay)
+        if outcome == 'errors':
+            raise RuntimeError('503 The model is overloaded (fake)')
+        chunks = self._chunks(prompt, outcome)
+        if stream:
+            self._count('streams')
+            return FakeStream(self, chunks)
+        time.sleep(self.chunk_latency * (len(chunks) - 1))
+        return self._response(prompt, ''.join(chunks))
+
+    async def generate_content_async(self, prompt, **kwargs):
+        delay, outcome = self._plan()
+        await asyncio.sleep(delay)
+        if outcome == 'errors':
+            raise RuntimeError('503 The model is overloaded (fake)')
+        chunks = self._chunks(prompt, outcome)
+        await asyncio.sleep(self.chunk_latency * (len(chunks) - 1))
+        return self._response(prompt, ''.join(chunks))
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _plan(self):
+        with self._lock:
+            self.stats['calls'] += 1
+            delay = self.latency * self._random.uniform(1 - self.jitter, 1 + self.jitter)
+            if self._random.random() < self.slow_rate:
+                delay *= self.slow_factor
+                self.stats['slow'] += 1
+            roll = self._random.random()
+        outcomes = (('errors', self.error_rate), ('malformed', self.malformed_rate),
+                    ('fenced', self.fenced_rate))
+        for outcome, rate in outcomes:
+            if roll < rate:
+                with self._lock:
+                    self.stats[outcome] += 1
+                return max(0.0, delay), outcome
+            roll -= rate
+        return max(0.0, delay), 'ok'
+
+    def _chunks(self, prompt, outcome):
+        text = json.dumps(canned_response(prompt), indent=2)
+        if outcome == 'fenced':
+            text = f"Here is the analysis:\n```json\n{text}\n```"
+        elif outcome == 'malformed':
+            text = f"Sure! {text[:len(text) // 2]}"
+        if self.trailing_chars:
+            prose = "\n\nThis assessment considers demand, competition and cost. " * (self.trailing_chars // 55 + 1)
+            text += prose[:self.trailing_chars]
+        size = max(1, self.chunk_chars)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _response(self, prompt, text):
+        self._count('chars_sent', len(text))
+        # Like google-generativeai 0.3.2, no usage_metadata
+        return SimpleNamespace(text=text)
+
+
+class FakeStream:
+    """Streaming response: yields chunks until exhausted or cancelled"""
+
+    def __init__(self, fake, chunks):
+        self._fake = fake
+        self._chunks = chunks
+        self._cancelled = False
+        # Where the SDK keeps its gRPC stream; ai_service cancels through it
+        self._iterator = self
+
+    def __iter__(self):
+        for i, text in enumerate(self._chunks):
+            if i:
+                time.sleep(self._fake.chunk_latency)
+            if self._cancelled:
+                return
+            self._fake._count('chars_sent', len(text))
+            yield SimpleNamespace(text=text)
+
+    def cancel(self):
+        if not self._cancelled:
+            self._cancelled = True
+            self._fake._count('cancelled')
+
+
+def canned_response(prompt):
+    """JSON value a well-behaved model would return for ``prompt``"""
+    for prefix, section in PROMPT_PREFIXES:
+        if prompt.startswith(prefix):
+            return CANNED[section]
+    keys = _BATCH_KEY.findall(prompt)
+    if keys:
+        return {key: CANNED[key] for key in keys if key in CANNED}
+    return {}
@@ -0,0 +1,596 @@
+"""Offline benchmark suite for the validation pipeline.
+
+Gemini is replaced by benchmarks.fake_gemini and SerpAPI by the local stub
+server, so no API quota is spent. Every run starts from an empty data
+directory and writes its results as JSON; pass ``--compare`` with an
+earlier results file to flag scenarios that got slower.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --scenarios single,json_extract --latency 0.2
+    python -m benchmarks.run --output new.json --compare baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+IDEA = "A subscription service that delivers locally roasted coffee beans to offices every week"
+INDUSTRY = "Food & Beverage"
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    ms = sorted(s * 1000 for s in samples)
+    if not ms:
+        return {'n': 0}
+
+    def pct(p):
+        return round(ms[min(len(ms) - 1, int(len(ms) * p))], 3)
+
+    return {
+        'n': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p50_ms': pct(0.5),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'max_ms': round(ms[-1], 3)
+    }
+
+
+def measure(fn, count):
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def idea(i, tag):
+    # Distinct wording per call so neither cache can answer it
+    return f"{IDEA} ({tag} run {i}, variant {i * 7919 % 104729})"
+
+
+def scenario_single(args, env):
+    """Sequential validations of distinct ideas with every cache cold"""
+    from config import Config
+    from services.validator import validate_idea
+    Config.SEMANTIC_CACHE_ENABLED = False
+    samples = measure(lambda i: validate_idea(idea(i, 'single'), INDUSTRY), args.iterations)
+    return {'latency': summarize(samples)}
+
+
+def scenario_concurrent(args, env):
+    """Distinct ideas posted to /analyze_idea by concurrent HTTP clients"""
+    import requests
+    from werkzeug.serving import make_server
+    from config import Config
+    from app import app
+    Config.SEMANTIC_CACHE_ENABLED = False
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/analyze_idea"
+    local = threading.local()
+
+    def client_call(i):
+        session = getattr(local, 'session', None) or requests.Session()
+        local.session = session
+        started = time.perf_counter()
+        response = session.post(url, json={'idea': idea(i, 'concurrent'), 'industry': INDUSTRY}, timeout=300)
+        return time.perf_counter() - started, response.status_code
+
+    total = args.clients * args.iterations
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            outcomes = list(pool.map(client_call, range(total)))
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - started
+    return {
+        'clients': args.clients,
+        'requests': total,
+        'errors': sum(1 for _, status in outcomes if status != 200),
+        'throughput_rps': round(total / elapsed, 3),
+        'latency': summarize([seconds for seconds, _ in outcomes])
+    }
+
+
+def scenario_cache_hit(args, env):
+    """Repeat validations answered by the AI response cache, the semantic cache and the history"""
+    from config import Config
+    from services.validator import validate_idea
+    Config.SEMANTIC_CACHE_ENABLED = False
+    reuse_seconds, Config.HISTORY_REUSE_SECONDS = Config.HISTORY_REUSE_SECONDS, 0
+    primed = idea(0, 'cache')
+    cold = measure(lambda i: validate_idea(primed, INDUSTRY), 1)
+    response_cache = measure(lambda i: validate_idea(primed, INDUSTRY), args.iterations)
+
+    Config.SEMANTIC_CACHE_ENABLED = True
+    validate_idea(primed, INDUSTRY)  # Lands in the semantic index
+    semantic = measure(lambda i: validate_idea(primed, INDUSTRY), args.iterations)
+
+    Config.SEMANTIC_CACHE_ENABLED = False
+    Config.HISTORY_REUSE_SECONDS = reuse_seconds
+    history = measure(lambda i: validate_idea(primed, INDUSTRY), args.iterations)
+    return {
+        'cold': summarize(cold),
+        'response_cache': summarize(response_cache),
+        'semantic_cache': summarize(semantic),
+        'history': summarize(history)
+    }
+
+
+def scenario_pdf(args, env):
+    """PDF rendering cost, direct and through the on-demand report store"""
+    from services.pdf_service import generate_pdf_report
+    from services.reports import report_renderer
+    from benchmarks.fake_gemini import CANNED
+    data = {
+        'idea': IDEA,
+        'industry': INDUSTRY,
+        'analysis': {
+            'feasibility_score': 70,
+            'swot_analysis': CANNED['swot'],
+            'competitors': [{'name': f"Competitor {i}", 'snippet': 'A similar product. ' * 10} for i in range(5)],
+            'monetization_paths': CANNED['monetization'],
+            'improvements': CANNED['improvements']
+        }
+    }
+    out = tempfile.mkdtemp(prefix='pdf_', dir=env['scratch'])
+    direct = measure(lambda i: generate_pdf_report(data, out, f"report_{i}.pdf"), args.iterations)
+
+    ids = [report_renderer.save({**data, 'idea': f"{IDEA} #{i}"}) for i in range(args.iterations)]
+    first = measure(lambda i: report_renderer.get(ids[i], timeout=60), args.iterations)
+    cached = measure(lambda i: report_renderer.get(ids[i], timeout=60), args.iterations)
+    return {
+        'render': summarize(direct),
+        'first_download': summarize(first),
+        'cached_download': summarize(cached)
+    }
+
+
+def scenario_json_extract(args, env):
+    """extract_json_from_response on ~100 KB plain, fenced, prose-wrapped and broken inputs"""
+    from services.ai_service import extract_json_from_response
+    payload = json.dumps({'items': [{'id': i, 'text': f"risk number {i} with {{braces}} and [brackets]"}
+                                    for i in range(1500)]}, indent=2)
+    inputs = {
+        'plain': payload,
+        'fenced': f"```json\n{payload}\n```",
+        'prose': f"Here is the analysis you asked for:\n{payload}\nLet me know if you need more.",
+        'truncated': payload[:len(payload) - 20],
+        'no_json': 'The model declined to answer. ' * 3000
+    }
+    results = {'input_bytes': len(payload)}
+    for name, text in inputs.items():
+        parsed = extract_json_from_response(text)
+        results[name] = summarize(measure(lambda i: extract_json_from_response(text), args.iterations))
+        results[name]['parsed'] = parsed is not None
+    return results
+
+
+def scenario_streaming(args, env):
+    """Sequential validations with and without streaming, the model rambling after its JSON"""
+    from config import Config
+    from services.validator import validate_idea
+    fake = env['fake']
+    Config.SEMANTIC_CACHE_ENABLED = False
+    saved = (Config.AI_STREAM_RESPONSES, fake.trailing_chars, fake.chunk_latency)
+    fake.trailing_chars = args.trailing_chars
+    fake.chunk_latency = args.chunk_latency
+    results = {}
+    try:
+        for mode, enabled in (('buffered', False), ('streamed', True)):
+            Config.AI_STREAM_RESPONSES = enabled
+            chars_before = fake.stats['chars_sent']
+            samples = measure(lambda i: validate_idea(idea(i, mode), INDUSTRY), args.iterations)
+            results[mode] = summarize(samples)
+            results[mode]['output_chars'] = fake.stats['chars_sent'] - chars_before
+    finally:
+        Config.AI_STREAM_RESPONSES, fake.trailing_chars, fake.chunk_latency = saved
+    return results
+
+
+def scenario_hedging(args, env):
+    """Sequential validations with a slow tail of model calls, without and with hedging"""
+    from config import Config
+    from services import ai_service
+    from services.validator import validate_idea
+    fake = env['fake']
+    Config.SEMANTIC_CACHE_ENABLED = False
+    saved = (fake.slow_rate, ai_service.hedger.enabled)
+    fake.slow_rate = args.slow_rate
+    results = {}
+    try:
+        # Build up each section's latency history so hedge thresholds exist
+        ai_service.hedger.enabled = False
+        measure(lambda i: validate_idea(idea(i, 'hedge warm-up'), INDUSTRY), Config.AI_HEDGE_MIN_SAMPLES)
+        for mode, enabled in (('unhedged', False), ('hedged', True)):
+            ai_service.hedger.enabled = enabled
+            calls = fake.stats['calls']
+            samples = measure(lambda i: validate_idea(idea(i, mode), INDUSTRY), args.iterations)
+            results[mode] = summarize(samples)
+            results[mode]['model_calls'] = fake.stats['calls'] - calls
+    finally:
+        fake.slow_rate, ai_service.hedger.enabled = saved
+    results['hedger'] = ai_service.hedger.stats()
+    return results
+
+
+# Modules a cold import of app.py should leave unloaded
+HEAVY_MODULES = ('google.generativeai', 'numpy', 'fpdf', 'requests', 'services.validator')
+
+STARTUP_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+status = app.app.test_client().get('/').status_code
+served = time.perf_counter()
+heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(json.dumps({{'import': imported - started, 'first_request': served - started,
+                  'status': status, 'heavy': heavy}}))
+"""
+
+
+def scenario_tokens(args, env):
+    """Tokens per validation, and the output caps sections settle on"""
+    from config import Config
+    from services import ai_service
+    from services.validator import validate_idea
+    Config.SEMANTIC_CACHE_ENABLED = False
+    usages = []
+
+    def run(i):
+        usages.append(validate_idea(idea(i, 'tokens'), INDUSTRY)['token_usage'])
+
+    samples = measure(run, max(args.iterations, Config.AI_OUTPUT_TOKEN_MIN_SAMPLES + 5))
+    # Only the later runs have adaptive caps; report their usage
+    recent = usages[-args.iterations:]
+    per_validation = {
+        kind: round(sum(usage[kind] for usage in recent) / len(recent), 1)
+        for kind in ('calls', 'prompt_tokens', 'output_tokens', 'total_tokens')
+    }
+    return {'latency': summarize(samples), 'per_validation': per_validation,
+            'output_caps': ai_service.output_caps.stats()}
+
+
+def scenario_logging(args, env):
+    """Logging cost per request on concurrent request threads, old handlers vs the queue"""
+    from logging.handlers import RotatingFileHandler
+    from services.log_pipeline import TEXT_FORMAT, build_pipeline, set_request_id, reset_request_id
+    body = {'idea': IDEA, 'industry': INDUSTRY, 'batch': None, 'previous_analysis_id': None}
+    requests_per_client = args.iterations * 20
+
+    def legacy():
+        # The old app.py setup: text to stderr (a file here) and a 10 kB
+        # rotating file, both written on the calling thread
+        console = logging.StreamHandler(open(os.path.join(env['scratch'], 'console.log'), 'w'))
+        rotating = RotatingFileHandler(os.path.join(env['scratch'], 'legacy.log'), maxBytes=10000, backupCount=3)
+        for handler in (console, rotating):
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        return [console, rotating], None
+
+    def queued():
+        pipeline = build_pipeline(os.path.join(env['scratch'], 'queued.log'), level='INFO', console=False)
+        return [pipeline.handler], pipeline
+
+    def request_logs(log, i, lazy):
+        # What /analyze_idea logs for one request
+        token = set_request_id(f"bench-{i}")
+        try:
+            started = time.perf_counter()
+            log.info("Received analyze_idea request")
+            if lazy:
+                log.debug("Request data: %s", body)
+            else:
+                log.debug(f"Request data: {body}")
+            log.info(f"Validating idea: {IDEA[:50]}...")
+            log.info(f"Validation completed in {12.3456:.2f}ms (batch=None)")
+            if lazy:
+                log.info("%s %s %s %.1fms", 'POST', '/analyze_idea', 200, 12.3,
+                         extra={'http': {'method': 'POST', 'path': '/analyze_idea', 'status': 200,
+                                         'duration_ms': 12.35}})
+            return time.perf_counter() - started
+        finally:
+            reset_request_id(token)
+
+    results = {}
+    for mode, setup in (('sync_handlers', legacy), ('queue_listener', queued)):
+        log = logging.getLogger(f"benchmarks.logging.{mode}")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        handlers, pipeline = setup()
+        for handler in handlers:
+            log.addHandler(handler)
+        lazy = pipeline is not None
+
+        def client(c):
+            return [request_logs(log, c * requests_per_client + i, lazy) for i in range(requests_per_client)]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            samples = [s for chunk in pool.map(client, range(args.clients)) for s in chunk]
+        results[mode] = {'per_request': summarize(samples),
+                         'wall_seconds': round(time.perf_counter() - started, 3)}
+        if pipeline is not None:
+            drain_started = time.perf_counter()
+            pipeline.stop()
+            results[mode]['drain_seconds'] = round(time.perf_counter() - drain_started, 3)
+        for handler in handlers:
+            log.removeHandler(handler)
+            handler.close()
+    results['clients'] = args.clients
+    return results
+
+
+def scenario_pages(args, env):
+    """Concurrent page views: rendered every time, from the page cache, and revalidated"""
+    from config import Config
+    from app import app
+    logging.getLogger().setLevel(logging.ERROR)  # app.py set up its own logging on import
+    local = threading.local()
+    pages = ('/', '/features', '/pricing', '/about')
+    views = args.clients * args.iterations * 10
+    etags = {}
+    results = {}
+
+    def view(i, headers):
+        client = getattr(local, 'client', None) or app.test_client()
+        local.client = client
+        path = pages[i % len(pages)]
+        started = time.perf_counter()
+        if headers.get('If-None-Match'):
+            headers = {'If-None-Match': etags[path]}
+        response = client.get(path, headers=headers)
+        elapsed = time.perf_counter() - started
+        if response.headers.get('ETag'):
+            etags[path] = response.headers['ETag']
+        return elapsed, len(response.data)
+
+    saved = Config.PAGE_CACHE_ENABLED
+    try:
+        for mode, enabled, headers in (('rendered', False, {}),
+                                       ('cached', True, {'Accept-Encoding': 'gzip, deflate, br'}),
+                                       ('revalidated', True, {'If-None-Match': '*'})):
+            Config.PAGE_CACHE_ENABLED = enabled
+            for i in range(len(pages)):  # Fill the cache and learn the ETags
+                view(i, {})
+            cpu = time.process_time()
+            with ThreadPoolExecutor(max_workers=args.clients) as pool:
+                samples = list(pool.map(lambda i: view(i, headers), range(views)))
+            results[mode] = {
+                'latency': summarize([elapsed for elapsed, _ in samples]),
+                'bytes_per_view': round(sum(size for _, size in samples) / views),
+                'cpu_ms_per_view': round((time.process_time() - cpu) * 1000 / views, 3)
+            }
+    finally:
+        Config.PAGE_CACHE_ENABLED = saved
+    results['clients'] = args.clients
+    return results
+
+
+def scenario_uploads(args, env):
+    """Peak memory and time to reduce DOCX and TXT pitch documents of growing size"""
+    import io
+    import tracemalloc
+    import zipfile
+    from app import app
+    logging.getLogger().setLevel(logging.ERROR)  # app.py set up its own logging on import
+    client = app.test_client()
+    namespace = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+    results = {}
+    for paragraphs in (1000, 10000, 100000):
+        # A deck's worth of content, repeated page headers and page numbers
+        lines = []
+        for i in range(paragraphs):
+            if i % 10 == 0:
+                lines += ['Acme Coffee - Confidential', f"Page {i // 10 + 1}"]
+            lines.append(f"Section {i} describes one distinct part of the coffee delivery business in detail.")
+        body = ''.join(f"<w:p><w:r><w:t>{line}</w:t></w:r></w:p>" for line in lines)
+        docx = io.BytesIO()
+        with zipfile.ZipFile(docx, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('word/document.xml', f'<w:document xmlns:w="{namespace}"><w:body>{body}</w:body></w:document>')
+        files = {'docx': docx.getvalue(), 'txt': '\n\n'.join(lines).encode('utf-8')}
+        for fmt, data in files.items():
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = client.post('/upload_document', data={'file': (io.BytesIO(data), f"deck.{fmt}")},
+                                   content_type='multipart/form-data')
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            summary = response.get_json()['data']
+            results[f"{fmt}_{paragraphs}"] = {
+                'upload_bytes': len(data),
+                'ms': round(elapsed * 1000, 2),
+                # Includes the test client's copy of the request body
+                'peak_mb': round(peak / 2 ** 20, 2),
+                'summary_chars': len(summary['summary']),
+                'paragraphs_read': summary['paragraphs']
+            }
+    return results
+
+
+def scenario_startup(args, env):
+    """Fresh interpreters: time to import app.py and to serve its first page"""
+    runs = []
+    for _ in range(min(args.iterations, 10)):
+        started = time.perf_counter()
+        output = subprocess.check_output(
+            [sys.executable, '-c', STARTUP_PROBE], cwd=env['scratch'], text=True,
+            env={**os.environ, 'PYTHONPATH': ROOT, 'WARM_UP': 'false'}, stderr=subprocess.DEVNULL
+        )
+        probe = json.loads(output.strip().splitlines()[-1])
+        probe['process'] = time.perf_counter() - started
+        runs.append(probe)
+    return {
+        'import_app': summarize([run['import'] for run in runs]),
+        'first_request': summarize([run['first_request'] for run in runs]),
+        'process': summarize([run['process'] for run in runs]),
+        'heavy_modules_loaded': sorted({m for run in runs for m in run['heavy']}),
+        'errors': sum(1 for run in runs if run['status'] != 200)
+    }
+
+
+SCENARIOS = {
+    'single': scenario_single,
+    'concurrent': scenario_concurrent,
+    'cache_hit': scenario_cache_hit,
+    'pdf': scenario_pdf,
+    'json_extract': scenario_json_extract,
+    'streaming': scenario_streaming,
+    'startup': scenario_startup,
+    'hedging': scenario_hedging,
+    'tokens': scenario_tokens,
+    'logging': scenario_logging,
+    'pages': scenario_pages,
+    'uploads': scenario_uploads,
+}
+
+
+def prepare_environment(args):
+    """Point every service at a scratch directory and the local stand-ins"""
+    scratch = tempfile.mkdtemp(prefix='bench_')
+    os.environ.update({
+        'DATA_DIR': scratch,
+        'GEMINI_API_KEY': 'bench',
+        'SERPAPI_API_KEY': 'bench',
+        'GEMINI_RPM': '1000000',
+        'GEMINI_TPM': '1000000000',
+        'RATE_LIMIT_STATE_FILE': os.path.join(scratch, 'rate_limit.state'),
+        'AI_CACHE_PATH': os.path.join(scratch, 'ai_cache.sqlite3'),
+        'SERPAPI_CACHE_PATH': os.path.join(scratch, 'serpapi_cache.sqlite3'),
+        'JOBS_DB_PATH': os.path.join(scratch, 'jobs.sqlite3'),
+        'HISTORY_DB_PATH': os.path.join(scratch, 'history.sqlite3'),
+        'REPORTS_DIR': os.path.join(scratch, 'reports'),
+    })
+    from benchmarks.serpapi_stub import start_stub
+    server, url, stub_state = start_stub(latency=args.serpapi_latency)
+    os.environ['SERPAPI_URL'] = url
+    # app.py writes app.log to the working directory
+    os.chdir(scratch)
+
+    from benchmarks.fake_gemini import FakeGemini
+    fake = FakeGemini(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        fenced_rate=args.fenced_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed
+    ).install()
+    logging.getLogger().setLevel(logging.ERROR)
+    return {'scratch': scratch, 'fake': fake, 'stub_state': stub_state}
+
+
+def compare(results, baseline_path, tolerance):
+    """List every p50 that grew by more than ``tolerance`` against the baseline"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['scenarios']
+    regressions = []
+
+    def walk(new, old, path):
+        if not isinstance(new, dict) or not isinstance(old, dict):
+            return
+        if 'p50_ms' in new and old.get('p50_ms'):
+            ratio = new['p50_ms'] / old['p50_ms']
+            if ratio > 1 + tolerance:
+                regressions.append({'metric': path, 'baseline_ms': old['p50_ms'],
+                                    'current_ms': new['p50_ms'], 'ratio': round(ratio, 3)})
+        for key in new:
+            walk(new[key], old.get(key), f"{path}.{key}" if path else key)
+
+    walk(results['scenarios'], baseline, '')
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients for the concurrent scenario')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake Gemini latency in seconds')
+    parser.add_argument('--serpapi-latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fenced-rate', type=float, default=0.2)
+    parser.add_argument('--malformed-rate', type=float, default=0.0)
+    parser.add_argument('--trailing-chars', type=int, default=2000,
+                        help='prose the fake model writes after its JSON in the streaming scenario')
+    parser.add_argument('--chunk-latency', type=float, default=0.005,
+                        help='seconds per streamed chunk in the streaming scenario')
+    parser.add_argument('--slow-rate', type=float, default=0.05,
+                        help='share of fake model calls that are 20x slower in the hedging scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(os.getcwd(), 'bench_results.json'))
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed p50 growth before flagging')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    env = prepare_environment(args)
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}
+        },
+        'scenarios': {}
+    }
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        started = time.perf_counter()
+        results['scenarios'][name] = SCENARIOS[name](args, env)
+        results['scenarios'][name]['wall_seconds'] = round(time.perf_counter() - started, 3)
+    results['fake_gemini'] = dict(env['fake'].stats)
+    results['serpapi_stub'] = dict(env['stub_state'])
+
+    exit_code = 0
+    if baseline:
+        results['regressions'] = compare(results, baseline, args.tolerance)
+        exit_code = 1 if results['regressions'] else 0
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    shutil.rmtree(env['scratch'], ignore_errors=True)
+    print(json.dumps(results['scenarios'], indent=2))
+    for regression in results.get('regressions', []):
+        print(f"REGRESSION {regression['metric']}: {regression['baseline_ms']}ms -> "
+              f"{regression['current_ms']}ms (x{regression['ratio']})", file=sys.stderr)
+    print(f"results written to {output}", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
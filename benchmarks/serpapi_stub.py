@@ -0,0 +1,82 @@
+"""Local stand-in for the SerpAPI search endpoint.
+
+Speaks HTTP/1.1 with keep-alive so connection reuse can be measured, and
+answers every query with canned organic results after ``latency`` seconds.
+
+    python benchmarks/serpapi_stub.py --port 8765 --latency 0.2
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_handler(latency=0.0, error_rate=0.0):
+    state = {'requests': 0, 'connections': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with lock:
+                state['connections'] += 1
+
+        def do_GET(self):
+            with lock:
+                state['requests'] += 1
+                count = state['requests']
+            if latency:
+                time.sleep(latency)
+
+            if error_rate and (count * error_rate) % 1 < error_rate:
+                self._send(503, {'error': 'stub failure'})
+                return
+
+            query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+            results = [{
+                'title': f"Competitor {i} - {query[:30]} | Reviews",
+                'link': f"https://competitor{i}.example.com",
+                'snippet': f"Competitor {i} offers a similar product for {query[:40]}."
+            } for i in range(1, 6)]
+            self._send(200, {'organic_results': results})
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler, state
+
+
+def start_stub(port=0, latency=0.0, error_rate=0.0):
+    """Start the stub in a background thread; returns ``(server, url, state)``"""
+    handler, state = make_handler(latency, error_rate)
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/search", state
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server, url, _ = start_stub(args.port, args.latency, args.error_rate)
+    print(f"SerpAPI stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
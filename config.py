@@ -7,6 +7,112 @@ class Config:
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
     SERPAPI_API_KEY = os.getenv('SERPAPI_API_KEY')
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    # Log file, written as JSON lines by a background thread (services/log_pipeline.py)
+    LOG_FILE = os.getenv('LOG_FILE', 'app.log')
+    LOG_JSON = os.getenv('LOG_JSON', 'true').lower() == 'true'
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 5))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+    # Share of DEBUG records kept; request payloads at DEBUG are large
+    LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.1))
+    DATA_DIR = os.getenv('DATA_DIR', 'data')
+    # Preload the validation pipeline after a worker starts (services/warmup.py)
+    WARM_UP = os.getenv('WARM_UP', 'true').lower() == 'true'
+
+    # Validation pipeline
+    AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', 9))
+    VALIDATION_DEADLINE_SECONDS = float(os.getenv('VALIDATION_DEADLINE_SECONDS', 45))
+    AI_BATCH_MODE = os.getenv('AI_BATCH_MODE', 'false').lower() == 'true'
+    AI_BATCH_MAX_OUTPUT_TOKENS = int(os.getenv('AI_BATCH_MAX_OUTPUT_TOKENS', 4096))
+    # Stream completions and stop at the end of the first JSON value
+    AI_STREAM_RESPONSES = os.getenv('AI_STREAM_RESPONSES', 'true').lower() == 'true'
+    # Cap each section's output at its usual answer size (services/token_budget.py)
+    AI_ADAPTIVE_OUTPUT_TOKENS = os.getenv('AI_ADAPTIVE_OUTPUT_TOKENS', 'true').lower() == 'true'
+    AI_OUTPUT_TOKEN_PERCENTILE = float(os.getenv('AI_OUTPUT_TOKEN_PERCENTILE', 0.99))
+    AI_OUTPUT_TOKEN_HEADROOM = float(os.getenv('AI_OUTPUT_TOKEN_HEADROOM', 1.5))
+    AI_OUTPUT_TOKEN_FLOOR = int(os.getenv('AI_OUTPUT_TOKEN_FLOOR', 128))
+    AI_OUTPUT_TOKEN_MIN_SAMPLES = int(os.getenv('AI_OUTPUT_TOKEN_MIN_SAMPLES', 20))
+
+    # HTTP caching and compression (services/http_cache.py)
+    PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    PAGE_MAX_AGE = int(os.getenv('PAGE_MAX_AGE', 300))
+    COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+
+    # Pitch document uploads (POST /upload_document)
+    UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', 20 * 1024 * 1024))
+    UPLOAD_MAX_EXTRACTED_BYTES = int(os.getenv('UPLOAD_MAX_EXTRACTED_BYTES', 50 * 1024 * 1024))
+    UPLOAD_SPOOL_MEMORY_BYTES = int(os.getenv('UPLOAD_SPOOL_MEMORY_BYTES', 256 * 1024))
+    # Longest idea description a document is reduced to
+    UPLOAD_SUMMARY_CHARS = int(os.getenv('UPLOAD_SUMMARY_CHARS', 3000))
+
+    # Background validation jobs
+    JOBS_DB_PATH = os.getenv('JOBS_DB_PATH', os.path.join(DATA_DIR, 'jobs.sqlite3'))
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+    JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', 100))
+    JOB_RESULT_TTL_SECONDS = int(os.getenv('JOB_RESULT_TTL_SECONDS', 3600))
+
+    # Analysis history (every validation result, searchable)
+    HISTORY_DB_PATH = os.getenv('HISTORY_DB_PATH', os.path.join(DATA_DIR, 'history.sqlite3'))
+    HISTORY_REUSE_SECONDS = int(os.getenv('HISTORY_REUSE_SECONDS', 24 * 3600))
+    HISTORY_MAX_AGE_DAYS = int(os.getenv('HISTORY_MAX_AGE_DAYS', 90))
+
+    # Bulk validation (POST /bulk and python -m services.bulk)
+    BULK_DIR = os.getenv('BULK_DIR', os.path.join(DATA_DIR, 'bulk'))
+    BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', 4))
+    BULK_IDEAS_PER_MINUTE = float(os.getenv('BULK_IDEAS_PER_MINUTE', 0))
+    BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', 5000))
+    BULK_CHECKPOINT_TTL_DAYS = int(os.getenv('BULK_CHECKPOINT_TTL_DAYS', 7))
+
+    # PDF reports, rendered on first download
+    REPORTS_DIR = os.getenv('REPORTS_DIR', os.path.join(DATA_DIR, 'reports'))
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))
+    REPORT_RENDER_TIMEOUT_SECONDS = float(os.getenv('REPORT_RENDER_TIMEOUT_SECONDS', 30))
+    REPORTS_MAX_MB = int(os.getenv('REPORTS_MAX_MB', 500))
+    REPORTS_MAX_AGE_DAYS = int(os.getenv('REPORTS_MAX_AGE_DAYS', 30))
+
+    # SerpAPI competitor lookups
+    SERPAPI_URL = os.getenv('SERPAPI_URL', 'https://serpapi.com/search')
+    SERPAPI_POOL_SIZE = int(os.getenv('SERPAPI_POOL_SIZE', 10))
+    SERPAPI_CACHE_PATH = os.getenv('SERPAPI_CACHE_PATH', os.path.join(DATA_DIR, 'serpapi_cache.sqlite3'))
+    SERPAPI_CACHE_TTL_SECONDS = int(os.getenv('SERPAPI_CACHE_TTL_SECONDS', 24 * 3600))
+    SERPAPI_CACHE_MAX_MB = int(os.getenv('SERPAPI_CACHE_MAX_MB', 20))
+
+    # Model tiers: short list sections use the fast model. AI_SECTION_TIERS
+    # overrides the mapping, e.g. "feasibility=fast,risks=strong"
+    AI_MODEL_FAST = os.getenv('AI_MODEL_FAST', 'gemini-1.5-flash')
+    AI_MODEL_STRONG = os.getenv('AI_MODEL_STRONG', 'gemini-1.0-pro')
+    AI_SECTION_TIERS = os.getenv('AI_SECTION_TIERS', '')
+
+    # Hedged requests: duplicate a call still running past its section's
+    # latency percentile, adding at most AI_HEDGE_MAX_RATIO extra calls
+    AI_HEDGE_ENABLED = os.getenv('AI_HEDGE_ENABLED', 'true').lower() == 'true'
+    AI_HEDGE_PERCENTILE = float(os.getenv('AI_HEDGE_PERCENTILE', 0.95))
+    AI_HEDGE_MAX_RATIO = float(os.getenv('AI_HEDGE_MAX_RATIO', 0.1))
+    AI_HEDGE_MIN_SAMPLES = int(os.getenv('AI_HEDGE_MIN_SAMPLES', 20))
+    AI_HEDGE_MIN_DELAY = float(os.getenv('AI_HEDGE_MIN_DELAY', 0.25))
+
+    # Gemini retry budget (per validation) and circuit breaker
+    AI_RETRY_BUDGET = int(os.getenv('AI_RETRY_BUDGET', 4))
+    AI_RETRY_BASE_DELAY = float(os.getenv('AI_RETRY_BASE_DELAY', 0.5))
+    AI_RETRY_MAX_DELAY = float(os.getenv('AI_RETRY_MAX_DELAY', 8))
+    AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv('AI_BREAKER_FAILURE_THRESHOLD', 5))
+    AI_BREAKER_RESET_SECONDS = float(os.getenv('AI_BREAKER_RESET_SECONDS', 30))
+
+    # Gemini quota, shared by all worker processes through the state file
+    GEMINI_RPM = int(os.getenv('GEMINI_RPM', 60))
+    GEMINI_TPM = int(os.getenv('GEMINI_TPM', 120000))
+    RATE_LIMIT_STATE_FILE = os.getenv('RATE_LIMIT_STATE_FILE', os.path.join(DATA_DIR, 'rate_limit.state'))
+
+    # Persistent AI response cache
+    AI_CACHE_PATH = os.getenv('AI_CACHE_PATH', os.path.join(DATA_DIR, 'ai_cache.sqlite3'))
+    AI_CACHE_TTL_SECONDS = int(os.getenv('AI_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    AI_CACHE_MAX_MB = int(os.getenv('AI_CACHE_MAX_MB', 50))
+
+    # Near-duplicate idea cache
+    SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'true').lower() == 'true'
+    SEMANTIC_CACHE_CAPACITY = int(os.getenv('SEMANTIC_CACHE_CAPACITY', 10000))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.97))
+    SEMANTIC_SECTION_THRESHOLD = float(os.getenv('SEMANTIC_SECTION_THRESHOLD', 0.75))
     
     @classmethod
     def validate_config(cls):
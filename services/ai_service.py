@@ -1,92 +1,290 @@
-import google.generativeai as genai
 from config import Config
+from services.rate_limiter import RateLimiter, estimate_tokens
+from services.cache import ResponseCache, make_cache_key
+from services.gemini_client import model_manager
+from services.call_policy import CallPolicy, CircuitBreaker, Hedger, LatencyTracker
+from services.token_budget import OutputCaps, record_tokens
+from services.metrics import metrics, timed, record_stage, TOKEN_BUCKETS
+from services.json_extract import extract_json, JsonScanner
+import asyncio
 import json
-import re
-import logging
 import time
-from functools import lru_cache
-import hashlib
-from tenacity import retry, stop_after_attempt, wait_exponential
+import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Gemini with rate limiting
-genai.configure(api_key=Config.GEMINI_API_KEY)
-MODEL_NAME = 'gemini-1.0-pro'  # Using a more efficient model
+# The SDK is imported and configured by model_manager on first use
+MODEL_NAME = Config.AI_MODEL_STRONG
+MAX_OUTPUT_TOKENS = 1000
+
+# An answer this close to its cap with no complete JSON value was cut off
+TRUNCATION_RATIO = 0.8
+
+# Short list sections go to the fast model, everything else to the strong one
+SECTION_TIERS = {
+    'risks': 'fast',
+    'improvements': 'fast',
+    'monetization': 'fast',
+    'investment': 'fast',
+    **dict(item.split('=', 1) for item in Config.AI_SECTION_TIERS.replace(' ', '').split(',') if '=' in item)
+}
+
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "top_k": 40,
+    "max_output_tokens": MAX_OUTPUT_TOKENS,  # Reduced from 2000
+}
+
+SAFETY_SETTINGS = {
+    "HARASSMENT": "block_none",
+    "HATE_SPEECH": "block_none",
+    "SEXUAL": "block_none",
+    "DANGEROUS": "block_none"
+}
+
+# One request/token budget shared by every thread and worker process
+rate_limiter = RateLimiter(Config.GEMINI_RPM, Config.GEMINI_TPM, Config.RATE_LIMIT_STATE_FILE)
+
+# Retries, backoff and circuit breaking for every Gemini call
+ai_policy = CallPolicy(
+    CircuitBreaker(Config.AI_BREAKER_FAILURE_THRESHOLD, Config.AI_BREAKER_RESET_SECONDS),
+    base_delay=Config.AI_RETRY_BASE_DELAY,
+    max_delay=Config.AI_RETRY_MAX_DELAY
+)
+
+# Responses shared by every worker and kept across restarts
+response_cache = ResponseCache(
+    Config.AI_CACHE_PATH,
+    ttl_seconds=Config.AI_CACHE_TTL_SECONDS,
+    max_bytes=Config.AI_CACHE_MAX_MB * 1024 * 1024
+)
 
-@lru_cache(maxsize=100)
-def get_cached_response(prompt):
-    """Cache responses to reduce API calls"""
-    prompt_hash = hashlib.md5(prompt.encode()).hexdigest()
-    return generate_ai_response(prompt)
+# Duplicate calls that run past their section's usual latency
+section_latency = LatencyTracker()
+hedger = Hedger(
+    section_latency,
+    percentile=Config.AI_HEDGE_PERCENTILE,
+    max_ratio=Config.AI_HEDGE_MAX_RATIO,
+    min_samples=Config.AI_HEDGE_MIN_SAMPLES,
+    min_delay=Config.AI_HEDGE_MIN_DELAY
+)
+hedger.enabled = Config.AI_HEDGE_ENABLED
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=60),
-    retry_error_callback=lambda retry_state: None
+# Each section's output cap, from the answer sizes it produces
+output_caps = OutputCaps(
+    percentile=Config.AI_OUTPUT_TOKEN_PERCENTILE,
+    headroom=Config.AI_OUTPUT_TOKEN_HEADROOM,
+    floor=Config.AI_OUTPUT_TOKEN_FLOOR,
+    min_samples=Config.AI_OUTPUT_TOKEN_MIN_SAMPLES
 )
-def generate_ai_response(prompt, model_name=MODEL_NAME):
-    """Generate AI response with rate limiting and retries"""
+output_caps.enabled = Config.AI_ADAPTIVE_OUTPUT_TOKENS
+
+metrics.register_collector('gemini_rate_limiter', rate_limiter.stats)
+metrics.register_collector('gemini_section_latency', section_latency.stats)
+metrics.register_collector('gemini_hedging', hedger.stats)
+metrics.register_collector('gemini_output_caps', output_caps.stats)
+metrics.register_collector('gemini_calls', ai_policy.stats)
+metrics.register_collector('ai_cache', response_cache.stats)
+
+def model_for(section):
+    """Model for a validator section, by its tier"""
+    if SECTION_TIERS.get(section) == 'fast':
+        return Config.AI_MODEL_FAST
+    return Config.AI_MODEL_STRONG
+
+def get_cached_response(prompt, model_name=MODEL_NAME, max_output_tokens=MAX_OUTPUT_TOKENS, budget=None,
+                        section=None, schema=None):
+    """Cache responses to reduce API calls
+
+    Only answers holding a JSON value that matches ``schema`` are cached; a
+    refusal or a prose answer is retried next time instead of being served
+    from the cache for the whole TTL.
+    """
+    # The output cap only bounds the answer; leaving it out of the key keeps
+    # adaptive caps from splitting the cache
+    generation_config = {k: v for k, v in GENERATION_CONFIG.items() if k != 'max_output_tokens'}
+    key = make_cache_key(model_name, json.dumps(generation_config, sort_keys=True), prompt)
+    cached = response_cache.get(key)
+    if cached is not None and extract_json(cached, schema) is None:
+        cached = None  # Stored before unusable answers were kept out
+    metrics.inc('ai_cache_requests_total', result='miss' if cached is None else 'hit')
+    if cached is not None:
+        return cached
+
+    response = generate_ai_response(prompt, model_name, max_output_tokens, budget, section, schema)
+    if response and extract_json(response, schema) is not None:  # Failures are never cached
+        response_cache.set(key, response)
+    return response
+
+def generate_ai_response(prompt, model_name=MODEL_NAME, max_output_tokens=MAX_OUTPUT_TOKENS, budget=None,
+                         section=None, schema=None):
+    """Generate AI response with rate limiting and retries
+
+    Retries are drawn from ``budget`` (a per-request RetryBudget); without
+    one the call is attempted once. Each attempt may be hedged against the
+    latency history of ``section``, and is capped at the section's usual
+    answer size (at most ``max_output_tokens``). ``schema`` is the shape the
+    caller will extract, as for extract_json. Returns None on failure or
+    while the circuit breaker is open.
+    """
+    key = section or 'default'
+
+    def attempt(cancelled):
+        cap = output_caps.cap(key, max_output_tokens)
+        return request_completion(prompt, model_name, cap, cancelled, key, schema)
+
+    return ai_policy.call(lambda: hedger.call(key, attempt), budget)
+
+def request_completion(prompt, model_name=MODEL_NAME, max_output_tokens=MAX_OUTPUT_TOKENS, cancelled=None,
+                       section=None, schema=None):
+    """Single rate-limited Gemini call; raises on failure
+
+    A streamed call stops early once ``cancelled`` (a threading.Event) is
+    set. An answer cut off by ``max_output_tokens`` counts as a failure, so
+    it is neither cached nor parsed, and it raises the section's cap.
+    """
+    estimated_tokens = estimate_tokens(prompt) + max_output_tokens
+    record_stage('rate_limit_wait', rate_limiter.acquire(estimated_tokens))
+    model = get_model(model_name, max_output_tokens)
+    with timed('gemini_call'):
+        if Config.AI_STREAM_RESPONSES:
+            text, generated = stream_completion(model, prompt, cancelled, schema)
+        else:
+            text = generated = model.generate_content(prompt).text
+    output_tokens = record_usage(estimated_tokens, prompt, generated, section)
+    if cancelled is not None and cancelled.is_set():
+        return text  # A hedged duplicate already answered; this one is discarded
+
+    truncated = output_tokens >= max_output_tokens * TRUNCATION_RATIO and extract_json(text, schema) is None
+    output_caps.observe(section, output_tokens, truncated)
+    if truncated:
+        logger.warning(f"Answer for '{section or 'default'}' hit its {max_output_tokens}-token cap")
+        metrics.inc('gemini_truncated_total', section=section or 'default')
+        return None
+    return text
+
+def stream_completion(model, prompt, cancelled=None, schema=None):
+    """Stream a completion and stop as soon as a JSON value matching ``schema`` closes.
+
+    Models often keep writing prose after the JSON, up to the output cap;
+    cancelling the stream there saves that time and those tokens. Returns
+    the text received up to the end of the value (or all of it if no value
+    closes) and everything that was generated, which is what the call cost.
+    """
+    started = time.perf_counter()
+    response = model.generate_content(prompt, stream=True)
+    scanner = JsonScanner()
+    finished = False
+    first_chunk = True
+    try:
+        for chunk in response:
+            if cancelled is not None and cancelled.is_set():  # A hedged duplicate answered first
+                break
+            if first_chunk:
+                record_stage('gemini_first_chunk', time.perf_counter() - started)
+                first_chunk = False
+            try:
+                text = chunk.text
+            except ValueError:  # Chunk without text parts
+                continue
+            scanner.feed(text)
+            while scanner.end is not None:
+                if extract_json(scanner.value_text(), schema) is not None:
+                    break
+                # Braces in prose such as "{name}", or an example value of
+                # the wrong shape; carry on after them
+                scanner = JsonScanner(scanner.text, scanner.end)
+                scanner.feed()
+            if scanner.end is not None:
+                break
+        else:
+            finished = True
+    finally:
+        if not finished:
+            cancel_stream(response)
+
+    received = scanner.text[:scanner.end] if scanner.end is not None else scanner.text
+    metrics.inc('gemini_streams_total', outcome='complete' if finished else 'stopped_early')
+    return received, scanner.text
+
+def cancel_stream(response):
+    """Cancel the RPC behind a streaming response so generation stops"""
+    # The SDK keeps the gRPC stream in a private attribute and has no public
+    # way to end it early
+    cancel = getattr(getattr(response, '_iterator', None), 'cancel', None)
+    if cancel:
+        try:
+            cancel()
+        except Exception as e:
+            logger.warning(f"Could not cancel Gemini stream: {str(e)}")
+
+async def generate_ai_response_async(prompt, model_name=MODEL_NAME, max_output_tokens=MAX_OUTPUT_TOKENS):
+    """Async generate_ai_response; must run on model_manager's event loop"""
+    if not ai_policy.breaker.allow():
+        return None
     try:
-        model = genai.GenerativeModel(model_name)
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "top_k": 40,
-                "max_output_tokens": 1000,  # Reduced from 2000
-            },
-            safety_settings={
-                "HARASSMENT": "block_none",
-                "HATE_SPEECH": "block_none",
-                "SEXUAL": "block_none",
-                "DANGEROUS": "block_none"
-            }
-        )
-        time.sleep(1)  # Rate limiting
+        estimated_tokens = estimate_tokens(prompt) + max_output_tokens
+        record_stage('rate_limit_wait', await rate_limiter.acquire_async(estimated_tokens))
+        model = get_model(model_name, max_output_tokens)
+        with timed('gemini_call'):
+            response = await model.generate_content_async(prompt)
+        record_usage(estimated_tokens, prompt, response.text)
+        ai_policy.breaker.record_success()
         return response.text
     except Exception as e:
         logger.error(f"AI Service Error: {str(e)}", exc_info=True)
+        ai_policy.breaker.record_failure()
         return None
 
-def extract_json_from_response(response_text):
-    """Extract JSON from AI response with robust error handling"""
+def record_usage(estimated_tokens, prompt, text, section=None):
+    """Settle the rate limiter and record a call's token counts; returns the output tokens
+
+    The counts are estimates from the length of ``prompt`` and ``text``:
+    google-generativeai 0.3.2 reports no usage, and asking count_tokens
+    would cost a request per call.
+    """
+    counts = {
+        'prompt': estimate_tokens(prompt) if prompt else 0,
+        'output': estimate_tokens(text) if text else 0
+    }
+    rate_limiter.settle(estimated_tokens, sum(counts.values()) or None)
+    for kind, count in counts.items():
+        if count:
+            metrics.inc('gemini_tokens_total', count, kind=kind)
+            metrics.observe('gemini_tokens', count, buckets=TOKEN_BUCKETS, kind=kind)
+    record_tokens(section, counts['prompt'], counts['output'])
+    return counts['output']
+
+def generate_many(prompts, model_name=MODEL_NAME, max_output_tokens=MAX_OUTPUT_TOKENS, timeout=None):
+    """Run several prompts concurrently on one event loop; returns texts in order"""
+    async def gather():
+        return await asyncio.gather(*(
+            generate_ai_response_async(prompt, model_name, max_output_tokens) for prompt in prompts
+        ))
+    return model_manager.run(gather(), timeout)
+
+def get_model(model_name=MODEL_NAME, max_output_tokens=MAX_OUTPUT_TOKENS):
+    """Shared model object for this model and output cap"""
+    return model_manager.get(
+        model_name,
+        generation_config={**GENERATION_CONFIG, "max_output_tokens": max_output_tokens},
+        safety_settings=SAFETY_SETTINGS
+    )
+
+@timed('json_extract')
+def extract_json_from_response(response_text, schema=None):
+    """Extract JSON from AI response with robust error handling
+
+    ``schema`` is an ``(expected_type, required_keys)`` pair; a response
+    without a matching value yields None so the caller can fall back.
+    """
     try:
-        # Clean the response text first
-        cleaned_text = response_text.strip()
-        
-        # Try direct parse first
-        try:
-            return json.loads(cleaned_text)
-        except json.JSONDecodeError:
-            pass
-        
-        # Try extracting JSON from markdown
-        json_match = re.search(r'```(?:json)?\n?(.+?)\n?```', cleaned_text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1).strip())
-            except json.JSONDecodeError:
-                pass
-        
-        # Try extracting any JSON structure
-        json_match = re.search(r'\{[\s\S]*\}', cleaned_text) or re.search(r'\[[\s\S]*\]', cleaned_text)
-        if json_match:
-            try:
-                return json.loads(json_match.group())
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parsing error: {str(e)}")
-                pass
-        
-        # If all else fails, try to fix common JSON issues
-        try:
-            fixed_text = cleaned_text.replace('```json', '').replace('```', '')
-            return json.loads(fixed_text)
-        except json.JSONDecodeError:
+        data = extract_json(response_text, schema)
+        if data is None:
             logger.error("Failed to parse JSON from response")
-            return None
+        return data
     except Exception as e:
         logger.error(f"Error extracting JSON: {str(e)}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,265 @@
+"""Validate many ideas in one run, from CSV or JSONL rows of (idea, industry).
+
+    python -m services.bulk ideas.csv --output results.jsonl
+
+Rows are deduplicated, validated concurrently and written out as JSONL in
+the order they finish. Every success is appended to a checkpoint file, so
+running the same command again after a crash only validates what is left.
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import Config
+from services.history import hash_idea
+from services.metrics import metrics
+from services.validator import validate_idea
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+MIN_IDEA_LENGTH = 20
+
+# Shared by every bulk run in this process, so two uploads don't double the load
+_slots = threading.BoundedSemaphore(max(1, Config.BULK_CONCURRENCY))
+
+
+class BulkInputError(ValueError):
+    """Raised when bulk input can't be read as CSV or JSONL rows"""
+
+
+class Pacer:
+    """Spaces out validation starts to at most ``per_minute`` a minute"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_pacer = Pacer(Config.BULK_IDEAS_PER_MINUTE)
+
+
+class Checkpoint:
+    """Append-only JSONL of finished rows, keyed by idea hash.
+
+    Each record is flushed and fsynced as soon as it is written, so a crash
+    loses at most the validations that were in flight. A torn last line from
+    a crash is ignored on load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        self.done[record['idea_hash']] = record
+                    except (ValueError, KeyError, TypeError):
+                        continue
+            logger.info(f"Resuming from checkpoint {path} with {len(self.done)} finished rows")
+
+    def record(self, record):
+        if not self.path:
+            return
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.done[record['idea_hash']] = record
+
+
+def read_rows(text, fmt):
+    """Parse ``text`` as ``'csv'`` or ``'jsonl'`` into idea/industry dicts.
+
+    CSV needs an ``idea`` column; ``industry`` is optional. Raises
+    BulkInputError on unreadable input.
+    """
+    rows = []
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        fields = {(name or '').strip().lower(): name for name in reader.fieldnames or []}
+        if 'idea' not in fields:
+            raise BulkInputError("CSV input needs an 'idea' column")
+        industry_field = fields.get('industry')
+        for row in reader:
+            rows.append({
+                'idea': (row.get(fields['idea']) or '').strip(),
+                'industry': ((row.get(industry_field) if industry_field else '') or '').strip() or None
+            })
+    elif fmt == 'jsonl':
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                raise BulkInputError(f"Line {number} is not valid JSON")
+            if not isinstance(row, dict):
+                raise BulkInputError(f"Line {number} is not a JSON object")
+            rows.append({
+                'idea': str(row.get('idea') or '').strip(),
+                'industry': str(row.get('industry') or '').strip() or None
+            })
+    else:
+        raise BulkInputError(f"Unsupported format: {fmt}")
+
+    if len(rows) > Config.BULK_MAX_ROWS:
+        raise BulkInputError(f"{len(rows)} rows is more than the limit of {Config.BULK_MAX_ROWS}")
+    return rows
+
+
+def detect_format(name='', content_type=''):
+    """'csv' or 'jsonl' from a file name or content type; defaults to CSV"""
+    name, content_type = (name or '').lower(), (content_type or '').lower()
+    if name.endswith(('.jsonl', '.ndjson', '.json')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'jsonl'
+    return 'csv'
+
+
+def bulk_id(rows):
+    """Stable id for a set of rows; the same upload gets the same checkpoint"""
+    hashes = sorted({hash_idea(row['idea'], row['industry']) for row in rows})
+    return hashlib.sha256('\n'.join(hashes).encode('utf-8')).hexdigest()[:32]
+
+
+def run_bulk(rows, checkpoint_path=None, concurrency=None, batch=None):
+    """Validate ``rows``, yielding one result record per row as it finishes.
+
+    Duplicates and rows that fail input validation are reported first,
+    then rows already in the checkpoint, then fresh validations in
+    completion order. Closing the generator stops rows that haven't
+    started yet; finished ones stay in the checkpoint.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    seen = {}
+    pending = []
+    for index, row in enumerate(rows):
+        idea, industry = row['idea'], row['industry']
+        idea_hash = hash_idea(idea, industry)
+        base = {'row': index, 'idea_hash': idea_hash, 'idea': idea, 'industry': industry}
+        if idea_hash in seen:
+            yield {**base, 'status': 'duplicate', 'duplicate_of': seen[idea_hash]}
+            continue
+        seen[idea_hash] = index
+        if len(idea) < MIN_IDEA_LENGTH:
+            yield {**base, 'status': 'error', 'code': 'IDEA_TOO_SHORT',
+                   'error': f"Description must be at least {MIN_IDEA_LENGTH} characters long"}
+        elif idea_hash in checkpoint.done:
+            yield {**checkpoint.done[idea_hash], 'row': index, 'resumed': True}
+        else:
+            pending.append(base)
+
+    if not pending:
+        return
+    logger.info(f"Bulk run: {len(pending)} to validate, {len(checkpoint.done)} from checkpoint")
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency or Config.BULK_CONCURRENCY),
+                                  thread_name_prefix='bulk')
+    try:
+        futures = [executor.submit(_validate_row, base, checkpoint, batch) for base in pending]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _validate_row(base, checkpoint, batch):
+    with _slots:
+        _pacer.wait()
+        started = time.perf_counter()
+        try:
+            result = validate_idea(base['idea'], base['industry'], batch=batch)
+            record = {**base, 'status': 'success', 'data': result}
+        except Exception as e:
+            logger.error(f"Bulk row {base['row']} failed: {str(e)}", exc_info=True)
+            record = {**base, 'status': 'error', 'code': 'ANALYSIS_ERROR', 'error': str(e)}
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    if record['status'] == 'success':
+        # Here rather than in run_bulk, so a run whose reader went away still keeps it
+        checkpoint.record(record)
+    metrics.inc('bulk_rows_total', status=record['status'])
+    return record
+
+
+def purge_checkpoints(directory, max_age):
+    """Remove bulk checkpoints nobody has resumed for ``max_age`` seconds"""
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        try:
+            if entry.name.endswith('.jsonl') and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate every idea in a CSV or JSONL file.')
+    parser.add_argument('input', help="CSV (idea,industry columns) or JSONL file, '-' for stdin")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help='input format; guessed from the file name')
+    parser.add_argument('--output', '-o', help='JSONL results file (default: stdout)')
+    parser.add_argument('--checkpoint', help='resume file (default: <input>.checkpoint.jsonl)')
+    parser.add_argument('--concurrency', type=int, default=Config.BULK_CONCURRENCY,
+                        help='ideas validated at once, at most BULK_CONCURRENCY')
+    parser.add_argument('--batch', action='store_true', help='one batched prompt per idea')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=Config.LOG_LEVEL, stream=sys.stderr)
+    Config.validate_config()
+
+    if args.input == '-':
+        text = sys.stdin.read()
+        checkpoint = args.checkpoint
+    else:
+        with open(args.input, encoding='utf-8-sig') as f:
+            text = f.read()
+        checkpoint = args.checkpoint or f"{args.input}.checkpoint.jsonl"
+    try:
+        rows = read_rows(text, args.format or detect_format(args.input))
+    except BulkInputError as e:
+        parser.error(str(e))
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    counts = {}
+    started = time.perf_counter()
+    try:
+        for record in run_bulk(rows, checkpoint, args.concurrency, batch=args.batch or None):
+            out.write(json.dumps(record, default=str) + '\n')
+            out.flush()
+            counts[record['status']] = counts.get(record['status'], 0) + 1
+            logger.info(f"{sum(counts.values())}/{len(rows)} rows done")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    summary = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+    logger.info(f"Bulk run finished in {time.perf_counter() - started:.1f}s: {summary}")
+    return 0 if not counts.get('error') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
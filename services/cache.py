@@ -0,0 +1,186 @@
+import atexit
+import sqlite3
+import hashlib
+import threading
+import time
+import logging
+from services.db import LocalConnection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Don't rewrite accessed_at on every hit; LRU order only needs to be approximate
+_TOUCH_INTERVAL = 60
+# Hit counts and access times are written at most this often, in one batch
+_FLUSH_INTERVAL = 5
+
+
+class ResponseCache:
+    """Persistent key/value cache shared by every worker process.
+
+    Entries live in a SQLite database in WAL mode, expire after ``ttl_seconds``
+    and are evicted least-recently-used first once the stored values exceed
+    ``max_bytes``. Hit/miss/eviction counters are kept in the same database so
+    they cover all workers. A hit is a plain read: its counter and access
+    time are held in memory and written in batches.
+    """
+
+    def __init__(self, path, ttl_seconds, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._db = LocalConnection(path, [
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)",
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        ])
+        self._lock = threading.Lock()
+        self._pending = {}  # Counter increments not written yet
+        self._touched = {}  # Key -> access time not written yet
+        self._flushed_at = time.monotonic()
+        atexit.register(self.flush)
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None"""
+        try:
+            conn = self._db.get()
+            now = time.time()
+            row = conn.execute(
+                "SELECT value, created_at, accessed_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+            value, created_at, accessed_at = row
+            if now - created_at > self.ttl_seconds:
+                with conn:
+                    self._delete(conn, [key])
+                    self._bump(conn, 'misses')
+                    self._bump(conn, 'expired')
+                return None
+            self._count('hits', (key, now) if now - accessed_at > _TOUCH_INTERVAL else None)
+            return value
+        except sqlite3.Error as e:
+            logger.error(f"Cache read error: {str(e)}")
+            return None
+
+    def set(self, key, value):
+        """Store ``value``; empty values are never cached"""
+        if not value:
+            return
+        try:
+            conn = self._db.get()
+            now = time.time()
+            size = len(value.encode('utf-8'))
+            with conn:
+                old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now)
+                )
+                self._bump(conn, 'bytes', size - (old[0] if old else 0))
+                self._write_pending(conn)
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Cache write error: {str(e)}")
+
+    def flush(self):
+        """Write this process's pending hit counts and access times"""
+        try:
+            conn = self._db.get()
+            with conn:
+                self._write_pending(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Cache flush error: {str(e)}")
+
+    def stats(self):
+        """Shared counters: hits, misses, evictions, expired, entries and bytes"""
+        try:
+            conn = self._db.get()
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Cache stats error: {str(e)}")
+            return {}
+        with self._lock:
+            for name, amount in self._pending.items():
+                counters[name] = counters.get(name, 0) + amount
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'expired': counters.get('expired', 0),
+            'entries': entries,
+            'bytes': counters.get('bytes', 0)
+        }
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT value FROM counters WHERE name = 'bytes'").fetchone()
+        if not total or total[0] <= self.max_bytes:
+            return
+        expired = [row[0] for row in conn.execute(
+            "SELECT key FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        )]
+        self._delete(conn, expired)
+        self._bump(conn, 'expired', len(expired))
+
+        # What the expired entries freed may already be enough
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0] - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            victims.append(key)
+            excess -= size
+        self._delete(conn, victims)
+        self._bump(conn, 'evictions', len(victims))
+
+    def _delete(self, conn, keys):
+        for key in keys:
+            row = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            if row:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._bump(conn, 'bytes', -row[0])
+
+    def _count(self, name, touch=None):
+        # Hot path: no write transaction, just a periodic batched flush
+        with self._lock:
+            self._pending[name] = self._pending.get(name, 0) + 1
+            if touch:
+                self._touched[touch[0]] = touch[1]
+            due = time.monotonic() - self._flushed_at >= _FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def _write_pending(self, conn):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, {}
+            self._flushed_at = time.monotonic()
+        if touched:
+            conn.executemany(
+                "UPDATE entries SET accessed_at = ? WHERE key = ? AND accessed_at < ?",
+                [(accessed_at, key, accessed_at) for key, accessed_at in touched.items()]
+            )
+        for name, amount in pending.items():
+            self._bump(conn, name, amount)
+
+    def _bump(self, conn, name, amount=1):
+        if amount:
+            conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+
+
+def make_cache_key(*parts):
+    """Stable hash of the parts that determine a cached value"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
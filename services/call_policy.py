@@ -0,0 +1,283 @@
+import contextvars
+import random
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class RetryBudget:
+    """Retries shared by every AI call made for one validation request"""
+
+    def __init__(self, retries, timeout_seconds):
+        self.remaining = retries
+        self.deadline = time.monotonic() + timeout_seconds
+        self._lock = threading.Lock()
+
+    def take(self):
+        """Use one retry; False once the budget is spent"""
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    def time_left(self):
+        return self.deadline - time.monotonic()
+
+
+class CircuitBreaker:
+    """Stops calling a failing service for ``reset_seconds``.
+
+    Opens after ``failure_threshold`` consecutive failures. Once the reset
+    period has passed a single probe call is let through (half-open); its
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Circuit breaker closed")
+            self.state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit breaker opened after {self._failures} failures")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+
+class CallPolicy:
+    """Retry, backoff and circuit-breaking rules for calls to one service.
+
+    A call is attempted once; retries come out of the caller's RetryBudget,
+    use full-jitter exponential backoff and are skipped when the backoff
+    would run past the budget's deadline. While the breaker is open calls
+    fail immediately so callers can serve their fallback.
+    """
+
+    def __init__(self, breaker, base_delay=0.5, max_delay=8.0):
+        self.breaker = breaker
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'failures': 0, 'retries': 0, 'short_circuited': 0,
+                       'responses': 0, 'fallbacks': 0}
+
+    def call(self, fn, budget=None):
+        """Return ``fn()``'s result, or None once the policy gives up"""
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count('short_circuited')
+                return None
+
+            self._count('calls')
+            try:
+                result = fn()
+            except Exception as e:
+                logger.error(f"Call failed (attempt {attempt + 1}): {str(e)}")
+                result = None
+            if result:
+                self.breaker.record_success()
+                return result
+
+            self._count('failures')
+            self.breaker.record_failure()
+
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            # Leave room for the retried call itself before the deadline
+            if budget is None or budget.time_left() < delay * 2 + 1 or not budget.take():
+                return None
+            self._count('retries')
+            time.sleep(delay)
+            attempt += 1
+
+    def record_outcome(self, used_fallback):
+        """Track how often callers had to fall back"""
+        self._count('responses')
+        if used_fallback:
+            self._count('fallbacks')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['breaker_state'] = self.breaker.state
+        stats['fallback_rate'] = round(stats['fallbacks'] / stats['responses'], 4) if stats['responses'] else 0.0
+        return stats
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+class LatencyTracker:
+    """Recent successful call latencies per key, for percentile lookups"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key, p, min_samples=1):
+        """The ``p`` (0-1) percentile for ``key``, or None with too few samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    def stats(self):
+        with self._lock:
+            keys = list(self._samples)
+        stats = {}
+        for key in keys:
+            for name, p in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+                stats[f"{key}_{name}_seconds"] = round(self.percentile(key, p), 4)
+        return stats
+
+
+class Hedger:
+    """Sends a duplicate of a call that is slower than usual; the first answer wins.
+
+    Once a key has ``min_samples`` latencies, a call still running after the
+    ``percentile`` latency for its key (but at least ``min_delay``) gets a
+    second, identical request. Hedges are paid for from a bucket that gains
+    ``max_ratio`` of a hedge per call, so they add at most that share of
+    extra requests. ``fn`` receives a threading.Event that is set once the
+    other request has won, so it can stop early.
+    """
+
+    def __init__(self, tracker, percentile=0.95, max_ratio=0.1, min_samples=20, min_delay=0.25, burst=5):
+        self.tracker = tracker
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.burst = burst
+        self.enabled = True
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'denied': 0}
+
+    def call(self, key, fn):
+        """Return the first truthy result of ``fn(cancelled)``; raises if every attempt failed"""
+        self._count('calls')
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.max_ratio)
+        delay = self.tracker.percentile(key, self.percentile, self.min_samples) if self.enabled else None
+        if delay is None:
+            return self._timed(key, fn, threading.Event())
+
+        cancels = [threading.Event()]
+        futures = {_spawn(self._timed, key, fn, cancels[0]): 0}
+        done, _ = wait(futures, timeout=max(delay, self.min_delay))
+        if not done:
+            if self._take():
+                logger.info(f"Hedging '{key}' call after {max(delay, self.min_delay):.2f}s")
+                self._count('hedged')
+                cancels.append(threading.Event())
+                futures[_spawn(self._timed, key, fn, cancels[1])] = 1
+            else:
+                self._count('denied')
+
+        pending, error, result = set(futures), None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                if result:
+                    winner = futures[future]
+                    for i, cancel in enumerate(cancels):
+                        if i != winner:
+                            cancel.set()
+                    if winner:
+                        self._count('hedge_wins')
+                    return result
+        if error is not None:
+            raise error
+        return result
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def _timed(self, key, fn, cancelled):
+        started = time.monotonic()
+        result = fn(cancelled)
+        if result and not cancelled.is_set():
+            self.tracker.record(key, time.monotonic() - started)
+        return result
+
+    def _take(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _spawn(fn, *args):
+    """Run ``fn`` in the caller's context on its own daemon thread; returns a Future for its result"""
+    future = Future()
+    future.set_running_or_notify_cancel()
+    context = contextvars.copy_context()
+
+    def run():
+        try:
+            future.set_result(context.run(fn, *args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='hedged-call', daemon=True).start()
+    return future
@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import threading
+
+
+class LocalConnection:
+    """Hands out one SQLite connection per thread and per process.
+
+    sqlite3 connections can't be shared across threads, and a connection
+    inherited through fork must not be reused by the child. ``schema`` is a
+    list of statements run once for every new connection.
+    """
+
+    def __init__(self, path, schema=()):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+
+    def get(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            for statement in self.schema:
+                conn.execute(statement)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
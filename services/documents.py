@@ -0,0 +1,237 @@
+"""Text extraction from uploaded pitch documents (TXT, DOCX, PDF).
+
+Uploads are spooled to a temporary file and read a paragraph at a time:
+plain text through an incremental decoder, DOCX by streaming
+``word/document.xml`` out of the zip with iterparse, PDF page by page
+with pypdf when it is installed. summarize_document keeps the first
+distinct, non-boilerplate paragraphs up to a character cap and stops
+reading there, so memory stays flat however large the upload is.
+"""
+import codecs
+import hashlib
+import os
+import re
+import tempfile
+import zipfile
+import logging
+from xml.etree.ElementTree import iterparse, ParseError
+from config import Config
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # Optional; PDF uploads are refused without it
+    PdfReader = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 64 * 1024
+# A paragraph is cut here even without a break, so one huge line can't fill memory
+MAX_PARAGRAPH_CHARS = 16 * 1024
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+FORMATS = {'.txt': 'txt', '.text': 'txt', '.md': 'txt', '.docx': 'docx', '.pdf': 'pdf'}
+CONTENT_TYPES = {
+    'text/plain': 'txt',
+    'text/markdown': 'txt',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+    'application/pdf': 'pdf'
+}
+
+# Lines that carry no meaning for the analysis: page numbers, legal
+# footers, bare links and contact details
+_BOILERPLATE = re.compile(
+    r'^(page\s*\d+(\s*(of|/)\s*\d+)?|\d{1,4}|www\.\S+|https?://\S+|\S+@\S+\.\S+|(tel|phone|email|e-mail)\s*:.*)$',
+    re.IGNORECASE
+)
+# Short lines with these are legal headers and footers ("Acme Inc. - Confidential")
+_LEGAL = re.compile(r'(\bconfidential\b|\ball rights reserved\b|\bcopyright\b|©)', re.IGNORECASE)
+LEGAL_MAX_WORDS = 10
+# Shorter lines are headings or slide labels ("Team", "Thank you")
+MIN_WORDS = 4
+
+
+class DocumentError(ValueError):
+    """Raised when an upload can't be read as a document"""
+
+
+class UnsupportedDocument(DocumentError):
+    """Raised for file types with no extractor"""
+
+
+class DocumentTooLarge(DocumentError):
+    """Raised when an upload, or the text packed inside it, is over the limit"""
+
+
+def detect_format(filename='', content_type=''):
+    """'txt', 'docx' or 'pdf' from a file name or content type; raises UnsupportedDocument"""
+    extension = os.path.splitext((filename or '').lower())[1]
+    fmt = FORMATS.get(extension) or CONTENT_TYPES.get((content_type or '').split(';')[0].strip().lower())
+    if fmt is None:
+        raise UnsupportedDocument(f"Unsupported file type '{extension or content_type or 'unknown'}'; "
+                                  f"upload a PDF, DOCX or TXT file")
+    return fmt
+
+
+def spool_factory(total_content_length=None, content_type=None, filename=None, content_length=None):
+    """Stream factory for the form parser: file parts go to disk past a small buffer"""
+    return tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_MEMORY_BYTES, mode='rb+')
+
+
+def iter_paragraphs(fileobj, fmt):
+    """Paragraphs of text from a seekable binary file, read incrementally"""
+    fileobj.seek(0)
+    if fmt == 'txt':
+        return _text_paragraphs(fileobj)
+    if fmt == 'docx':
+        return _docx_paragraphs(fileobj)
+    if fmt == 'pdf':
+        return _pdf_paragraphs(fileobj)
+    raise UnsupportedDocument(f"Unsupported format: {fmt}")
+
+
+def _text_paragraphs(fileobj):
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    lines = []
+    size = 0
+    pending = ''
+    while True:
+        chunk = fileobj.read(READ_CHUNK)
+        pending += decoder.decode(chunk, final=not chunk)
+        *complete, pending = pending.split('\n')
+        if len(pending) > MAX_PARAGRAPH_CHARS:
+            complete.append(pending)
+            pending = ''
+        for line in complete:
+            if line.strip():
+                lines.append(line.strip())
+                size += len(line)
+            if lines and (not line.strip() or size > MAX_PARAGRAPH_CHARS):  # A blank line ends the paragraph
+                yield ' '.join(lines)
+                lines = []
+                size = 0
+        if not chunk:
+            break
+    if pending.strip():
+        lines.append(pending.strip())
+    if lines:
+        yield ' '.join(lines)
+
+
+def _docx_paragraphs(fileobj):
+    try:
+        archive = zipfile.ZipFile(fileobj)
+        member = archive.open('word/document.xml')
+    except (zipfile.BadZipFile, KeyError):
+        raise DocumentError("The file is not a valid DOCX document")
+    with archive, member:
+        parts = []
+        size = 0
+        body = None
+        try:
+            capped = CappedStream(member, Config.UPLOAD_MAX_EXTRACTED_BYTES,
+                                  "The document expands to more text than allowed")
+            for event, elem in iterparse(capped, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == f"{WORD_NS}body":
+                        body = elem
+                    continue
+                if elem.tag == f"{WORD_NS}t" and elem.text:
+                    parts.append(elem.text)
+                    size += len(elem.text)
+                elif elem.tag == f"{WORD_NS}tab":
+                    parts.append(' ')
+                if elem.tag == f"{WORD_NS}p" or size > MAX_PARAGRAPH_CHARS:
+                    if parts:
+                        yield ''.join(parts)
+                    parts = []
+                    size = 0
+                    if body is not None:
+                        del body[:]  # Finished paragraphs are dropped, keeping memory flat
+        except ParseError:
+            raise DocumentError("The DOCX document is damaged")
+
+
+def _pdf_paragraphs(fileobj):
+    if PdfReader is None:
+        raise UnsupportedDocument("PDF uploads need the pypdf package on the server; upload a DOCX or TXT file")
+    try:
+        reader = PdfReader(fileobj)
+        pages = reader.pages
+    except Exception as e:
+        raise DocumentError(f"The PDF could not be read: {str(e)}")
+    for page in pages:
+        try:
+            # Layout mode keeps vertical gaps as blank lines; the default
+            # mode runs headers, body and footers together
+            text = page.extract_text(extraction_mode='layout') or ''
+        except Exception as e:
+            logger.warning(f"Skipping unreadable PDF page: {str(e)}")
+            continue
+        # Slides and pages break lines mid-sentence; blank lines split paragraphs
+        for block in re.split(r'\n\s*\n', text):
+            block = ' '.join(block.split())
+            if block:
+                yield block
+
+
+class CappedStream:
+    """Read-only stream that raises DocumentTooLarge past ``limit`` bytes"""
+
+    def __init__(self, stream, limit, message):
+        self.stream = stream
+        self.remaining = limit
+        self.message = message
+
+    def read(self, size=-1):
+        data = self.stream.read(READ_CHUNK if size is None or size < 0 else size)
+        self.remaining -= len(data)
+        if self.remaining < 0:
+            raise DocumentTooLarge(self.message)
+        return data
+
+
+def summarize_document(paragraphs, max_chars=None):
+    """Distinct, non-boilerplate paragraphs in order, up to ``max_chars``.
+
+    Repeated paragraphs (page headers and footers, slide titles) are kept
+    once; page numbers, legal lines, bare links and very short lines are
+    dropped. Reading stops once the summary is full, so the rest of the
+    document is never extracted. Returns the summary and reading stats.
+    """
+    max_chars = max_chars or Config.UPLOAD_SUMMARY_CHARS
+    seen = set()
+    kept = []
+    stats = {'paragraphs': 0, 'kept': 0, 'duplicates': 0, 'boilerplate': 0, 'chars_read': 0, 'truncated': False}
+    length = 0
+    try:
+        for paragraph in paragraphs:
+            text = ' '.join(paragraph.split())
+            stats['paragraphs'] += 1
+            stats['chars_read'] += len(text)
+            if not text:
+                continue
+            words = len(text.split())
+            if words < MIN_WORDS or _BOILERPLATE.match(text) or (words <= LEGAL_MAX_WORDS and _LEGAL.search(text)):
+                stats['boilerplate'] += 1
+                continue
+            digest = hashlib.blake2b(text.lower().encode('utf-8'), digest_size=8).digest()
+            if digest in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(digest)
+            if length + len(text) > max_chars:
+                stats['truncated'] = True
+                room = max_chars - length
+                if room > 200:  # Worth keeping the start of a long paragraph
+                    kept.append(text[:room].rsplit(' ', 1)[0] + '...')
+                    stats['kept'] += 1
+                break
+            kept.append(text)
+            stats['kept'] += 1
+            length += len(text) + 2
+    finally:
+        close = getattr(paragraphs, 'close', None)
+        if close:
+            close()
+    return '\n\n'.join(kept), stats
@@ -0,0 +1,123 @@
+import asyncio
+import os
+import threading
+import logging
+from config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_prepared_model = None
+
+
+def prepared_model_class():
+    """GenerativeModel subclass that builds its request template once.
+
+    The stock model re-normalises safety settings and re-marshals the
+    generation config into protobuf on every call. Plain-text prompts without
+    per-call overrides only need the prompt appended to a copy of the template.
+    Defined on first use so importing this module doesn't load the SDK.
+    """
+    global _prepared_model
+    if _prepared_model is not None:
+        return _prepared_model
+
+    import google.generativeai as genai
+    from google.ai import generativelanguage as glm
+    from google.generativeai.types import safety_types
+
+    class PreparedModel(genai.GenerativeModel):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            template = glm.GenerateContentRequest(
+                model=self._model_name,
+                generation_config=self._generation_config,
+                safety_settings=safety_types.normalize_safety_settings(
+                    self._safety_settings, harm_category_set="new"
+                ),
+                tools=self._tools
+            )
+            self._template = glm.GenerateContentRequest.pb(template)
+
+        def _prepare_request(self, *, contents, generation_config=None, safety_settings=None, **kwargs):
+            if not isinstance(contents, str) or not contents or generation_config or safety_settings or kwargs:
+                return super()._prepare_request(
+                    contents=contents,
+                    generation_config=generation_config,
+                    safety_settings=safety_settings,
+                    **kwargs
+                )
+            request = type(self._template)()
+            request.CopyFrom(self._template)
+            content = request.contents.add()
+            content.parts.add().text = contents
+            return glm.GenerateContentRequest.wrap(request)
+
+    _prepared_model = PreparedModel
+    return _prepared_model
+
+
+class ModelManager:
+    """Builds each model once per (model, config) and reuses it.
+
+    Models are safe to share between threads. Async calls all run on one
+    background event loop per process, because the SDK's async gRPC client is
+    bound to the loop that first used it. The SDK is imported and configured
+    with ``api_key`` when the first model is built.
+    """
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self._configured = False
+        self._models = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_pid = None
+
+    def get(self, model_name, generation_config=None, safety_settings=None):
+        key = (model_name, _freeze(generation_config), _freeze(safety_settings))
+        model = self._models.get(key)
+        if model is None:
+            with self._lock:
+                model = self._models.get(key)
+                if model is None:
+                    if not self._configured:
+                        self._configure()
+                    model = prepared_model_class()(
+                        model_name,
+                        generation_config=generation_config,
+                        safety_settings=safety_settings
+                    )
+                    self._models[key] = model
+        return model
+
+    def _configure(self):
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        self._configured = True
+
+    def run(self, coro, timeout=None):
+        """Run ``coro`` on the shared event loop and wait for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result(timeout)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='gemini-async', daemon=True).start()
+                if self._loop_pid is not None:
+                    # Models made before a fork hold the parent's async client
+                    self._models.clear()
+                self._loop, self._loop_pid = loop, os.getpid()
+            return self._loop
+
+
+def _freeze(settings):
+    return tuple(sorted(settings.items())) if settings else None
+
+
+model_manager = ModelManager(Config.GEMINI_API_KEY)
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import logging
+from config import Config
+from services.db import LocalConnection
+from services.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS analyses ("
+    "id TEXT PRIMARY KEY, idea_hash TEXT NOT NULL, idea TEXT NOT NULL, industry TEXT, "
+    "feasibility_score INTEGER, saved INTEGER NOT NULL DEFAULT 0, "
+    "created_at REAL NOT NULL, result TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS analyses_idea_hash ON analyses (idea_hash, created_at)",
+    "CREATE INDEX IF NOT EXISTS analyses_industry ON analyses (industry, created_at)",
+    "CREATE INDEX IF NOT EXISTS analyses_created_at ON analyses (created_at)",
+    # Digest of each section's input, for incremental re-validation
+    "CREATE TABLE IF NOT EXISTS section_fingerprints ("
+    "analysis_id TEXT PRIMARY KEY, fingerprints TEXT NOT NULL)"
+]
+
+# Full-text index over the idea text, kept in step with the table by triggers
+_FTS_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5("
+    "idea, content='analyses', content_rowid='rowid')",
+    "CREATE TRIGGER IF NOT EXISTS analyses_ai AFTER INSERT ON analyses BEGIN "
+    "INSERT INTO analyses_fts (rowid, idea) VALUES (new.rowid, new.idea); END",
+    "CREATE TRIGGER IF NOT EXISTS analyses_ad AFTER DELETE ON analyses BEGIN "
+    "INSERT INTO analyses_fts (analyses_fts, rowid, idea) VALUES ('delete', old.rowid, old.idea); END",
+    "CREATE TRIGGER IF NOT EXISTS analyses_au AFTER UPDATE OF idea ON analyses BEGIN "
+    "INSERT INTO analyses_fts (analyses_fts, rowid, idea) VALUES ('delete', old.rowid, old.idea); "
+    "INSERT INTO analyses_fts (rowid, idea) VALUES (new.rowid, new.idea); END"
+]
+
+_SUMMARY_COLUMNS = "id, idea, industry, feasibility_score, saved, created_at"
+_WORD = re.compile(r'\w+')
+
+# Prune unsaved analyses at most this often
+_PRUNE_INTERVAL = 3600
+
+
+class AnalysisHistory:
+    """Every validation result, kept in SQLite so it can be listed and reopened.
+
+    Rows are keyed by analysis id and indexed by idea hash, industry and
+    date; the idea text is full-text indexed with FTS5 when the SQLite build
+    has it (otherwise search falls back to LIKE). Analyses the user saved
+    are kept; the rest are pruned after ``max_age`` seconds.
+    """
+
+    def __init__(self, path, max_age):
+        self.max_age = max_age
+        self.fts = _has_fts5()
+        if not self.fts:
+            logger.warning("SQLite has no FTS5; history search will scan idea text")
+        self._db = LocalConnection(path, _SCHEMA + (_FTS_SCHEMA if self.fts else []))
+        self._last_prune = 0.0
+
+    def record(self, analysis_id, idea, industry, result, fingerprints=None):
+        """Store a finished analysis; a repeat of the same id refreshes it"""
+        try:
+            conn = self._db.get()
+            with conn:
+                conn.execute(
+                    "INSERT INTO analyses (id, idea_hash, idea, industry, feasibility_score, created_at, result) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET created_at = excluded.created_at, result = excluded.result",
+                    (analysis_id, hash_idea(idea, industry), idea, industry,
+                     result.get('feasibility_score'), time.time(), json.dumps(result))
+                )
+                if fingerprints:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO section_fingerprints (analysis_id, fingerprints) VALUES (?, ?)",
+                        (analysis_id, json.dumps(fingerprints))
+                    )
+            self._maybe_prune(conn)
+        except sqlite3.Error as e:
+            logger.error(f"History write error: {str(e)}")
+
+    def get(self, analysis_id):
+        """The stored result for ``analysis_id``, or None"""
+        conn = self._db.get()
+        row = conn.execute("SELECT result FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load(self, analysis_id):
+        """Idea, industry, result and section fingerprints of an analysis, or None"""
+        conn = self._db.get()
+        row = conn.execute(
+            "SELECT a.idea, a.industry, a.result, f.fingerprints FROM analyses a "
+            "LEFT JOIN section_fingerprints f ON f.analysis_id = a.id WHERE a.id = ?",
+            (analysis_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'idea': row[0],
+            'industry': row[1],
+            'result': json.loads(row[2]),
+            'fingerprints': json.loads(row[3]) if row[3] else {}
+        }
+
+    def latest(self, idea, industry=None, max_age=None):
+        """Newest result for the same idea and industry, if not older than ``max_age``"""
+        try:
+            conn = self._db.get()
+            row = conn.execute(
+                "SELECT result FROM analyses WHERE idea_hash = ? AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (hash_idea(idea, industry), time.time() - max_age if max_age else 0)
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"History read error: {str(e)}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def save(self, analysis_id):
+        """Keep an analysis past the retention period; returns its summary or None"""
+        conn = self._db.get()
+        with conn:
+            conn.execute("UPDATE analyses SET saved = 1 WHERE id = ?", (analysis_id,))
+            row = conn.execute(f"SELECT {_SUMMARY_COLUMNS} FROM analyses WHERE id = ?",
+                               (analysis_id,)).fetchone()
+        return _summary(row) if row else None
+
+    def list(self, limit=20, cursor=None, industry=None, saved=None):
+        """Newest analyses first; returns ``(summaries, next_cursor)``.
+
+        Pages are keyed on (created_at, rowid), so deep pages cost the same
+        as the first one.
+        """
+        clauses, params = [], []
+        if industry:
+            clauses.append("industry = ?")
+            params.append(industry)
+        if saved is not None:
+            clauses.append("saved = ?")
+            params.append(1 if saved else 0)
+        if cursor:
+            created_at, rowid = _parse_cursor(cursor)
+            clauses.append("(created_at, rowid) < (?, ?)")
+            params.extend((created_at, rowid))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._db.get().execute(
+            f"SELECT {_SUMMARY_COLUMNS}, rowid FROM analyses {where} "
+            f"ORDER BY created_at DESC, rowid DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][5]!r}:{rows[-1][6]}"
+        return [_summary(row) for row in rows], next_cursor
+
+    def search(self, query, limit=20, offset=0):
+        """Analyses whose idea text matches every word of ``query`` (prefixes count)"""
+        words = _WORD.findall(query or '')
+        if not words:
+            return []
+        conn = self._db.get()
+        if self.fts:
+            match = ' '.join(f'"{word}"*' for word in words)
+            rows = conn.execute(
+                f"SELECT {', '.join('a.' + c.strip() for c in _SUMMARY_COLUMNS.split(','))} "
+                "FROM analyses_fts JOIN analyses a ON a.rowid = analyses_fts.rowid "
+                "WHERE analyses_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+                (match, limit, offset)
+            ).fetchall()
+        else:
+            like = ' AND '.join("idea LIKE ?" for _ in words)
+            rows = conn.execute(
+                f"SELECT {_SUMMARY_COLUMNS} FROM analyses WHERE {like} "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (*(f"%{word}%" for word in words), limit, offset)
+            ).fetchall()
+        return [_summary(row) for row in rows]
+
+    def _maybe_prune(self, conn):
+        now = time.time()
+        if now - self._last_prune < _PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM analyses WHERE saved = 0 AND created_at < ?", (now - self.max_age,)
+            ).rowcount
+            conn.execute("DELETE FROM section_fingerprints WHERE analysis_id NOT IN (SELECT id FROM analyses)")
+        if removed:
+            logger.info(f"Pruned {removed} old analyses from history")
+
+
+def hash_idea(idea, industry=None):
+    """Hash of the normalised idea text and industry, used for deduplication"""
+    normalized = ' '.join(f"{idea} | {industry or ''}".lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def _summary(row):
+    return {
+        'analysis_id': row[0],
+        'idea': row[1],
+        'industry': row[2],
+        'feasibility_score': row[3],
+        'saved': bool(row[4]),
+        'created_at': row[5]
+    }
+
+
+def _parse_cursor(cursor):
+    try:
+        created_at, rowid = cursor.rsplit(':', 1)
+        return float(created_at), int(rowid)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _has_fts5():
+    try:
+        sqlite3.connect(':memory:').execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+        return True
+    except sqlite3.Error:
+        return False
+
+
+analysis_history = AnalysisHistory(
+    Config.HISTORY_DB_PATH,
+    max_age=Config.HISTORY_MAX_AGE_DAYS * 24 * 3600
+)
+metrics.describe('analysis_history_hits_total', 'Validations answered from the analysis history')
@@ -0,0 +1,125 @@
+"""Compression and caching helpers for HTTP responses.
+
+Static pages are rendered once per worker and kept with their compressed
+variants and an ETag; larger JSON bodies are compressed per response.
+Brotli is used when the ``brotli`` package is installed, gzip otherwise.
+"""
+import gzip
+import hashlib
+import threading
+import logging
+from config import Config
+from services.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # Optional; gzip covers every browser
+    brotli = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Preferred first; br compresses HTML and JSON noticeably better than gzip
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# Compressed once per page, so spend the CPU on the smallest result
+PAGE_LEVELS = {'br': 11, 'gzip': 9}
+# Per-response compression has to be cheap
+ON_THE_FLY_LEVELS = {'br': 4, 'gzip': 6}
+
+# For responses whose URL changes when their content does (reports)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def accepted_encoding(accept_encoding, available=ENCODINGS):
+    """The first of ``available`` that an Accept-Encoding header allows, or None"""
+    weights = {}
+    for part in (accept_encoding or '').lower().split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    for encoding in available:
+        if weights.get(encoding, weights.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body, encoding, levels=PAGE_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(body, quality=levels['br'])
+    return gzip.compress(body, compresslevel=levels['gzip'], mtime=0)
+
+
+class Page:
+    """A rendered page, its ETag and its compressed variants"""
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = {}
+        for encoding in ENCODINGS:
+            data = compress(body, encoding)
+            if len(data) < len(body):
+                self.variants[encoding] = data
+
+
+class PageCache:
+    """Pages that render the same for everyone, kept for the life of the worker"""
+
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, render):
+        """The cached Page for ``name``; ``render()`` builds its HTML on a miss"""
+        page = self._pages.get(name)
+        if page is not None:
+            return page
+        with self._lock:
+            page = self._pages.get(name)
+            if page is None:
+                page = self._pages[name] = Page(render().encode('utf-8'))
+                logger.info(f"Cached page '{name}': {len(page.body)} bytes, "
+                            + ', '.join(f"{enc} {len(data)}" for enc, data in page.variants.items()))
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+
+    def stats(self):
+        pages = list(self._pages.values())
+        return {
+            'pages': len(pages),
+            'bytes': sum(len(page.body) + sum(map(len, page.variants.values())) for page in pages)
+        }
+
+
+def compress_response(response, accept_encoding):
+    """Compress a large JSON body in place if the client accepts it"""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accepted_encoding(accept_encoding)
+    body = response.get_data()
+    if encoding is None or len(body) < Config.COMPRESS_MIN_BYTES:
+        return response
+    data = compress(body, encoding, ON_THE_FLY_LEVELS)
+    if len(data) >= len(body):
+        return response
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    metrics.inc('http_compressed_bytes_saved_total', len(body) - len(data), encoding=encoding)
+    return response
+
+
+page_cache = PageCache()
+metrics.register_collector('http_page_cache', page_cache.stats)
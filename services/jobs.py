@@ -0,0 +1,240 @@
+import json
+import threading
+import time
+import uuid
+import logging
+from config import Config
+from services.db import LocalConnection
+from services.history import hash_idea
+from services.metrics import metrics
+from services.validator import validate_idea
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at capacity"""
+
+
+class JobQueue:
+    """SQLite-backed validation job queue with a local worker pool.
+
+    Jobs survive restarts: any worker in any process claims the oldest queued
+    job, and a running job whose heartbeat goes stale (its worker died) is
+    picked up again. Submissions are deduplicated by idea hash, the number of
+    unfinished jobs is capped, and finished jobs are purged after
+    ``result_ttl`` seconds.
+    """
+
+    def __init__(self, path, workers=4, max_pending=100, result_ttl=3600, stale_after=300):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.stale_after = stale_after
+        self._db = LocalConnection(path, [
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, idea_hash TEXT NOT NULL, idea TEXT NOT NULL, industry TEXT, "
+            "batch INTEGER, status TEXT NOT NULL, partial TEXT, result TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, finished_at REAL)",
+            "CREATE INDEX IF NOT EXISTS jobs_idea_hash ON jobs (idea_hash)",
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+        ])
+        self._wakeup = threading.Event()
+        self._next_purge = 0
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def submit(self, idea, industry=None, batch=None):
+        """Queue a validation, or return the live job for the same idea.
+
+        Returns ``(job, created)``. Raises QueueFull when at capacity.
+        """
+        self.start()
+        idea_hash = hash_idea(idea, industry)
+        now = time.time()
+        conn = self._db.get()
+        with conn:
+            # Take the write lock before the checks, so two processes can't
+            # both find no job for the idea, or both see a free slot
+            conn.execute("BEGIN IMMEDIATE")
+            self._purge(conn, now)
+            existing = conn.execute(
+                "SELECT * FROM jobs WHERE idea_hash = ? AND status != ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (idea_hash, FAILED)
+            ).fetchone()
+            if existing:
+                return self._to_dict(conn, existing), False
+
+            pending = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} validations already pending")
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, idea_hash, idea, industry, batch, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, idea_hash, idea, industry, batch, QUEUED, now, now)
+            )
+        self._wakeup.set()
+        return self.get(job_id), True
+
+    def get(self, job_id):
+        """Return the job as a dict, or None if unknown or expired"""
+        conn = self._db.get()
+        # Expired rows may not have been purged yet
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE id = ? AND (finished_at IS NULL OR finished_at >= ?)",
+            (job_id, time.time() - self.result_ttl)
+        ).fetchone()
+        return self._to_dict(conn, row) if row else None
+
+    def stats(self):
+        conn = self._db.get()
+        return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def start(self):
+        """Start the worker threads once per process.
+
+        Called at startup so jobs left queued by a restart run without
+        waiting for a new submission; running jobs whose worker is gone are
+        put back in the queue first.
+        """
+        with self._start_lock:
+            if self._started:
+                return
+            try:
+                self._requeue_stale()
+            except Exception as e:
+                logger.error(f"Requeueing stale jobs failed: {str(e)}", exc_info=True)
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True).start()
+            self._started = True
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"Job claim failed: {str(e)}", exc_info=True)
+                job = None
+            if job is None:
+                self._purge_idle()
+                # Also poll, so jobs queued by other processes get picked up
+                self._wakeup.wait(timeout=1)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _claim(self):
+        conn = self._db.get()
+        now = time.time()
+        with conn:
+            row = conn.execute(
+                "SELECT id, idea, industry, batch FROM jobs "
+                "WHERE status = ? OR (status = ? AND updated_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now - self.stale_after)
+            ).fetchone()
+            if row is None:
+                return None
+            claimed = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? "
+                "WHERE id = ? AND (status = ? OR (status = ? AND updated_at < ?))",
+                (RUNNING, now, row[0], QUEUED, RUNNING, now - self.stale_after)
+            ).rowcount
+        return row if claimed else None
+
+    def _requeue_stale(self):
+        conn = self._db.get()
+        now = time.time()
+        with conn:
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+                (QUEUED, now, RUNNING, now - self.stale_after)
+            ).rowcount
+        if requeued:
+            logger.warning(f"Requeued {requeued} jobs whose worker stopped")
+
+    def _run(self, job):
+        job_id, idea, industry, batch = job
+        partial = {}
+
+        def on_section(name, payload):
+            partial.update(payload)
+            self._update(job_id, partial=json.dumps(partial))
+
+        logger.info(f"Running job {job_id}")
+        try:
+            result = validate_idea(idea, industry, batch=None if batch is None else bool(batch),
+                                   on_section=on_section)
+            self._update(job_id, status=DONE, result=json.dumps(result), finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            self._update(job_id, status=FAILED, error=str(e), finished_at=time.time())
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        conn = self._db.get()
+        with conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _purge_idle(self):
+        # Idle workers purge at most once a minute, so expired results go
+        # even when nothing new is submitted
+        now = time.time()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + 60
+        try:
+            conn = self._db.get()
+            with conn:
+                self._purge(conn, now)
+        except Exception as e:
+            logger.error(f"Job purge failed: {str(e)}", exc_info=True)
+
+    def _purge(self, conn, now):
+        conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (now - self.result_ttl,)
+        )
+
+    def _to_dict(self, conn, row):
+        columns = [c[0] for c in conn.execute("SELECT * FROM jobs LIMIT 0").description]
+        job = dict(zip(columns, row))
+        position = None
+        if job['status'] == QUEUED:
+            position = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND created_at < ?",
+                (QUEUED, job['created_at'])
+            ).fetchone()[0]
+        return {
+            'job_id': job['id'],
+            'status': job['status'],
+            'queue_position': position,
+            'partial': json.loads(job['partial']) if job['partial'] else {},
+            'result': json.loads(job['result']) if job['result'] else None,
+            'error': job['error'],
+            'created_at': job['created_at'],
+            'finished_at': job['finished_at']
+        }
+
+
+job_queue = JobQueue(
+    Config.JOBS_DB_PATH,
+    workers=Config.JOB_WORKERS,
+    max_pending=Config.JOB_MAX_PENDING,
+    result_ttl=Config.JOB_RESULT_TTL_SECONDS,
+    stale_after=Config.VALIDATION_DEADLINE_SECONDS * 4
+)
+metrics.register_collector('jobs', job_queue.stats)
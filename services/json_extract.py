@@ -0,0 +1,205 @@
+import json
+import re
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_OPEN = re.compile(r'[{\[]')
+# An opener that can start a JSON value, so braces in prose ("{name}", "[see below]") are skipped cheaply
+_VALUE_START = re.compile(r'\{\s*["“}]|\[\s*[-\d"“{\[\]tfn]')
+_STRUCTURAL = re.compile(r'[{}\[\]",]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '„': '"', '″': '"'})
+_SMART_QUOTE_CHARS = '“”„″'
+_CLOSING = {'{': '}', '[': ']'}
+
+# Give up after this many values that parse but don't match the schema; every
+# one of them is re-scanned from inside, so this bounds the work on nested input
+MAX_CANDIDATES = 32
+
+_decoder = json.JSONDecoder()
+
+
+class JsonScanner:
+    """Finds the extent of the first JSON object or array in a text.
+
+    Understands strings and escapes, so braces inside string values don't
+    count. Text can be fed in pieces (as it streams in); ``feed`` returns
+    True once the first value is complete, and ``end`` is then the index
+    just past it. Each character is looked at once.
+    """
+
+    def __init__(self, text='', start=0):
+        self.text = text
+        self.pos = start
+        self.start = None
+        self.end = None
+        self.stack = []
+        self.in_string = False
+        # (position, open containers) at the last comma, for truncation repair
+        self.last_comma = None
+
+    def feed(self, chunk=''):
+        self.text += chunk
+        if self.end is None:
+            self._scan()
+        return self.end is not None
+
+    def _scan(self):
+        text, pos = self.text, self.pos
+        while True:
+            if self.in_string:
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    pos = len(text)
+                    break
+                if match.group() == '\\':
+                    if match.end() >= len(text):  # Escaped char not here yet
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                self.in_string = False
+                pos = match.end()
+                continue
+
+            match = (_OPEN if self.start is None else _STRUCTURAL).search(text, pos)
+            if match is None:
+                pos = len(text)
+                break
+            char, pos = match.group(), match.end()
+            if self.start is None:
+                self.start = match.start()
+                self.stack.append(char)
+            elif char == '"':
+                self.in_string = True
+            elif char == ',':
+                self.last_comma = (match.start(), list(self.stack))
+            elif char in _CLOSING:
+                self.stack.append(char)
+            else:
+                # A stray closer is tolerated; the parse will reject it
+                if self.stack and _CLOSING[self.stack[-1]] == char:
+                    self.stack.pop()
+                if not self.stack:
+                    self.end = pos
+                    break
+        self.pos = pos
+
+    def value_text(self):
+        """The complete value, or None while it is still open"""
+        if self.end is None:
+            return None
+        return self.text[self.start:self.end]
+
+    def closed_texts(self):
+        """Ways to close an open (truncated) value, most complete first.
+
+        Unless the text stops inside a string, closing the open containers
+        as they are keeps every element; otherwise, or if that doesn't
+        parse, the value is cut back to its last complete element.
+        """
+        if self.start is None:
+            return []
+        closings = []
+        if not self.in_string:
+            body = self.text[self.start:].rstrip().rstrip(',')
+            closings.append(body + ''.join(_CLOSING[c] for c in reversed(self.stack)))
+        if self.last_comma is not None:
+            cut, stack = self.last_comma
+            closings.append(self.text[self.start:cut] + ''.join(_CLOSING[c] for c in reversed(stack)))
+        return closings
+
+
+def extract_json(text, schema=None):
+    """First JSON object or array in ``text`` that matches ``schema``.
+
+    The text may wrap the value in markdown fences or prose and may contain
+    further text after it. Trailing commas, smart quotes and values cut off
+    by the output token limit are repaired. ``schema`` is an
+    ``(expected_type, required_keys)`` pair; values that don't match it are
+    skipped. Returns None when nothing usable is found.
+    """
+    if not text:
+        return None
+    # Straightened once here: translating inside every repair attempt made
+    # long answers with a smart quote quadratic
+    straightened = text.translate(_SMART_QUOTES) if any(q in text for q in _SMART_QUOTE_CHARS) else None
+    pos = 0
+    mismatches = 0
+    while mismatches < MAX_CANDIDATES:
+        match = _VALUE_START.search(text, pos)
+        if match is None:
+            return None
+        start = match.start()
+
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except (ValueError, RecursionError):
+            value, end = _repair(text, start, straightened)
+
+        if end is None:  # Truncated: nothing usable can follow
+            return value if value is not None and matches_schema(value, schema) else None
+        if value is not None and matches_schema(value, schema):
+            return value
+        if value is None:
+            # Unparseable even after repair; carry on after it
+            pos = end
+        else:
+            # A wrapper such as {"risks": [...]} may hold the real answer, so
+            # look inside a value that parsed but didn't match
+            mismatches += 1
+            pos = start + 1
+    logger.warning("Gave up looking for JSON after too many candidates")
+    return None
+
+
+def _repair(text, start, straightened=None):
+    """Scan the malformed value at ``start`` and try to fix it.
+
+    ``straightened`` is ``text`` with its smart quotes replaced, when it has
+    any. Returns ``(value or None, end)``; ``end`` is None if the value
+    never closes.
+    """
+    value, end = _repair_at(text, start)
+    if value is None and straightened is not None:
+        # Smart quotes used as delimiters throw off the string tracking
+        # itself, so rescan with them straightened (same length, same offsets)
+        value, end = _repair_at(straightened, start)
+    return value, end
+
+
+def _repair_at(text, start):
+    scanner = JsonScanner(text, start)
+    scanner.feed()
+    candidate = scanner.value_text()
+    if candidate is not None:
+        return _loads_repaired(candidate), scanner.end
+    for closed in scanner.closed_texts():
+        value = _loads_repaired(closed)
+        if value is not None:
+            return value, None
+    return None, None
+
+
+def _loads_repaired(candidate):
+    if not candidate:
+        return None
+    for attempt in (candidate, _TRAILING_COMMA.sub(r'\1', candidate)):
+        try:
+            return json.loads(attempt)
+        except (ValueError, RecursionError):
+            continue
+    return None
+
+
+def matches_schema(value, schema):
+    """Check a parsed value against an ``(expected_type, required_keys)`` pair"""
+    if schema is None:
+        return isinstance(value, (dict, list))
+    expected_type, required_keys = schema
+    if not isinstance(value, expected_type) or not value:
+        return False
+    return all(k in value for k in required_keys)
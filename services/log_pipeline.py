@@ -0,0 +1,192 @@
+"""Logging that keeps formatting and file writes off the request threads.
+
+Loggers hand records to a bounded queue; a QueueListener thread formats
+them and writes the log file (JSON lines) and the console (text). Each
+record carries the id of the request it was logged in. DEBUG records are
+sampled, and records are dropped, not waited for, when the queue is full.
+
+    configure_logging()  # once, at startup
+"""
+import atexit
+import contextvars
+import json
+import os
+import queue
+import random
+import sys
+import logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from config import Config
+from services.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+# Id of the request being handled, when there is one
+_request_id = contextvars.ContextVar('request_id', default=None)
+
+_pipeline = None
+
+
+def set_request_id(request_id):
+    """Tag records logged in this context with ``request_id``; returns a reset token"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and extras"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Copies the current request id onto the record while still on its thread"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Lets through only ``rate`` of DEBUG records; other levels always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock handler formats every record before queueing it, on the
+    logging thread. Records here are queued as they are; only the request
+    id is attached first. When the queue is full the record is dropped and
+    counted instead of blocking the caller.
+    """
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc('log_records_dropped_total')
+
+
+class LogPipeline:
+    """The queue handler installed on a logger and the listener draining it"""
+
+    def __init__(self, handlers, queue_size, sample_rate):
+        self.handlers = handlers
+        self.queue_size = queue_size
+        self.handler = DeferredQueueHandler(queue.Queue(maxsize=queue_size))
+        self.handler.addFilter(RequestIdFilter())
+        self.handler.addFilter(DebugSampler(sample_rate))
+        self.listener = None
+
+    def start(self):
+        self.listener = QueueListener(self.handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """Write out everything queued so far and stop the listener thread"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        for handler in self.handlers:
+            handler.flush()
+
+    def restart_after_fork(self):
+        # The listener thread doesn't survive fork; the child gets a fresh
+        # queue, since the parent's may have been mid-operation
+        self.handler.queue = queue.Queue(maxsize=self.queue_size)
+        self.start()
+
+
+def build_pipeline(path=None, level=None, json_lines=True, console=True, max_bytes=None, backup_count=None,
+                   queue_size=None, sample_rate=None):
+    """A started LogPipeline writing to ``path`` (and stderr with ``console``)"""
+    handlers = []
+    if path:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            path,
+            maxBytes=Config.LOG_MAX_BYTES if max_bytes is None else max_bytes,
+            backupCount=Config.LOG_BACKUP_COUNT if backup_count is None else backup_count,
+            encoding='utf-8',
+            delay=True
+        )
+        file_handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        handlers.append(console_handler)
+    for handler in handlers:
+        handler.setLevel(level or Config.LOG_LEVEL)
+
+    pipeline = LogPipeline(
+        handlers,
+        queue_size=Config.LOG_QUEUE_SIZE if queue_size is None else queue_size,
+        sample_rate=Config.LOG_DEBUG_SAMPLE_RATE if sample_rate is None else sample_rate
+    )
+    pipeline.start()
+    return pipeline
+
+
+def configure_logging():
+    """Route the root logger through the queue; safe to call more than once"""
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+    _pipeline = build_pipeline(Config.LOG_FILE, json_lines=Config.LOG_JSON)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_pipeline.handler)
+    root.setLevel(Config.LOG_LEVEL)
+    atexit.register(_pipeline.stop)
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=_pipeline.restart_after_fork)
+    return _pipeline
+
+
+metrics.describe('log_records_dropped_total', 'Log records dropped because the logging queue was full')
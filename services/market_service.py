@@ -1,12 +1,60 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config import Config
+from services.cache import ResponseCache, make_cache_key
+from services.metrics import metrics, timed
 from urllib.parse import quote
+import asyncio
+import json
+import os
+import re
+import threading
 import time
 import logging
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Identical searches are answered from here by every worker
+search_cache = ResponseCache(
+    Config.SERPAPI_CACHE_PATH,
+    ttl_seconds=Config.SERPAPI_CACHE_TTL_SECONDS,
+    max_bytes=Config.SERPAPI_CACHE_MAX_MB * 1024 * 1024
+)
+metrics.register_collector('serpapi_cache', search_cache.stats)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Keep-alive session with a connection pool, created once per process"""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            retries = Retry(
+                total=2,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET'])
+            )
+            adapter = HTTPAdapter(
+                pool_connections=2,
+                pool_maxsize=Config.SERPAPI_POOL_SIZE,
+                max_retries=retries
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session, _session_pid = session, os.getpid()
+        return _session
+
+def normalize_query(idea, industry=None):
+    """Case, punctuation and whitespace-insensitive form of a search"""
+    text = f"{idea} {industry or ''}".lower()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text).split())
+
 def find_competitors(idea, industry=None):
     try:
         query = f"{idea} {industry or ''} startup competitor OR alternative OR similar"
@@ -17,12 +65,18 @@ def find_competitors(idea, industry=None):
             'hl': 'en',
             'gl': 'us'
         }
+
+        cache_key = make_cache_key('serpapi', normalize_query(idea, industry), params['num'], params['hl'], params['gl'])
+        cached = search_cache.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
         
-        response = requests.get(
-            'https://serpapi.com/search',
-            params=params,
-            timeout=15  # Increased timeout
-        )
+        with timed('serpapi'):
+            response = get_session().get(
+                Config.SERPAPI_URL,
+                params=params,
+                timeout=(3.05, 12)  # Connect, read
+            )
         response.raise_for_status()
         
         competitors = []
@@ -38,14 +92,23 @@ def find_competitors(idea, industry=None):
                 })
                 seen_urls.add(url)
         
+        search_cache.set(cache_key, json.dumps(competitors))
         return competitors
         
     except Exception as e:
         logger.error(f"Market Service Error: {str(e)}", exc_info=True)
-        return [
-            {"name": "Example Competitor 1", "url": "https://example.com", "snippet": "Sample competitor description"},
-            {"name": "Example Competitor 2", "url": "https://example.com", "snippet": "Sample competitor description"}
-        ]
+        metrics.inc('serpapi_errors_total')
+        return competitors_fallback()
+
+async def find_competitors_async(idea, industry=None):
+    """find_competitors for asyncio callers; runs on the default executor"""
+    return await asyncio.to_thread(find_competitors, idea, industry)
+
+def competitors_fallback():
+    return [
+        {"name": "Example Competitor 1", "url": "https://example.com", "snippet": "Sample competitor description"},
+        {"name": "Example Competitor 2", "url": "https://example.com", "snippet": "Sample competitor description"}
+    ]
 
 def clean_name(name):
     if not name:
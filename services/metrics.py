@@ -0,0 +1,198 @@
+import contextvars
+import functools
+import re
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds; validations span milliseconds (cache hits) to a minute (deadline)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 120)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+# Stage timings of the request being handled, when a breakdown was asked for
+_trace = contextvars.ContextVar('metrics_trace', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the shape Prometheus expects"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+
+
+class Metrics:
+    """In-process counters and histograms rendered in Prometheus text format.
+
+    Values are per worker process; Prometheus sums them across scrape
+    targets. Components that already keep their own stats register a
+    collector instead, which is read at scrape time and exported as gauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+        self._collectors = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def register_collector(self, prefix, collect):
+        """Export ``collect()``'s dict as ``<prefix>_<key>`` gauges on every scrape"""
+        self._collectors[prefix] = collect
+
+    def render(self):
+        """All metrics in Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: (h.buckets, list(h.counts), h.sum) for key, h in self._histograms.items()}
+
+        lines = []
+        for name, samples in _group(counters).items():
+            self._header(lines, name, 'counter')
+            for labels, value in samples:
+                lines.append(f"{name}{_format(labels)} {_number(value)}")
+
+        for name, samples in _group(histograms).items():
+            self._header(lines, name, 'histogram')
+            for labels, (buckets, counts, total) in samples:
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else _number(bound)
+                    lines.append(f"{name}_bucket{_format(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_format(labels)} {cumulative}")
+
+        for prefix, collect in list(self._collectors.items()):
+            try:
+                stats = collect() or {}
+            except Exception as e:
+                logger.error(f"Metrics collector '{prefix}' failed: {str(e)}")
+                continue
+            for key, value in stats.items():
+                name = _sanitize(f"{prefix}_{key}")
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, str):
+                    # Exported as an info-style gauge, e.g. breaker_state{state="open"} 1
+                    self._header(lines, name, 'gauge')
+                    lines.append(f"{name}{_format((('state', value),))} 1")
+                elif isinstance(value, (int, float)):
+                    self._header(lines, name, 'gauge')
+                    lines.append(f"{name} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, name, kind):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+@contextmanager
+def timed(stage):
+    """Time a block (or, as a decorator, a call) as one pipeline stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def record_stage(stage, seconds):
+    """Record a stage duration measured elsewhere"""
+    metrics.observe('validator_stage_seconds', seconds, stage=stage)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+def start_trace():
+    """Collect a per-stage breakdown for the rest of this request"""
+    return _trace.set([])
+
+
+def finish_trace(token):
+    """Stop collecting and return ``{stage: {count, total_ms, max_ms}}``"""
+    breakdown = trace_breakdown()
+    _trace.reset(token)
+    return breakdown
+
+
+def trace_breakdown():
+    """The breakdown collected so far in this request, without stopping"""
+    trace = _trace.get() or []
+    breakdown = {}
+    for stage, seconds in list(trace):
+        entry = breakdown.setdefault(stage, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        entry['count'] += 1
+        entry['total_ms'] += seconds * 1000
+        entry['max_ms'] = max(entry['max_ms'], seconds * 1000)
+    for entry in breakdown.values():
+        entry['total_ms'] = round(entry['total_ms'], 2)
+        entry['max_ms'] = round(entry['max_ms'], 2)
+    return breakdown
+
+
+def in_context(fn):
+    """Bind ``fn`` to a copy of the current context, for running on another thread"""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _group(samples):
+    grouped = {}
+    for (name, labels), value in sorted(samples.items()):
+        grouped.setdefault(name, []).append((labels, value))
+    return grouped
+
+
+def _format(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _sanitize(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+metrics = Metrics()
+metrics.describe('validator_stage_seconds', 'Time spent in each validation pipeline stage')
@@ -17,7 +17,7 @@ class PDF(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
 
-def generate_pdf_report(data, output_dir='static/reports'):
+def generate_pdf_report(data, output_dir='static/reports', filename=None):
     try:
         # Ensure output directory exists
         os.makedirs(output_dir, exist_ok=True)
@@ -67,7 +67,7 @@ def generate_pdf_report(data, output_dir='static/reports'):
             pdf.ln(2)
         
         # Save file
-        filename = f"validation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        filename = filename or f"validation_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
         filepath = os.path.join(output_dir, filename)
         pdf.output(filepath)
         
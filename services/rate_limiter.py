@@ -0,0 +1,166 @@
+import asyncio
+import os
+import struct
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows - fall back to a per-process limiter
+    fcntl = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# requests available, tokens available, last refill time, callers waiting
+_STATE = struct.Struct('<dddq')
+
+
+class RateLimiter:
+    """Token bucket with requests-per-minute and tokens-per-minute budgets.
+
+    When a state file is given the buckets live in that file and are guarded
+    with ``flock``, so every worker process on the host draws from one quota.
+    Callers only sleep when a bucket is actually empty.
+    """
+
+    def __init__(self, rpm, tpm, state_file=None):
+        self.rpm = max(1, rpm)
+        self.tpm = max(1, tpm)
+        self.state_file = state_file if fcntl else None
+        self._lock = threading.Lock()
+        self._fd = None
+        self._pid = None
+        self._memory_state = [float(self.rpm), float(self.tpm), time.time(), 0]
+        self._stats = {'acquired': 0, 'waited': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+
+    def acquire(self, tokens=0):
+        """Block until one request and ``tokens`` tokens are available.
+
+        Returns the number of seconds spent waiting.
+        """
+        tokens = min(max(0, tokens), self.tpm)
+        start = time.time()
+        queued = False
+        try:
+            while True:
+                granted, delay, queued = self._attempt(tokens, queued)
+                if granted:
+                    break
+                time.sleep(delay)
+        finally:
+            self._leave_queue(queued)
+        return self._record_wait(time.time() - start)
+
+    async def acquire_async(self, tokens=0):
+        """acquire() for event-loop callers; waits without blocking the loop"""
+        tokens = min(max(0, tokens), self.tpm)
+        start = time.time()
+        queued = False
+        try:
+            while True:
+                granted, delay, queued = self._attempt(tokens, queued)
+                if granted:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            self._leave_queue(queued)
+        return self._record_wait(time.time() - start)
+
+    def _attempt(self, tokens, queued):
+        """Take from the buckets if possible; returns (granted, delay, queued)"""
+        with self._state() as state:
+            self._refill(state)
+            if state[0] >= 1 and state[1] >= tokens:
+                state[0] -= 1
+                state[1] -= tokens
+                if queued:
+                    state[3] = max(0, state[3] - 1)
+                return True, 0, False
+            if not queued:
+                state[3] += 1
+            delay = max(
+                (1 - state[0]) * 60.0 / self.rpm,
+                (tokens - state[1]) * 60.0 / self.tpm
+            )
+            return False, min(max(delay, 0.01), 1.0), True
+
+    def _leave_queue(self, queued):
+        if queued:
+            with self._state() as state:
+                state[3] = max(0, state[3] - 1)
+
+    def _record_wait(self, waited):
+        with self._lock:
+            self._stats['acquired'] += 1
+            if waited > 0.01:
+                self._stats['waited'] += 1
+                self._stats['wait_seconds'] += waited
+                self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+        if waited > 1:
+            logger.info(f"Rate limiter held call for {waited:.2f}s")
+        return waited
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once the real usage of a call is known"""
+        if actual_tokens is None:
+            return
+        with self._state() as state:
+            state[1] = min(self.tpm, state[1] + estimated_tokens - actual_tokens)
+
+    def stats(self):
+        """Counters for this process plus the shared queue depth"""
+        with self._state() as state:
+            self._refill(state)
+            shared = {
+                'queue_depth': state[3],
+                'requests_available': round(state[0], 2),
+                'tokens_available': round(state[1], 2)
+            }
+        with self._lock:
+            return {**self._stats, **shared}
+
+    def _refill(self, state):
+        now = time.time()
+        elapsed = max(0.0, now - state[2])
+        state[0] = min(self.rpm, state[0] + elapsed * self.rpm / 60.0)
+        state[1] = min(self.tpm, state[1] + elapsed * self.tpm / 60.0)
+        state[2] = now
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            if not self.state_file:
+                yield self._memory_state
+                return
+
+            fd = self._open()
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                raw = os.pread(fd, _STATE.size, 0)
+                if len(raw) == _STATE.size:
+                    state = list(_STATE.unpack(raw))
+                else:
+                    state = [float(self.rpm), float(self.tpm), time.time(), 0]
+                yield state
+                os.pwrite(fd, _STATE.pack(*state), 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _open(self):
+        # flock is tied to the open file description, so a forked worker
+        # must open its own descriptor rather than reuse the parent's.
+        if self._fd is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.state_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+
+def estimate_tokens(text):
+    """Rough token count used when the API doesn't report usage (~4 chars/token)"""
+    return max(1, len(text or '') // 4)
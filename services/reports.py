@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from services.metrics import metrics, timed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ANALYSIS_ID = re.compile(r'^[0-9a-f]{64}$')
+
+# Don't rewrite access times on every download; LRU order only needs to be approximate
+_TOUCH_INTERVAL = 60
+# Leftover temp files older than this belong to a crashed writer
+_TEMP_MAX_AGE = 3600
+
+
+class ReportStore:
+    """Content-addressed files for each analysis: ``<id>.json`` and ``<id>.pdf``.
+
+    Files are written to a temp file and renamed into place, so readers never
+    see a partial report and concurrent writers of the same id are harmless.
+    Reports unused for ``max_age`` seconds are removed, and once the
+    directory exceeds ``max_bytes`` the least recently downloaded reports are
+    evicted until it is back under 90% of the quota.
+    """
+
+    def __init__(self, directory, max_bytes, max_age, sweep_interval=300):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._bytes = None  # Estimate for this process; corrected on every sweep
+        self._last_sweep = 0.0
+        self._stats = {'writes': 0, 'evicted': 0, 'expired': 0}
+
+    def path(self, analysis_id, extension):
+        return os.path.join(self.directory, f"{analysis_id}.{extension}")
+
+    def exists(self, analysis_id, extension):
+        return os.path.exists(self.path(analysis_id, extension))
+
+    def touch(self, analysis_id):
+        """Mark a report as used; its mtime (Last-Modified) is left alone"""
+        now = time.time()
+        for extension in ('json', 'pdf'):
+            path = self.path(analysis_id, extension)
+            try:
+                st = os.stat(path)
+                if now - st.st_atime > _TOUCH_INTERVAL:
+                    os.utime(path, (now, st.st_mtime))
+            except OSError:
+                pass
+
+    def write(self, analysis_id, extension, write_to):
+        """Create a file atomically; ``write_to(temp_path)`` fills it in"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{analysis_id[:16]}.", suffix='.tmp')
+        os.close(fd)
+        try:
+            write_to(temp_path)
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, self.path(analysis_id, extension))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._stats['writes'] += 1
+            if self._bytes is not None:
+                self._bytes += size
+        self._maybe_sweep()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+    def _maybe_sweep(self):
+        now = time.time()
+        with self._lock:
+            over_quota = self._bytes is None or self._bytes > self.max_bytes
+            if not over_quota and now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        try:
+            self.sweep()
+        except OSError as e:
+            logger.error(f"Report sweep failed: {str(e)}")
+
+    def sweep(self):
+        """Remove expired reports, then evict LRU reports while over quota"""
+        now = time.time()
+        reports = {}  # id -> [last used, bytes, paths]
+        for entry in os.scandir(self.directory):
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.name.startswith('.'):
+                if entry.name.endswith('.tmp') and now - st.st_mtime > _TEMP_MAX_AGE:
+                    _remove(entry.path)
+                continue
+            analysis_id = entry.name.split('.', 1)[0]
+            report = reports.setdefault(analysis_id, [0.0, 0, []])
+            report[0] = max(report[0], st.st_atime, st.st_mtime)
+            report[1] += st.st_size
+            report[2].append(entry.path)
+
+        total = sum(report[1] for report in reports.values())
+        target = self.max_bytes * 0.9 if total > self.max_bytes else self.max_bytes
+        expired = evicted = 0
+        for used, size, paths in sorted(reports.values(), key=lambda report: report[0]):
+            if now - used > self.max_age:
+                expired += 1
+            elif total > target:
+                evicted += 1
+            else:
+                continue
+            for path in paths:
+                _remove(path)
+            total -= size
+
+        with self._lock:
+            self._bytes = total
+            self._stats['expired'] += expired
+            self._stats['evicted'] += evicted
+        if expired or evicted:
+            logger.info(f"Report sweep removed {expired} expired and {evicted} evicted reports")
+
+
+class ReportRenderer:
+    """Renders PDF reports on first download instead of on every validation.
+
+    ``save`` stores the report data under its content hash (the analysis id)
+    and is cheap enough for the request path. ``get`` renders the PDF on a
+    small background pool the first time it is asked for and afterwards
+    returns the file already on disk. Concurrent requests for the same
+    report share one render. Reports removed by the sweep are rebuilt from
+    the analysis history.
+    """
+
+    def __init__(self, store, workers=2):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='report')
+        self._rendering = {}
+        self._lock = threading.Lock()
+
+    def save(self, report_data):
+        """Store the data a report is rendered from; returns its analysis id"""
+        body = _dump(report_data)
+        analysis_id = hashlib.sha256(body.encode('utf-8')).hexdigest()
+        if self.store.exists(analysis_id, 'json'):
+            self.store.touch(analysis_id)
+            return analysis_id
+        try:
+            self.store.write(analysis_id, 'json', lambda path: _write_text(path, body))
+        except OSError as e:
+            logger.error(f"Could not store report data: {str(e)}", exc_info=True)
+        return analysis_id
+
+    def get(self, analysis_id, timeout=None):
+        """Path of the rendered PDF, or None if the analysis is unknown.
+
+        Raises concurrent.futures.TimeoutError if rendering takes longer
+        than ``timeout`` seconds; the render carries on in the background.
+        """
+        if not ANALYSIS_ID.match(analysis_id or ''):
+            return None
+        if self.store.exists(analysis_id, 'pdf'):
+            self.store.touch(analysis_id)
+            return self.store.path(analysis_id, 'pdf')
+        if not self.store.exists(analysis_id, 'json') and not self._restore(analysis_id):
+            return None
+
+        with self._lock:
+            future = self._rendering.get(analysis_id)
+            started = future is None
+            if started:
+                future = self._executor.submit(self._render, analysis_id)
+                self._rendering[analysis_id] = future
+        if started:
+            # Outside the lock: the callback runs inline if the render already finished
+            future.add_done_callback(lambda _: self._done(analysis_id))
+        return future.result(timeout)
+
+    def _restore(self, analysis_id):
+        # The sweep removed the report files, but the analysis may still be
+        # in the history: rebuild its data under the same id
+        from services.history import analysis_history
+        try:
+            stored = analysis_history.load(analysis_id)
+        except Exception as e:
+            logger.error(f"Could not look up analysis {analysis_id[:12]}: {str(e)}")
+            return False
+        if stored is None:
+            return False
+        body = _dump(report_data(stored['idea'], stored['industry'], stored['result']))
+        try:
+            self.store.write(analysis_id, 'json', lambda path: _write_text(path, body))
+        except OSError as e:
+            logger.error(f"Could not restore report data: {str(e)}", exc_info=True)
+            return False
+        logger.info(f"Restored report data {analysis_id[:12]} from the history")
+        return True
+
+    def _render(self, analysis_id):
+        from services.pdf_service import generate_pdf_report  # Loads fpdf on the first render
+        pdf_path = self.store.path(analysis_id, 'pdf')
+        if os.path.exists(pdf_path):  # Rendered by another process meanwhile
+            return pdf_path
+        with open(self.store.path(analysis_id, 'json'), encoding='utf-8') as f:
+            report_data = json.load(f)
+        logger.info(f"Rendering PDF report {analysis_id[:12]}")
+
+        def render_to(temp_path):
+            directory, filename = os.path.split(temp_path)
+            with timed('pdf_render'):
+                rendered = generate_pdf_report(report_data, directory, filename)
+            if not rendered:
+                raise RuntimeError(f"PDF rendering failed for {analysis_id}")
+
+        self.store.write(analysis_id, 'pdf', render_to)
+        return pdf_path
+
+    def _done(self, analysis_id):
+        with self._lock:
+            self._rendering.pop(analysis_id, None)
+
+
+def report_data(idea, industry, result):
+    """The data a report is rendered from, taken from a validation result"""
+    return {
+        'idea': idea,
+        'industry': industry,
+        'analysis': {
+            'feasibility_score': result.get('feasibility_score'),
+            'swot_analysis': result.get('swot_analysis'),
+            'competitors': result.get('competitors'),
+            'monetization_paths': result.get('monetization_paths', []),
+            'improvements': result.get('improvements', [])
+        }
+    }
+
+
+def _dump(report_data):
+    return json.dumps(report_data, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def _write_text(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+report_store = ReportStore(
+    Config.REPORTS_DIR,
+    max_bytes=Config.REPORTS_MAX_MB * 1024 * 1024,
+    max_age=Config.REPORTS_MAX_AGE_DAYS * 24 * 3600
+)
+report_renderer = ReportRenderer(report_store, workers=Config.REPORT_WORKERS)
+metrics.register_collector('report_store', report_store.stats)
@@ -0,0 +1,260 @@
+import re
+import threading
+import zlib
+from array import array
+import logging
+
+import numpy as np
+
+from config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have i i'm in into is it its my of on or our so that the their
+them they this to we will with want wanna plan planning idea startup business company new
+start starting launch launching build building create creating
+""".split())
+
+# Words for the same kind of business, after stemming; "shoe store" and
+# "shoe shop" are one idea
+_SYNONYMS = {
+    'store': 'shop', 'boutique': 'shop', 'outlet': 'shop',
+    'application': 'app', 'website': 'site', 'webshop': 'shop'
+}
+
+_WORD_WEIGHT = 1.0
+_BIGRAM_WEIGHT = 0.5
+_TRIGRAM_WEIGHT = 0.3
+_HASH_BITS = 20
+
+
+def _stem(word):
+    # Crude suffix stripping so "starting"/"start" and "shoes"/"shoe" collide
+    for suffix in ('ing', 'ed', 's'):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return _SYNONYMS.get(word, word)
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode('utf-8')) & ((1 << _HASH_BITS) - 1)
+
+
+def embed(idea):
+    """Hash an idea description into a sparse, L2-normalised term vector.
+
+    Returns ``(buckets, weights)`` as int32/float32 arrays. Word stems carry
+    most of the weight; pairs of neighbouring stems are far rarer than single
+    words, which is what lets the index find one idea among many built from
+    the same vocabulary. Character trigrams make the vector tolerant of typos.
+    """
+    features = {}
+
+    def add(feature, weight):
+        bucket = _bucket(feature)
+        features[bucket] = features.get(bucket, 0.0) + weight
+
+    previous = None
+    for word in re.findall(r"[a-z0-9']+", (idea or '').lower()):
+        if word in _STOPWORDS:
+            continue
+        stem = _stem(word)
+        add(f"w:{stem}", _WORD_WEIGHT)
+        if previous:
+            add(f"b:{previous} {stem}", _BIGRAM_WEIGHT)
+        previous = stem
+        padded = f" {stem} "
+        for i in range(len(padded) - 2):
+            add(f"c:{padded[i:i + 3]}", _TRIGRAM_WEIGHT)
+
+    if not features:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+    buckets = np.fromiter(features.keys(), dtype=np.int32, count=len(features))
+    weights = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+    weights /= np.linalg.norm(weights)
+    return buckets, weights
+
+
+class SemanticIndex:
+    """Inverted index over hashed idea vectors with cosine-similarity lookup.
+
+    Candidates are gathered from the query's rarest features only (common
+    features have long posting lists but say little about identity), then the
+    best few are rescored exactly against their stored vectors. Postings and
+    vectors are packed ``array`` buffers read through NumPy views. Each
+    entry belongs to an integer ``group`` that searches can be limited to.
+    Once ``capacity`` is exceeded the oldest entries are dropped.
+    """
+
+    # Posting entries scanned per query and candidates rescored exactly
+    candidate_budget = 4096
+    rescore_top = 32
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._postings = {}
+        self._payloads = []
+        self._start = 0  # Ids below this have been evicted
+        # Every stored vector, CSR style: document i spans offsets[i]:offsets[i + 1]
+        self._buckets = array('i')
+        self._weights = array('f')
+        self._offsets = array('q', [0])
+        self._groups = array('q')
+
+    def __len__(self):
+        return len(self._payloads) - self._start
+
+    def add(self, buckets, weights, payload, group=0):
+        with self._lock:
+            doc_id = len(self._payloads)
+            self._payloads.append(payload)
+            self._groups.append(group)
+            order = np.argsort(buckets)
+            self._buckets.extend(buckets[order].tolist())
+            self._weights.extend(weights[order].tolist())
+            self._offsets.append(len(self._buckets))
+            for bucket in buckets.tolist():
+                posting = self._postings.get(bucket)
+                if posting is None:
+                    posting = self._postings[bucket] = array('i')
+                posting.append(doc_id)
+
+            if len(self) > self.capacity:
+                self._payloads[self._start] = None
+                self._start += 1
+                if self._start >= max(1, self.capacity // 2):
+                    self._compact()
+
+    def search(self, buckets, weights, group=None):
+        """Return ``(score, payload)`` for the most similar entry, or None"""
+        with self._lock:
+            postings = []
+            for bucket, weight in zip(buckets.tolist(), weights.tolist()):
+                posting = self._postings.get(bucket)
+                if posting is not None:
+                    postings.append((len(posting), posting, weight))
+            if not postings:
+                return None
+            postings.sort(key=lambda entry: entry[0])
+
+            # Stage 1: approximate scores from the rarest features
+            ids, scores, scanned = [], [], 0
+            for length, posting, weight in postings:
+                if scanned and scanned + length > self.candidate_budget:
+                    break
+                ids.append(np.frombuffer(posting, dtype=np.int32))
+                scores.append(np.full(length, weight, dtype=np.float32))
+                scanned += length
+            ids = np.concatenate(ids)
+            candidates, inverse = np.unique(ids, return_inverse=True)
+            partial = np.bincount(inverse, weights=np.concatenate(scores))
+            # Evicted documents stay in the postings until the next compaction
+            live = candidates >= self._start
+            if group is not None:
+                live &= np.frombuffer(self._groups, dtype=np.int64)[candidates] == group
+            candidates, partial = candidates[live], partial[live]
+            if not len(candidates):
+                return None
+            if len(candidates) > self.rescore_top:
+                top = np.argpartition(partial, -self.rescore_top)[-self.rescore_top:]
+                candidates = candidates[top]
+
+            # Stage 2: exact cosine similarity for the shortlisted documents
+            offsets = np.frombuffer(self._offsets, dtype=np.int64)
+            starts, ends = offsets[candidates], offsets[candidates + 1]
+            spans = [np.arange(a, b) for a, b in zip(starts.tolist(), ends.tolist())]
+            positions = np.concatenate(spans)
+            owner = np.repeat(np.arange(len(candidates)), ends - starts)
+            doc_buckets = np.frombuffer(self._buckets, dtype=np.int32)[positions]
+            doc_weights = np.frombuffer(self._weights, dtype=np.float32)[positions]
+
+            order = np.argsort(buckets)
+            query_buckets, query_weights = buckets[order], weights[order]
+            slot = np.minimum(np.searchsorted(query_buckets, doc_buckets), len(query_buckets) - 1)
+            hit = query_buckets[slot] == doc_buckets
+            exact = np.bincount(owner[hit], weights=doc_weights[hit] * query_weights[slot[hit]],
+                                minlength=len(candidates))
+
+            best = int(exact.argmax())
+            if exact[best] <= 0:
+                return None
+            return float(exact[best]), self._payloads[int(candidates[best])]
+
+    def _compact(self):
+        # Renumber live documents from zero and drop evicted ones
+        start = self._start
+        for bucket in list(self._postings):
+            kept = [doc_id - start for doc_id in self._postings[bucket] if doc_id >= start]
+            if kept:
+                self._postings[bucket] = array('i', kept)
+            else:
+                del self._postings[bucket]
+        base = self._offsets[start]
+        self._buckets = self._buckets[base:]
+        self._weights = self._weights[base:]
+        self._offsets = array('q', (offset - base for offset in self._offsets[start:]))
+        self._payloads = self._payloads[start:]
+        self._groups = self._groups[start:]
+        self._start = 0
+
+
+# Past validation results. One index for every industry keeps memory bounded
+# by SEMANTIC_CACHE_CAPACITY however many industries users type; searches are
+# limited to the query's industry, so an analysis is never reused across them
+_index = SemanticIndex(Config.SEMANTIC_CACHE_CAPACITY)
+
+
+def _industry_key(industry):
+    key = ' '.join((industry or '').lower().split())
+    return key, zlib.crc32(key.encode('utf-8'))
+
+
+def similarity(idea, other):
+    """Cosine similarity of two idea descriptions, from 0 to 1"""
+    buckets, weights = embed(idea)
+    other_buckets, other_weights = embed(other)
+    if not len(buckets) or not len(other_buckets):
+        return 0.0
+    _, i, j = np.intersect1d(buckets, other_buckets, assume_unique=True, return_indices=True)
+    return float(np.dot(weights[i], other_weights[j]))
+
+
+def key_terms(idea):
+    """Stemmed words of an idea, without stopwords, synonyms merged"""
+    return {_stem(word) for word in re.findall(r"[a-z0-9']+", (idea or '').lower()) if word not in _STOPWORDS}
+
+
+def same_terms(idea, other):
+    """True when two descriptions name the same things, only worded differently.
+
+    Similarity alone can't tell "coffee" from "tea" or a city from another:
+    one swapped word in a long description still scores above 0.9.
+    """
+    return key_terms(idea) == key_terms(other)
+
+
+def find_similar(idea, industry=None):
+    """Return ``(similarity, idea, result)`` for the closest past analysis, or None"""
+    buckets, weights = embed(idea)
+    if not len(buckets):
+        return None
+    key, group = _industry_key(industry)
+    match = _index.search(buckets, weights, group)
+    if match is None:
+        return None
+    score, payload = match
+    if payload is None or payload['industry'] != key:  # Evicted, or a hash collision
+        return None
+    return score, payload['idea'], payload['result']
+
+
+def remember(idea, industry, result):
+    """Add a finished analysis to the index"""
+    buckets, weights = embed(idea)
+    if len(buckets):
+        key, group = _industry_key(industry)
+        _index.add(buckets, weights, {'idea': idea, 'industry': key, 'result': result}, group)
@@ -0,0 +1,132 @@
+"""Token accounting and adaptive output caps for Gemini calls.
+
+Every call's prompt and output tokens are counted per section in the
+metrics and, while a validation is being tracked, in that validation's
+TokenUsage. The counts are estimated from text length (about four
+characters a token), since google-generativeai 0.3.2 doesn't report
+usage; they track trends and compare sections, not billing.
+
+OutputCaps sets each section's ``max_output_tokens`` from the answer
+sizes the section actually produces.
+"""
+import contextvars
+import math
+import threading
+import logging
+from collections import deque
+from services.metrics import metrics, TOKEN_BUCKETS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Caps are rounded up to this, so a section only ever uses a few model configs
+CAP_STEP = 64
+
+# Token usage of the validation being handled, when one is being tracked
+_usage = contextvars.ContextVar('token_usage', default=None)
+
+
+class TokenUsage:
+    """Prompt and output tokens spent by one validation, per section"""
+
+    def __init__(self):
+        self.sections = {}
+        self._lock = threading.Lock()
+
+    def add(self, section, prompt_tokens, output_tokens):
+        with self._lock:
+            entry = self.sections.setdefault(section, {'calls': 0, 'prompt_tokens': 0, 'output_tokens': 0})
+            entry['calls'] += 1
+            entry['prompt_tokens'] += prompt_tokens
+            entry['output_tokens'] += output_tokens
+
+    def summary(self):
+        with self._lock:
+            sections = {key: dict(entry) for key, entry in self.sections.items()}
+        prompt_tokens = sum(entry['prompt_tokens'] for entry in sections.values())
+        output_tokens = sum(entry['output_tokens'] for entry in sections.values())
+        return {
+            'calls': sum(entry['calls'] for entry in sections.values()),
+            'prompt_tokens': prompt_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': prompt_tokens + output_tokens,
+            'estimated': True,
+            'sections': sections
+        }
+
+
+def start_usage():
+    """Count tokens for the rest of this validation; pass the result to finish_usage"""
+    return _usage.set(TokenUsage())
+
+
+def finish_usage(token):
+    """Stop counting and return the validation's usage summary"""
+    usage = _usage.get()
+    _usage.reset(token)
+    summary = usage.summary() if usage is not None else TokenUsage().summary()
+    if summary['calls']:
+        for kind in ('prompt', 'output'):
+            metrics.observe('validation_tokens', summary[f"{kind}_tokens"], buckets=TOKEN_BUCKETS, kind=kind)
+    return summary
+
+
+def record_tokens(section, prompt_tokens, output_tokens):
+    """Count one call's tokens against its section and the current validation"""
+    section = section or 'default'
+    metrics.inc('gemini_section_tokens_total', prompt_tokens, section=section, kind='prompt')
+    metrics.inc('gemini_section_tokens_total', output_tokens, section=section, kind='output')
+    usage = _usage.get()
+    if usage is not None:
+        usage.add(section, prompt_tokens, output_tokens)
+
+
+class OutputCaps:
+    """``max_output_tokens`` per section, from the answer sizes it produces.
+
+    Until a section has ``min_samples`` answers it gets the ceiling its
+    caller asked for. After that its cap is the ``percentile`` answer size
+    times ``headroom``, between ``floor`` and the ceiling. An answer that
+    ran into its cap counts as ceiling-sized, so a section whose answers
+    grow gets its room back quickly.
+    """
+
+    def __init__(self, percentile=0.99, headroom=1.5, floor=128, min_samples=20, window=200):
+        self.percentile = percentile
+        self.headroom = headroom
+        self.floor = floor
+        self.min_samples = min_samples
+        self.window = window
+        self.enabled = True
+        self._samples = {}
+        self._caps = {}
+        self._lock = threading.Lock()
+
+    def cap(self, section, ceiling):
+        """Output cap for the next call of ``section``, at most ``ceiling``"""
+        key = section or 'default'
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        cap = ceiling
+        if self.enabled and len(samples) >= max(1, self.min_samples):
+            size = samples[min(len(samples) - 1, int(len(samples) * self.percentile))]
+            cap = math.ceil(size * self.headroom / CAP_STEP) * CAP_STEP
+            cap = min(ceiling, max(self.floor, cap))
+        with self._lock:
+            self._caps[key] = (cap, ceiling)
+        return cap
+
+    def observe(self, section, output_tokens, truncated=False):
+        """Record an answer's size; a truncated one counts as the ceiling"""
+        key = section or 'default'
+        with self._lock:
+            if truncated and key in self._caps:
+                output_tokens = max(output_tokens, self._caps[key][1])
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(output_tokens)
+
+    def stats(self):
+        with self._lock:
+            return {f"{key}_max_output_tokens": cap for key, (cap, _) in self._caps.items()}
@@ -1,6 +1,16 @@
-from services.ai_service import generate_ai_response, extract_json_from_response, get_cached_response
-from services.market_service import find_competitors
-from services.pdf_service import generate_pdf_report
+from services.ai_service import extract_json_from_response, get_cached_response, ai_policy, model_for, MAX_OUTPUT_TOKENS
+from services.call_policy import RetryBudget
+from services.metrics import metrics, timed, in_context
+from services.json_extract import matches_schema
+from services.market_service import find_competitors, competitors_fallback, normalize_query
+from services.reports import report_renderer, report_data
+from services.history import analysis_history
+from services.token_budget import start_usage, finish_usage
+from services import semantic_cache
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import Config
+import copy
+import hashlib
 import json
 import re
 from datetime import datetime
@@ -9,13 +19,78 @@ import logging
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def validate_idea(idea, industry=None):
-    """Validate a startup idea with comprehensive analysis"""
+# Sections the SWOT prompt is built from
+SWOT_INPUTS = ('risks', 'improvements', 'monetization')
+
+# Where each section lands in the final result
+RESULT_KEYS = {
+    'risks': 'risks',
+    'improvements': 'improvements',
+    'monetization': 'monetization_paths',
+    'investment': 'investment_needed',
+    'canvas': 'business_model_canvas',
+    'market_size': 'market_size',
+    'target_audience': 'target_audience',
+    'competitors': 'competitors',
+    'swot': 'swot_analysis'
+}
+
+# Sections that describe the market rather than the exact idea wording, so a
+# near-duplicate idea can reuse them. Competitors are not among them: they
+# are search results for the other idea's own query
+REUSABLE_SECTIONS = ('investment', 'market_size', 'target_audience')
+
+# Shape every section must have to be accepted: (type, required keys)
+SECTION_SCHEMAS = {
+    'feasibility': (dict, ('score', 'explanation')),
+    'risks': (list, ()),
+    'improvements': (list, ()),
+    'monetization': (list, ()),
+    'investment': (dict, ('amount', 'level', 'break_even')),
+    'canvas': (dict, ('value_propositions', 'customer_segments', 'revenue_streams')),
+    'market_size': (dict, ('tam', 'sam', 'som')),
+    'target_audience': (dict, ('primary_segments',)),
+    'swot': (dict, ('strengths', 'weaknesses', 'opportunities', 'threats'))
+}
+
+# Shared by every validation, so AI_MAX_CONCURRENCY bounds the section calls
+# in flight across the process, not per request
+_executor = ThreadPoolExecutor(max_workers=max(1, Config.AI_MAX_CONCURRENCY), thread_name_prefix='validate')
+
+@timed('validate_idea')
+def validate_idea(idea, industry=None, batch=None, on_section=None, previous_analysis_id=None):
+    """Validate a startup idea with comprehensive analysis
+
+    With ``batch`` (default ``Config.AI_BATCH_MODE``) every section is asked
+    for in a single combined prompt; sections missing from that answer are
+    requested individually. ``on_section(name, payload)`` is called with the
+    result fields of each section as soon as it is ready, then with ``'pdf'``.
+    With ``previous_analysis_id`` the idea is treated as an edit of that
+    analysis and only the sections whose inputs changed are regenerated.
+    The result's ``token_usage`` estimates the tokens its model calls spent.
+    """
+    usage_token = None
     try:
         # Validate input
         if not idea or len(idea.strip()) < 20:
             raise ValueError("Idea description must be at least 20 characters long")
-            
+
+        # The same idea was analysed recently: serve it from the history,
+        # unless the caller asked for a particular prompt mode or an edit.
+        # Analyses with fallback sections are redone, as they may succeed now
+        if Config.HISTORY_REUSE_SECONDS > 0 and batch is None and not previous_analysis_id:
+            stored = analysis_history.latest(idea, industry, max_age=Config.HISTORY_REUSE_SECONDS)
+            if stored and not fallback_sections(stored):
+                logger.info(f"Serving analysis {stored.get('analysis_id', '')[:12]} from history")
+                metrics.inc('analysis_history_hits_total')
+                for key in ['feasibility'] + list(RESULT_KEYS):
+                    notify(on_section, key, section_payload(key, previous_section(stored, key)))
+                notify(on_section, 'pdf', {'analysis_id': stored.get('analysis_id'),
+                                           'pdf_report_url': stored.get('pdf_report_url')})
+                return stored
+
+        usage_token = start_usage()
+
         # Generate AI responses for different aspects
         prompts = {
             'feasibility': create_feasibility_prompt(idea, industry),
@@ -27,40 +102,45 @@ def validate_idea(idea, industry=None):
             'market_size': create_market_size_prompt(idea, industry),
             'target_audience': create_target_audience_prompt(idea, industry)
         }
+
+        # Keep what still applies from the analysis being edited, or serve
+        # near-duplicate ideas from earlier analyses
+        reuse = {}
+        previous = analysis_history.load(previous_analysis_id) if previous_analysis_id else None
+        if previous_analysis_id and previous is None:
+            logger.warning(f"Unknown previous analysis {previous_analysis_id[:12]}, validating from scratch")
+        match = None
+        if previous:
+            reuse = plan_reuse(previous, prompts, idea, industry)
+            logger.info(f"Re-validating {previous_analysis_id[:12]}: reusing {sorted(reuse) or 'nothing'}")
+            for key in reuse:
+                metrics.inc('validator_sections_reused_total', section=key)
+        elif Config.SEMANTIC_CACHE_ENABLED:
+            match = semantic_cache.find_similar(idea, industry)
+        if match and semantic_cache.same_terms(idea, match[1]):
+            # Only ideas about the same things: another product, city or
+            # audience scores high too, but needs its own market sections
+            similarity, similar_idea, similar = match
+            if similarity >= Config.SEMANTIC_CACHE_THRESHOLD:
+                # Every section is kept, but the idea still gets its own
+                # summary, report and history record below
+                logger.info(f"Reusing analysis of a near-duplicate idea (similarity {similarity:.2f})")
+                reuse = {key: previous_section(similar, key) for key in list(prompts) + ['competitors', 'swot']}
+                reuse = {key: value for key, value in reuse.items() if value is not None}
+            elif similarity >= Config.SEMANTIC_SECTION_THRESHOLD:
+                logger.info(f"Reusing market sections of a similar idea (similarity {similarity:.2f})")
+                reuse = {key: copy.deepcopy(similar[RESULT_KEYS[key]])
+                         for key in REUSABLE_SECTIONS if RESULT_KEYS[key] in similar}
         
-        # Process all prompts
-        results = {}
-        for key, prompt in prompts.items():
-            fallback = globals().get(f"{key}_fallback", lambda: None)()
-            results[key] = process_ai_response(prompt, fallback)
-        
-        # Find competitors
-        competitors = find_competitors(idea, industry)
-        
-        # Calculate SWOT analysis
-        swot_analysis = generate_swot_analysis(
-            results.get('risks', []),
-            results.get('improvements', []),
-            results.get('monetization', []),
-            idea,
-            industry
-        )
-        
-        # Generate PDF report
-        pdf_report_path = generate_pdf_report({
-            'idea': idea,
-            'industry': industry,
-            'analysis': {
-                'feasibility_score': calculate_score(results.get('feasibility', {}).get('score', 7)),
-                'swot_analysis': swot_analysis,
-                'competitors': competitors,
-                'monetization_paths': results.get('monetization', []),
-                'improvements': results.get('improvements', [])
-            }
-        })
+        # Process all prompts and the competitor lookup concurrently
+        if batch is None:
+            batch = Config.AI_BATCH_MODE
+        results = run_sections(prompts, idea, industry, reuse, batch, on_section)
+        competitors = results['competitors']
+        swot_analysis = results['swot']
         
         # Prepare final result
-        return {
+        result = {
             'feasibility_score': calculate_score(results.get('feasibility', {}).get('score', 7)),
             'feasibility_description': results.get('feasibility', {}).get('explanation', ''),
             'risks': results.get('risks', []),
@@ -78,156 +158,332 @@ def validate_idea(idea, industry=None):
                 results.get('feasibility', {}).get('score', 7),
                 results.get('risks', []),
                 len(competitors)
-            ),
-            'pdf_report_url': pdf_report_path
+            )
         }
+
+        # Store the report data; the PDF itself is rendered on first download
+        analysis_id = report_renderer.save(report_data(idea, industry, result))
+        pdf_report_path = f"/reports/{analysis_id}.pdf"
+        result['analysis_id'] = analysis_id
+        result['pdf_report_url'] = pdf_report_path
+        if on_section:
+            on_section('pdf', {'analysis_id': analysis_id, 'pdf_report_url': pdf_report_path})
+        if previous or reuse:
+            result['reused_sections'] = sorted(reuse)
+        if Config.SEMANTIC_CACHE_ENABLED:
+            semantic_cache.remember(idea, industry, copy.deepcopy(result))
+        analysis_history.record(analysis_id, idea, industry, result,
+                                fingerprints=section_fingerprints(prompts, idea, industry))
+        # Added after storing: a later answer from the history costs nothing
+        result['token_usage'] = finish_usage(usage_token)
+        usage_token = None
+        logger.info(f"Analysis {analysis_id[:12]} used {result['token_usage']['total_tokens']} tokens "
+                    f"in {result['token_usage']['calls']} calls")
+        return result
     except Exception as e:
         logger.error(f"Validation error: {str(e)}", exc_info=True)
         raise
+    finally:
+        if usage_token is not None:
+            finish_usage(usage_token)
+
+def run_sections(prompts, idea, industry, reuse=None, batch=False, on_section=None):
+    """Run section prompts, the competitor lookup and SWOT under one deadline.
+
+    Every prompt and the SerpAPI lookup are submitted at once; SWOT is queued
+    as soon as its inputs are ready. Anything still running when the deadline
+    passes is abandoned and replaced by its fallback. Sections present in
+    ``reuse`` are taken as-is instead of being requested. In ``batch`` mode
+    the prompts are replaced by one combined prompt and only the sections it
+    fails to deliver are requested separately. ``on_section`` is told about
+    every section as it is settled.
+    """
+    # One deadline and one retry allowance for every AI call in this request
+    budget = RetryBudget(Config.AI_RETRY_BUDGET, Config.VALIDATION_DEADLINE_SECONDS)
+    results = {}
+    futures = {}
+
+    def submit(key, fn, *args, **kwargs):
+        # Each section is timed as its own stage, in the caller's trace
+        return _executor.submit(in_context(timed(f"section_{key}")(fn)), *args, **kwargs)
+
+    def record(key, value):
+        results[key] = value
+        notify(on_section, key, section_payload(key, value))
+
+    for key, value in (reuse or {}).items():
+        record(key, value)
+    try:
+        wanted = [key for key in prompts if key not in results]
+        if batch and wanted:
+            batch_keys = wanted + ([] if 'swot' in results else ['swot'])
+            futures = {
+                submit(
+                    'batch',
+                    process_ai_response,
+                    create_batch_prompt(idea, industry, batch_keys),
+                    None,
+                    Config.AI_BATCH_MAX_OUTPUT_TOKENS,
+                    budget,
+                    (dict, ()),  # Sections are checked one by one in split_batch_response
+                    'batch'
+                ): 'batch'
+            }
+        else:
+            futures = {
+                submit(key, process_ai_response, prompts[key], get_fallback(key),
+                       budget=budget, schema=SECTION_SCHEMAS.get(key), section=key): key
+                for key in wanted
+            }
+        if 'competitors' not in results:
+            futures[submit('competitors', find_competitors, idea, industry)] = 'competitors'
+        pending = set(futures)
+        swot_submitted = False
+
+        while True:
+            remaining = budget.time_left()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    value = future.result()
+                except Exception as e:
+                    logger.error(f"Section '{key}' failed: {str(e)}", exc_info=True)
+                    value = None if key == 'batch' else get_fallback(key)
+
+                if key != 'batch':
+                    record(key, value)
+                    continue
+
+                sections = split_batch_response(value, batch_keys)
+                for section_key, section_value in sections.items():
+                    record(section_key, section_value)
+                if 'swot' in sections:
+                    swot_submitted = True
+                missing = [k for k in wanted if k not in sections]
+                if missing:
+                    logger.warning(f"Batch response missing sections {missing}, requesting individually")
+                for missing_key in missing:
+                    retry_future = submit(
+                        missing_key, process_ai_response, prompts[missing_key], get_fallback(missing_key),
+                        budget=budget, schema=SECTION_SCHEMAS.get(missing_key), section=missing_key
+                    )
+                    futures[retry_future] = missing_key
+                    pending.add(retry_future)
+
+            if not swot_submitted and 'swot' not in results and all(key in results for key in SWOT_INPUTS):
+                swot_future = submit(
+                    'swot',
+                    generate_swot_analysis,
+                    results.get('risks', []),
+                    results.get('improvements', []),
+                    results.get('monetization', []),
+                    idea,
+                    industry,
+                    budget
+                )
+                futures[swot_future] = 'swot'
+                pending.add(swot_future)
+                swot_submitted = True
+
+            if not pending:
+                break
+
+        for key in list(prompts) + ['competitors', 'swot']:
+            if key not in results:
+                logger.warning(f"Section '{key}' missed the validation deadline, using fallback")
+                metrics.inc('validator_fallbacks_total', reason='deadline')
+                record(key, get_fallback(key))
+        return results
+    finally:
+        # Don't block the request on stragglers; their results are discarded.
+        # Calls that haven't started yet are dropped so they don't hold up
+        # other validations
+        for future in futures:
+            future.cancel()
+
+def notify(on_section, key, payload):
+    """Pass a settled section to the ``on_section`` callback, if any"""
+    if on_section:
+        try:
+            on_section(key, payload)
+        except Exception as e:
+            logger.error(f"Section callback failed: {str(e)}", exc_info=True)
+
+def fallback_sections(result):
+    """Sections of a final result that hold their fallback instead of an answer"""
+    return [key for key in ['feasibility'] + list(RESULT_KEYS)
+            if previous_section(result, key) == get_fallback(key)]
+
+def section_fingerprints(prompts, idea, industry):
+    """Digest of the input each section is generated from.
+
+    Prompts are compared ignoring case and whitespace; competitors depend
+    only on the normalised search query. SWOT has no entry: it is rebuilt
+    whenever one of the sections it is made from is.
+    """
+    fingerprints = {key: _digest(' '.join(prompt.lower().split())) for key, prompt in prompts.items()}
+    fingerprints['competitors'] = _digest(normalize_query(idea, industry))
+    return fingerprints
+
+def plan_reuse(previous, prompts, idea, industry):
+    """Sections of a previous analysis that an edited idea can keep.
+
+    ``previous`` comes from ``analysis_history.load``. A section is kept when
+    its input fingerprint is unchanged. The market sections are also kept
+    when the industry is the same and the edit only rewords the idea, as for
+    near-duplicate ideas; an edit that changes a place or product word gets
+    them regenerated. SWOT is kept only if all of its inputs are.
+    """
+    old_result = previous['result']
+    old_fingerprints = previous['fingerprints']
+    fingerprints = section_fingerprints(prompts, idea, industry)
+    same_market = (
+        ' '.join((industry or '').lower().split()) == ' '.join((previous['industry'] or '').lower().split())
+        and semantic_cache.same_terms(idea, previous['idea'])
+        and semantic_cache.similarity(idea, previous['idea']) >= Config.SEMANTIC_SECTION_THRESHOLD
+    )
+
+    reuse = {}
+    for key in list(prompts) + ['competitors']:
+        value = previous_section(old_result, key)
+        if value is None:
+            continue
+        market_section = key in REUSABLE_SECTIONS
+        if old_fingerprints.get(key) == fingerprints[key] or (market_section and same_market):
+            reuse[key] = value
+    if all(key in reuse for key in SWOT_INPUTS) and old_result.get('swot_analysis'):
+        reuse['swot'] = copy.deepcopy(old_result['swot_analysis'])
+    return reuse
+
+def previous_section(result, key):
+    """A section's value as run_sections produces it, rebuilt from a final result"""
+    if key == 'feasibility':
+        if 'feasibility_score' not in result:
+            return None
+        return {'score': result['feasibility_score'] / 10, 'explanation': result.get('feasibility_description', '')}
+    value = result.get(RESULT_KEYS[key])
+    return copy.deepcopy(value) if value is not None else None
+
+def _digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+def get_fallback(key):
+    return globals().get(f"{key}_fallback", lambda: None)()
+
+def section_payload(key, value):
+    """Result fields contributed by one section"""
+    if key == 'feasibility':
+        value = value if isinstance(value, dict) else {}
+        return {
+            'feasibility_score': calculate_score(value.get('score', 7)),
+            'feasibility_description': value.get('explanation', '')
+        }
+    return {RESULT_KEYS.get(key, key): value}
+
+def is_valid_section(key, value):
+    """Check a parsed section against its expected shape"""
+    return matches_schema(value, SECTION_SCHEMAS.get(key, (object, ())))
+
+def split_batch_response(data, keys):
+    """Map a combined batch answer back onto section keys, dropping bad sections"""
+    if not isinstance(data, dict):
+        return {}
+    sections = {}
+    for key in keys:
+        value = data.get(key)
+        if is_valid_section(key, value):
+            sections[key] = value
+        elif value is not None:
+            logger.warning(f"Discarding malformed '{key}' section from batch response")
+    return sections
 
 # Prompt Creation Functions
+# Every prompt is the task, the idea, then the answer format; the formats
+# are compact one-line JSON templates so instructions cost few tokens
+SECTION_TASKS = {
+    'feasibility': 'Assess the feasibility of this startup idea.',
+    'risks': 'List the main risks of this startup idea.',
+    'improvements': 'Suggest improvements to this startup idea.',
+    'monetization': 'Suggest ways to monetize this startup idea.',
+    'investment': 'Estimate the investment this startup idea needs.',
+    'canvas': 'Fill in a business model canvas for this startup idea.',
+    'market_size': 'Estimate the market size and growth of this startup idea.',
+    'target_audience': 'Describe the target audience of this startup idea.',
+    'swot': 'Write a SWOT analysis of this startup idea.'
+}
+
+# Answer format of each section; lists hold short strings
+SECTION_FORMATS = {
+    'feasibility': '{"score": <1-10, 10 is most feasible>, "explanation": "<3-5 sentences on demand, feasibility, competition, business model and challenges>"}',
+    'risks': '["<3-5 specific, mitigable risks, one sentence each>"]',
+    'improvements': '["<3-5 specific, actionable improvements>"]',
+    'monetization': '["<2-3 realistic monetization paths with revenue models>"]',
+    'investment': '{"amount": "<estimated dollar amount>", "level": "<low/moderate/high>", "break_even": "<time to break even>", "cost_factors": ["<main cost factor>"]}',
+    'canvas': '{"key_partners": [], "key_activities": [], "value_propositions": [], "customer_relationships": [], "customer_segments": [], "key_resources": [], "channels": [], "cost_structure": [], "revenue_streams": []}',
+    'market_size': '{"tam": "<TAM>", "sam": "<SAM>", "som": "<SOM>", "growth_rate": "<annual growth rate>", "explanation": "<analysis>"}',
+    'target_audience': '{"primary_segments": [], "demographics": {"age_range": "", "income_level": "", "education": "", "other": ""}, "psychographics": {"interests": [], "values": [], "lifestyle": ""}, "buying_behaviors": {"purchase_frequency": "", "price_sensitivity": "", "decision_factors": []}}',
+    'swot': '{"strengths": [], "weaknesses": [], "opportunities": [], "threats": []}'
+}
+
+def idea_lines(idea, industry):
+    return f"Idea: {idea}\nIndustry: {industry or 'Not specified'}"
+
+def create_section_prompt(key, idea, industry, context=''):
+    """Prompt for one section; ``context`` lines go between the idea and the format"""
+    context = f"{context}\n" if context else ''
+    return f"""{SECTION_TASKS[key]}
+{idea_lines(idea, industry)}
+{context}Be specific to this idea. Respond with just JSON in this format:
+{SECTION_FORMATS[key]}"""
+
 def create_feasibility_prompt(idea, industry):
-    return f"""Analyze this startup idea and provide a detailed feasibility assessment:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Consider:
-1. Market demand and size
-2. Technical feasibility
-3. Competitive landscape
-4. Business model viability
-5. Potential challenges
-
-Respond in this exact JSON format:
-{{
-    "score": <number between 1-10 where 10 is most feasible>,
-    "explanation": "<detailed analysis (3-5 sentences)>"
-}}"""
+    return create_section_prompt('feasibility', idea, industry)
 
 def create_risks_prompt(idea, industry):
-    return f"""Identify specific, actionable risks for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Provide 3-5 risks as a JSON array, each risk should be:
-- Specific to this idea
-- Actionable (can be mitigated)
-- Concise (1 sentence per risk)
-
-Example: ["Market saturation in target industry", "High customer acquisition costs"]
-
-Respond with just the JSON array:"""
+    return create_section_prompt('risks', idea, industry)
 
 def create_improvements_prompt(idea, industry):
-    return f"""Suggest concrete improvements for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Provide 3-5 improvements as a JSON array, each should be:
-- Actionable
-- Specific
-- Valuable
-
-Example: ["Focus on a niche market first", "Develop strategic partnerships"]
-
-Respond with just the JSON array:"""
+    return create_section_prompt('improvements', idea, industry)
 
 def create_monetization_prompt(idea, industry):
-    return f"""Suggest viable monetization strategies for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Provide 2-3 monetization paths as a JSON array, each should be:
-- Realistic for this idea
-- Include potential revenue models
-- Consider industry standards
-
-Example: ["Subscription SaaS model", "Freemium with premium features"]
-
-Respond with just the JSON array:"""
+    return create_section_prompt('monetization', idea, industry)
 
 def create_investment_prompt(idea, industry):
-    return f"""Estimate the required investment for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Respond in this exact JSON format:
-{{
-    "amount": "<estimated dollar amount>",
-    "level": "<low/moderate/high>",
-    "break_even": "<estimated time to break even>",
-    "cost_factors": ["<main cost factor 1>", "<main cost factor 2>"]
-}}"""
+    return create_section_prompt('investment', idea, industry)
 
 def create_canvas_prompt(idea, industry):
-    return f"""Create a complete business model canvas for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Respond in this exact JSON format:
-{{
-    "key_partners": ["partner1", "partner2"],
-    "key_activities": ["activity1", "activity2"],
-    "value_propositions": ["value1", "value2"],
-    "customer_relationships": ["relationship1", "relationship2"],
-    "customer_segments": ["segment1", "segment2"],
-    "key_resources": ["resource1", "resource2"],
-    "channels": ["channel1", "channel2"],
-    "cost_structure": ["cost1", "cost2"],
-    "revenue_streams": ["revenue1", "revenue2"]
-}}"""
+    return create_section_prompt('canvas', idea, industry)
 
 def create_market_size_prompt(idea, industry):
-    return f"""Estimate the market size and growth potential for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Consider:
-1. Total addressable market (TAM)
-2. Serviceable available market (SAM)
-3. Serviceable obtainable market (SOM)
-4. Growth trends in the industry
-
-Respond in this JSON format:
-{{
-    "tam": "<TAM estimate>",
-    "sam": "<SAM estimate>",
-    "som": "<SOM estimate>",
-    "growth_rate": "<estimated annual growth rate>",
-    "explanation": "<detailed analysis>"
-}}"""
+    return create_section_prompt('market_size', idea, industry)
 
 def create_target_audience_prompt(idea, industry):
-    return f"""Identify the target audience for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Provide detailed information about:
-1. Primary customer segments
-2. Demographic characteristics
-3. Psychographic characteristics
-4. Buying behaviors
-
-Respond in this JSON format:
-{{
-    "primary_segments": ["segment1", "segment2"],
-    "demographics": {{
-        "age_range": "<range>",
-        "income_level": "<level>",
-        "education": "<level>",
-        "other": "<details>"
-    }},
-    "psychographics": {{
-        "interests": ["interest1", "interest2"],
-        "values": ["value1", "value2"],
-        "lifestyle": "<description>"
-    }},
-    "buying_behaviors": {{
-        "purchase_frequency": "<frequency>",
-        "price_sensitivity": "<sensitivity>",
-        "decision_factors": ["factor1", "factor2"]
-    }}
-}}"""
+    return create_section_prompt('target_audience', idea, industry)
+
+def create_swot_prompt(idea, industry, risks, improvements, monetization):
+    # Compact JSON rather than Python reprs: fewer tokens, unambiguous quoting
+    insights = '\n'.join(
+        f"{label}: {json.dumps(value, ensure_ascii=False, separators=(',', ':'))}"
+        for label, value in (('Risks', risks), ('Improvements', improvements), ('Monetization', monetization))
+    )
+    return create_section_prompt('swot', idea, industry, f"Keep it consistent with these insights:\n{insights}")
+
+def create_batch_prompt(idea, industry, keys):
+    sections = '\n'.join(
+        f'"{key}": {SECTION_FORMATS[key]}' + (' consistent with your risks, improvements and monetization'
+                                              if key == 'swot' else '')
+        for key in keys
+    )
+    return f"""Analyze this startup idea:
+{idea_lines(idea, industry)}
+
+Respond with one JSON object containing exactly these keys, each in the format shown:
+{sections}
+
+Be specific to this idea. Respond with just the JSON object:"""
 
 # Fallback Functions
 def feasibility_fallback():
@@ -242,6 +498,14 @@ def improvements_fallback():
 def monetization_fallback():
     return ['Subscription model', 'Freemium with premium features', 'Enterprise licensing']
 
+def swot_fallback():
+    return {
+        "strengths": ["Unique value proposition", "Growing market demand"],
+        "weaknesses": ["High competition", "Customer acquisition cost"],
+        "opportunities": ["Market expansion", "Strategic partnerships"],
+        "threats": ["Regulatory changes", "Economic downturn"]
+    }
+
 def investment_fallback():
     return {
         'amount': '50,000',
@@ -301,45 +565,33 @@ def summarize_idea(idea: str) -> str:
     clean_idea = ' '.join(idea.split()[:30])  # First 30 words
     return (clean_idea[:150] + '...') if len(clean_idea) > 150 else clean_idea
 
-def process_ai_response(prompt, fallback):
-    """Process AI response with proper error handling"""
+def process_ai_response(prompt, fallback, max_output_tokens=MAX_OUTPUT_TOKENS, budget=None, schema=None,
+                        section=None):
+    """Process AI response with proper error handling
+
+    A response with no JSON value matching ``schema`` gets the fallback.
+    ``section`` picks the model tier and the latency history for hedging.
+    """
     try:
-        response = get_cached_response(prompt) or generate_ai_response(prompt)
+        response = get_cached_response(prompt, model_for(section), max_output_tokens, budget, section, schema)
         if response:
-            json_data = extract_json_from_response(response)
+            json_data = extract_json_from_response(response, schema)
             if json_data:
+                ai_policy.record_outcome(used_fallback=False)
                 return json_data
         logger.warning("Using fallback data for AI response")
+        ai_policy.record_outcome(used_fallback=True)
+        metrics.inc('validator_fallbacks_total', reason='no_response' if not response else 'unparseable')
         return fallback
     except Exception as e:
         logger.error(f"Error processing AI response: {str(e)}", exc_info=True)
+        ai_policy.record_outcome(used_fallback=True)
+        metrics.inc('validator_fallbacks_total', reason='error')
         return fallback
 
-def generate_swot_analysis(risks, improvements, monetization, idea, industry):
-    prompt = f"""Generate a comprehensive SWOT analysis for this startup idea:
-Idea: {idea}
-Industry: {industry or 'Not specified'}
-
-Consider these existing insights:
-Risks: {risks}
-Improvements: {improvements}
-Monetization Paths: {monetization}
-
-Provide a detailed SWOT analysis in this JSON format:
-{{
-    "strengths": ["strength1", "strength2"],
-    "weaknesses": ["weakness1", "weakness2"],
-    "opportunities": ["opportunity1", "opportunity2"],
-    "threats": ["threat1", "threat2"]
-}}"""
-    
-    fallback = {
-        "strengths": ["Unique value proposition", "Growing market demand"],
-        "weaknesses": ["High competition", "Customer acquisition cost"],
-        "opportunities": ["Market expansion", "Strategic partnerships"],
-        "threats": ["Regulatory changes", "Economic downturn"]
-    }
-    return process_ai_response(prompt, fallback)
+def generate_swot_analysis(risks, improvements, monetization, idea, industry, budget=None):
+    prompt = create_swot_prompt(idea, industry, risks, improvements, monetization)
+    return process_ai_response(prompt, swot_fallback(), budget=budget, schema=SECTION_SCHEMAS['swot'], section='swot')
 
 def calculate_success_probability(score, risks, competitor_count):
     try:
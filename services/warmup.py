@@ -0,0 +1,71 @@
+"""Preload the validation pipeline so the first analysis doesn't pay for it.
+
+app.py imports the heavy subsystems on first use. With gunicorn, load this
+module as an extra config file to warm every worker right after it forks:
+
+    gunicorn app:app -c python:services.warmup
+
+The warm-up runs on a background thread, so the worker starts accepting
+requests immediately. Set WARM_UP=false to turn it off. The hook also
+starts the worker's job queue threads, whatever WARM_UP says.
+"""
+import threading
+import time
+import logging
+from config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Import the pipeline, build the default Gemini model and open the caches"""
+    started = time.perf_counter()
+    try:
+        from services import ai_service
+        from services import validator  # noqa: F401 (numpy, requests and friends)
+        from services import jobs  # noqa: F401
+        from services.pdf_service import generate_pdf_report  # noqa: F401 (fpdf)
+        from services.market_service import search_cache
+
+        # Configures the SDK and prepares the request template; no network call
+        ai_service.get_model(ai_service.MODEL_NAME, ai_service.MAX_OUTPUT_TOKENS)
+        ai_service.response_cache.stats()
+        search_cache.stats()
+    except Exception as e:
+        logger.error(f"Warm-up failed: {str(e)}", exc_info=True)
+        return
+    logger.info(f"Warm-up finished in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+
+def start_warm_up():
+    """Run warm_up on a daemon thread unless WARM_UP is off"""
+    if not Config.WARM_UP:
+        return None
+    thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def start_job_workers():
+    """Start this process's job workers on a daemon thread.
+
+    Runs even with WARM_UP off: jobs still queued from before a restart
+    must not wait for the next submission.
+    """
+    def start():
+        try:
+            from services.jobs import job_queue
+            job_queue.start()
+        except Exception as e:
+            logger.error(f"Starting job workers failed: {str(e)}", exc_info=True)
+
+    thread = threading.Thread(target=start, name='job-start', daemon=True)
+    thread.start()
+    return thread
+
+
+def post_fork(server, worker):
+    """gunicorn server hook"""
+    start_warm_up()
+    start_job_workers()
@@ -0,0 +1,20 @@
+from services import ai_service
+from services.cache import ResponseCache
+
+SCHEMA = (dict, ('score', 'explanation'))
+
+
+def test_unusable_answers_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_service, 'response_cache', ResponseCache(str(tmp_path / 'ai.sqlite3'), 3600, 10 ** 6))
+    answers = ["Sorry, I can't help with that.", '{"score": 7, "explanation": "Clear demand"}']
+    calls = []
+
+    def generate(prompt, *args, **kwargs):
+        calls.append(prompt)
+        return answers[len(calls) - 1]
+
+    monkeypatch.setattr(ai_service, 'generate_ai_response', generate)
+    assert ai_service.get_cached_response('prompt', schema=SCHEMA) == answers[0]
+    assert ai_service.get_cached_response('prompt', schema=SCHEMA) == answers[1]
+    assert ai_service.get_cached_response('prompt', schema=SCHEMA) == answers[1]
+    assert len(calls) == 2
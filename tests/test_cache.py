@@ -0,0 +1,37 @@
+import time
+
+from services import cache
+from services.cache import ResponseCache
+
+
+def test_expired_entries_count_towards_eviction(tmp_path):
+    store = ResponseCache(str(tmp_path / 'cache.sqlite3'), ttl_seconds=60, max_bytes=250)
+    store.set('old', 'x' * 100)
+    store.set('fresh', 'y' * 100)
+    conn = store._db.get()
+    with conn:
+        conn.execute("UPDATE entries SET created_at = created_at - 120 WHERE key = 'old'")
+
+    # Dropping the expired entry is enough room; nothing live is evicted
+    store.set('new', 'z' * 100)
+    assert store.get('fresh') == 'y' * 100
+    assert store.get('new') == 'z' * 100
+    stats = store.stats()
+    assert stats['evictions'] == 0
+    assert stats['expired'] == 1
+    assert stats['bytes'] == 200
+
+
+def test_hits_are_counted_without_writing(tmp_path, monkeypatch):
+    store = ResponseCache(str(tmp_path / 'cache.sqlite3'), ttl_seconds=60, max_bytes=10000)
+    store.set('key', 'value')
+    conn = store._db.get()
+    writes = conn.total_changes
+    for _ in range(50):
+        assert store.get('key') == 'value'
+    assert conn.total_changes == writes
+    assert store.stats()['hits'] == 50
+
+    monkeypatch.setattr(cache, '_FLUSH_INTERVAL', 0)
+    store.get('key')
+    assert conn.execute("SELECT value FROM counters WHERE name = 'hits'").fetchone()[0] == 51
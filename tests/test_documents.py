@@ -0,0 +1,36 @@
+import io
+
+import pytest
+from fpdf import FPDF
+
+from services.documents import detect_format, iter_paragraphs, summarize_document
+
+pytest.importorskip('pypdf')
+
+
+def _pdf(pages):
+    pdf = FPDF()
+    pdf.set_font('Arial', size=11)
+    for lines in pages:
+        pdf.add_page()
+        for line in lines:
+            pdf.multi_cell(0, 6, line)
+    return io.BytesIO(pdf.output(dest='S').encode('latin-1'))
+
+
+def test_pdf_paragraphs_are_extracted_page_by_page():
+    pitch = _pdf([
+        ["Acme Coffee - Confidential", "",
+         "We deliver freshly roasted coffee to office teams every week.", "",
+         "Page 1 of 2"],
+        ["Acme Coffee - Confidential", "",
+         "Revenue comes from monthly subscriptions billed per seat.", "",
+         "Page 2 of 2"]
+    ])
+    assert detect_format('pitch.pdf') == 'pdf'
+    summary, stats = summarize_document(iter_paragraphs(pitch, 'pdf'))
+    assert "freshly roasted coffee to office teams" in summary
+    assert "monthly subscriptions billed per seat" in summary
+    assert "Confidential" not in summary
+    assert "Page" not in summary
+    assert stats['kept'] == 2
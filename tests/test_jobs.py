@@ -0,0 +1,26 @@
+import time
+
+from services.jobs import DONE, JobQueue
+
+
+def finished_job(queue, job_id, finished_at):
+    conn = queue._db.get()
+    with conn:
+        conn.execute(
+            "INSERT INTO jobs (id, idea_hash, idea, status, result, created_at, updated_at, finished_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, job_id, 'idea', DONE, '{}', finished_at, finished_at, finished_at)
+        )
+
+
+def test_expired_jobs_are_hidden_and_purged_without_new_submissions(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs.sqlite3'), result_ttl=60)
+    now = time.time()
+    finished_job(queue, 'old', now - 120)
+    finished_job(queue, 'new', now - 10)
+
+    assert queue.get('old') is None
+    assert queue.get('new')['status'] == DONE
+
+    queue._purge_idle()
+    assert queue.stats() == {DONE: 1}
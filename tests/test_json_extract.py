@@ -0,0 +1,18 @@
+import time
+
+from services.json_extract import extract_json
+
+SCHEMA = (dict, ('score', 'explanation'))
+
+
+def test_smart_quotes_are_repaired_after_malformed_values():
+    text = 'Example: {"a": x} Answer: {“score”: 7, “explanation”: “Clear demand”}'
+    assert extract_json(text, SCHEMA) == {'score': 7, 'explanation': 'Clear demand'}
+
+
+def test_smart_quote_does_not_make_malformed_text_quadratic():
+    fragment = '{"a": x} '
+    text = fragment * (32 * 1024 // len(fragment)) + '“: '
+    started = time.perf_counter()
+    assert extract_json(text, SCHEMA) is None
+    assert time.perf_counter() - started < 3  # Was about 20s when each repair re-translated the text
@@ -0,0 +1,60 @@
+from config import Config
+from services import semantic_cache
+from services.semantic_cache import SemanticIndex, embed, same_terms, similarity
+
+
+def _add(index, idea):
+    buckets, weights = embed(idea)
+    index.add(buckets, weights, {'idea': idea, 'result': {'idea': idea}})
+
+
+def test_search_skips_evicted_entries():
+    # More candidates than get rescored, most of the close ones evicted
+    index = SemanticIndex(capacity=40)
+    evicted = "subscription coffee delivery for office teams"
+    ideas = [evicted] * 15 + ["office coffee subscription"] * 20 + ["kayak hiking guide"] * 20
+    for idea in ideas:
+        _add(index, idea)
+    assert len(index) == 40
+    assert index._start == 15  # Evicted, but not compacted away yet
+
+    buckets, weights = embed(evicted)
+    score, payload = index.search(buckets, weights)
+    assert payload is not None
+    assert payload['idea'] in ideas[15:]
+    assert 0 < score < 0.99
+
+
+def test_search_returns_exact_match():
+    index = SemanticIndex(capacity=40)
+    for idea in ("mobile app for renting camping gear", "bakery selling gluten free bread",
+                 "online marketplace for handmade furniture"):
+        _add(index, idea)
+    buckets, weights = embed("bakery selling gluten free bread")
+    score, payload = index.search(buckets, weights)
+    assert payload['idea'] == "bakery selling gluten free bread"
+    assert score > 0.99
+
+
+def test_reworded_idea_names_the_same_things():
+    indexed, query = "i start shoes shop in islamabad", "starting a shoe store in Islamabad"
+    assert same_terms(query, indexed)
+    assert similarity(query, indexed) >= Config.SEMANTIC_CACHE_THRESHOLD
+
+
+def test_another_city_is_another_idea():
+    indexed, query = "starting a shoe store in Islamabad", "starting a shoe store in Karachi"
+    assert not same_terms(query, indexed)
+
+
+def test_industries_share_one_bounded_index(monkeypatch):
+    monkeypatch.setattr(semantic_cache, '_index', SemanticIndex(capacity=5))
+    semantic_cache.remember("shoe store in Islamabad", "Retail", {'analysis_id': 'retail'})
+    assert semantic_cache.find_similar("shoe store in Islamabad", "Fashion") is None
+    assert semantic_cache.find_similar("shoe store in Islamabad", " retail ")[2] == {'analysis_id': 'retail'}
+
+    for n in range(20):
+        semantic_cache.remember("shoe store in Islamabad", f"Industry {n}", {'analysis_id': n})
+    assert len(semantic_cache._index) == 5
+    assert semantic_cache.find_similar("shoe store in Islamabad", "Retail") is None
+    assert semantic_cache.find_similar("shoe store in Islamabad", "industry 19")[2] == {'analysis_id': 19}
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+from services.ai_service import stream_completion
+
+
+class FakeModel:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+
+    def generate_content(self, prompt, stream=False):
+        def chunks():
+            for text in self.chunks:
+                self.sent += 1
+                yield SimpleNamespace(text=text)
+        return chunks()
+
+
+def test_stream_skips_values_of_the_wrong_shape():
+    model = FakeModel([
+        'Fields look like {"name": "value"}. ',
+        'Answer: {"score": 7, "explanation": "Clear demand"}',
+        ' and some closing remarks',
+        ' that nobody reads'
+    ])
+    received, generated = stream_completion(model, 'prompt', schema=(dict, ('score', 'explanation')))
+    assert received.endswith('"explanation": "Clear demand"}')
+    assert model.sent == 2  # Stopped once the matching value closed
+
+
+def test_stream_without_schema_stops_at_first_value():
+    model = FakeModel(['{"name": "value"}', ' more', ' text'])
+    received, _ = stream_completion(model, 'prompt')
+    assert received == '{"name": "value"}'
+    assert model.sent == 1
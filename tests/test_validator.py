@@ -0,0 +1,85 @@
+import pytest
+
+from services import validator
+
+IDEA = 'online marketplace for handmade furniture from local artisans in Islamabad'
+INDUSTRY = 'E-commerce'
+
+
+def prompts_for(idea):
+    return {
+        'investment': validator.create_investment_prompt(idea, INDUSTRY),
+        'market_size': validator.create_market_size_prompt(idea, INDUSTRY),
+        'target_audience': validator.create_target_audience_prompt(idea, INDUSTRY)
+    }
+
+
+def previous_analysis():
+    result = {
+        'investment_needed': validator.investment_fallback(),
+        'market_size': validator.market_size_fallback(),
+        'target_audience': validator.target_audience_fallback()
+    }
+    fingerprints = validator.section_fingerprints(prompts_for(IDEA), IDEA, INDUSTRY)
+    return {'idea': IDEA, 'industry': INDUSTRY, 'result': result, 'fingerprints': fingerprints}
+
+
+def test_reworded_edit_keeps_market_sections():
+    idea = 'An online marketplace for handmade furniture by local artisans in islamabad'
+    reuse = validator.plan_reuse(previous_analysis(), prompts_for(idea), idea, INDUSTRY)
+    assert sorted(reuse) == sorted(validator.REUSABLE_SECTIONS)
+
+
+def test_moving_the_idea_to_another_city_regenerates_market_sections():
+    idea = IDEA.replace('Islamabad', 'Karachi')
+    assert validator.plan_reuse(previous_analysis(), prompts_for(idea), idea, INDUSTRY) == {}
+
+
+def stored_analysis(**changes):
+    result = {
+        'analysis_id': 'a1b2c3',
+        'pdf_report_url': '/reports/a1b2c3.pdf',
+        'feasibility_score': 80.0,
+        'feasibility_description': 'Steady demand from office workers',
+        'risks': ['Rent'],
+        'improvements': ['Loyalty cards'],
+        'monetization_paths': ['Subscriptions'],
+        'investment_needed': {'amount': '20,000', 'level': 'Low', 'break_even': '9 months'},
+        'competitors': [{'name': 'Bean There', 'url': 'https://example.org', 'snippet': ''}],
+        'business_model_canvas': {'value_propositions': ['Fresh'], 'customer_segments': ['Offices'],
+                                  'revenue_streams': ['Plans']},
+        'market_size': {'tam': '$5M', 'sam': '$1M', 'som': '$200K'},
+        'target_audience': {'primary_segments': ['Office teams']},
+        'swot_analysis': {'strengths': ['Fresh'], 'weaknesses': [], 'opportunities': [], 'threats': []}
+    }
+    result.update(changes)
+    return result
+
+
+def test_history_hit_streams_its_sections(monkeypatch):
+    monkeypatch.setattr(validator.Config, 'HISTORY_REUSE_SECONDS', 3600)
+    monkeypatch.setattr(validator.analysis_history, 'latest', lambda *args, **kwargs: stored_analysis())
+    events = []
+    result = validator.validate_idea(IDEA, INDUSTRY, on_section=lambda key, payload: events.append((key, payload)))
+    assert result['analysis_id'] == 'a1b2c3'
+    assert sorted(key for key, _ in events) == sorted(['feasibility', 'pdf'] + list(validator.RESULT_KEYS))
+    assert ('market_size', {'market_size': result['market_size']}) in events
+
+
+def test_history_is_skipped_for_fallbacks_edits_and_prompt_modes(monkeypatch):
+    monkeypatch.setattr(validator.Config, 'HISTORY_REUSE_SECONDS', 3600)
+    stored = {'result': stored_analysis()}
+    monkeypatch.setattr(validator.analysis_history, 'latest', lambda *args, **kwargs: stored['result'])
+
+    def validated():
+        raise RuntimeError('validated from scratch')
+
+    monkeypatch.setattr(validator, 'start_usage', validated)
+    for kwargs in ({'batch': False}, {'previous_analysis_id': 'a1b2c3'}):
+        with pytest.raises(RuntimeError):
+            validator.validate_idea(IDEA, INDUSTRY, **kwargs)
+
+    stored['result'] = stored_analysis(market_size=validator.market_size_fallback())
+    assert validator.fallback_sections(stored['result']) == ['market_size']
+    with pytest.raises(RuntimeError):
+        validator.validate_idea(IDEA, INDUSTRY)